@@ -50,7 +50,14 @@ echo "⚠️  This will clear any existing data and create fresh tables and data
 
 # The generate-data script handles data generation
 # Use python3 directly since npm may not be available in standalone build
-python3 scripts/generate_data.py --database-url "$DATABASE_URL" --force
+# Generated datasets are cached in SNAPSHOT_DIR (mount a volume there to keep them
+# across containers); a matching snapshot is restored instead of regenerated
+if [ -n "$SNAPSHOT_DIR" ]; then
+  echo "   Using dataset snapshot cache in $SNAPSHOT_DIR"
+  python3 scripts/generate_data.py --database-url "$DATABASE_URL" --force --snapshot-dir "$SNAPSHOT_DIR"
+else
+  python3 scripts/generate_data.py --database-url "$DATABASE_URL" --force
+fi
 echo "✅ Fresh database and sample data generated!"
 
 # Quick connection test
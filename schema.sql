@@ -1,10 +1,17 @@
 -- Enable UUID extension if not already enabled
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Enable trigram matching for indexed ILIKE searches on titles
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Drop all tables if they exist (in reverse dependency order)
+DROP TABLE IF EXISTS deferred_constraints CASCADE;
+DROP TABLE IF EXISTS generation_progress CASCADE;
+DROP TABLE IF EXISTS generation_runs CASCADE;
 DROP TABLE IF EXISTS property_history CASCADE;
 DROP TABLE IF EXISTS property_images CASCADE;
 DROP TABLE IF EXISTS property_feature_mappings CASCADE;
+DROP TABLE IF EXISTS search_facet_counts CASCADE;
 DROP TABLE IF EXISTS search_table CASCADE;
 DROP TABLE IF EXISTS properties CASCADE;
 DROP TABLE IF EXISTS agents CASCADE;
@@ -179,18 +186,23 @@ CREATE TABLE property_images (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- 12. Property price/status history
+-- 12. Property price/status history, partitioned by month of event_date.
+-- Monthly partitions are created by the data generator, and rows outside them
+-- go to the default partition.
 CREATE TABLE property_history (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     property_id UUID NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
     event_type VARCHAR(50) NOT NULL, -- price_change, status_change, listing
     old_value TEXT,
     new_value TEXT,
     price_change DECIMAL(12,2),
     status_change VARCHAR(100),
-    event_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    notes TEXT
-);
+    event_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    notes TEXT,
+    PRIMARY KEY (id, event_date)
+) PARTITION BY RANGE (event_date);
+
+CREATE TABLE property_history_default PARTITION OF property_history DEFAULT;
 
 -- 13. Search table - denormalized table for fast searching
 CREATE TABLE search_table (
@@ -256,5 +268,54 @@ CREATE TABLE search_table (
     agent_total_reviews INTEGER,
     property_features_names TEXT[],
     property_features_categories TEXT[],
-    property_features_descriptions TEXT[]
-);
\ No newline at end of file
+    property_features_descriptions TEXT[],
+    search_vector tsvector,
+    -- Cell of a 0.01 degree lat/long grid, numbered row by row, for bounding-box and radius searches
+    grid_cell INTEGER,
+    -- Bit (feature id - 1) set for each feature, so "has all of" filters are one bitwise AND
+    property_features_mask BIGINT NOT NULL DEFAULT 0
+);
+
+-- 14. Facet counts for the search filters, maintained with search_table so the
+-- filter UI reads counts by primary key instead of grouping search_table.
+-- province_code and listing_type_name are '' in rows counting across all values.
+CREATE TABLE search_facet_counts (
+    facet VARCHAR(50) NOT NULL, -- city, property_type, listing_type, status, bedrooms, price, monthly_rent
+    facet_value VARCHAR(100) NOT NULL, -- price facets hold the lower bound of the price bucket
+    province_code VARCHAR(2) NOT NULL DEFAULT '',
+    listing_type_name VARCHAR(50) NOT NULL DEFAULT '',
+    property_count INTEGER NOT NULL,
+    PRIMARY KEY (facet, province_code, listing_type_name, facet_value)
+);
+
+-- 15. Generation runs of scripts/generate_data.py, with the settings their rows depend on,
+-- so an interrupted run can be resumed with the same seed, counts and reference date
+CREATE TABLE generation_runs (
+    id SERIAL PRIMARY KEY,
+    settings JSONB NOT NULL, -- seed, properties, agents, chunk_size, partition_by
+    reference_date DATE NOT NULL, -- listing dates are generated relative to it
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+-- 16. Steps committed by a generation run, recorded in the transaction that wrote them:
+-- lookup_data, agents, and one properties row per chunk with the random state it was generated from
+CREATE TABLE generation_progress (
+    run_id INTEGER NOT NULL REFERENCES generation_runs(id) ON DELETE CASCADE,
+    step VARCHAR(50) NOT NULL,
+    chunk_start INTEGER NOT NULL DEFAULT 0, -- index of the chunk's first property
+    row_count INTEGER NOT NULL DEFAULT 0,
+    seed BIGINT NOT NULL, -- base seed and SeedSequence spawn key of the chunk's generator
+    spawn_key INTEGER[] NOT NULL,
+    committed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, step, chunk_start)
+);
+
+-- 17. Constraints dropped by scripts/generate_data.py --fast-load for the duration of
+-- the load, re-added (NOT VALID, then VALIDATE) once the rows are in
+CREATE TABLE deferred_constraints (
+    table_name VARCHAR(100) NOT NULL,
+    constraint_name VARCHAR(100) NOT NULL,
+    definition TEXT NOT NULL, -- as returned by pg_get_constraintdef
+    PRIMARY KEY (table_name, constraint_name)
+);
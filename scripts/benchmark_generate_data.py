@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Benchmark the data generator phase by phase at several scales.
+
+Each (backend, scale) run happens in a fresh process so its peak RSS is its own.
+The `fake` backend is an in-process stand-in for DatabaseConnection that records
+the statements it receives and drains COPY streams without a server, so the
+SQL-only phases (update_search_vectors, build_search_table) do no work there; the
+`postgres` backend loads into a throwaway database, either on an existing server
+(--database-url) or in a temporary cluster started with initdb. With --fast-load,
+each postgres scale also runs in the generator's fast-load mode, and the load time
+saved is reported.
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import argparse
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+
+import generate_data as gd
+
+BACKENDS = ['fake', 'postgres']
+DEFAULT_SCALES = [1000, 20000, 200000]
+
+# Phases that load rows, with the fast-load set-up and tear-down they pay for
+LOAD_PHASES = ['begin_fast_load', 'insert_lookup_data', 'generate_agents', 'generate_properties', 'finish_fast_load']
+
+# Phases that run entirely in SQL, so the fake backend reports no rows/s for them
+SQL_PHASES = ['update_search_vectors', 'build_search_table']
+
+class FakeCursor:
+    """Cursor returned by FakeConnection: every query matches nothing, and the catalog
+    and bookkeeping lookups answer as on a fresh schema.sql database."""
+
+    rowcount = 0
+
+    def fetchone(self) -> Dict[str, Any]:
+        # Counts, property_history's partitioning, absent monthly partitions, an
+        # unpartitioned properties table, and the generation run
+        return {'count': 0, 'relkind': 'p', 'created': False, 'stranded': False, 'key': None,
+                'tracked': True, 'id': 1}
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        return []
+
+class CountingConnection(gd.DatabaseConnection):
+    """DatabaseConnection that counts round trips and statements by leading keyword,
+    under the innermost metrics phase they run in.
+
+    executemany sends one statement per parameter set, so each one is a round trip.
+    """
+
+    def __init__(self, database_url: str):
+        super().__init__(database_url)
+        # phase -> {keyword: round trips}
+        self.statements: Dict[str, Dict[str, int]] = {}
+
+    def record(self, query: str, round_trips: int = 1):
+        keyword = query.split(None, 1)[0].upper() if query.strip() else ''
+        statements = self.statements.setdefault(self.metrics.current.name if self.metrics else '', {})
+        statements[keyword] = statements.get(keyword, 0) + round_trips
+
+    def execute_query(self, query: str, params: tuple = None):
+        self.record(query)
+        return super().execute_query(query, params)
+
+    def execute_many(self, query: str, params_list: List[tuple]) -> None:
+        self.record(query, len(params_list))
+        super().execute_many(query, params_list)
+
+    def copy_rows(self, table, columns, rows, binary: bool = False) -> int:
+        self.record('COPY')
+        return super().copy_rows(table, columns, rows, binary)
+
+    def commit(self):
+        self.record('COMMIT')
+        super().commit()
+
+    def rollback(self):
+        self.record('ROLLBACK')
+        super().rollback()
+
+class FakeConnection(CountingConnection):
+    """In-process stand-in for DatabaseConnection that records statements instead of running them."""
+
+    def sibling(self) -> 'FakeConnection':
+        db = FakeConnection(self.database_url)
+        db.metrics = self.metrics
+        return db
+
+    def connect(self) -> bool:
+        return True
+
+    def execute_query(self, query: str, params: tuple = None) -> FakeCursor:
+        self.record(query)
+        return FakeCursor()
+
+    def execute_many(self, query: str, params_list: List[tuple]) -> None:
+        self.record(query, len(params_list))
+
+    def copy_rows(self, table, columns, rows, binary: bool = False) -> int:
+        # Encode everything, exactly as a real COPY would, and throw the bytes away
+        self.record('COPY')
+        stream = gd.CopyStream(rows, [wire_type for _, wire_type in columns], binary=binary)
+        while stream.read(gd.COPY_READ_SIZE):
+            pass
+        return stream.row_count
+
+    def commit(self):
+        self.record('COMMIT')
+
+    def rollback(self):
+        self.record('ROLLBACK')
+
+    def set_autocommit(self, enabled: bool):
+        pass
+
+    def close(self):
+        pass
+
+class LocalPostgres:
+    """Throwaway PostgreSQL cluster in a temporary directory, managed with initdb and pg_ctl."""
+
+    def __init__(self, bin_dir: Optional[str] = None):
+        self.bin_dir = bin_dir
+        self.directory = None
+        self.url = None
+
+    def tool(self, name: str) -> str:
+        path = os.path.join(self.bin_dir, name) if self.bin_dir else shutil.which(name)
+        if not path:
+            raise RuntimeError(f"{name} not found; pass --pg-bin or --database-url")
+        return path
+
+    def __enter__(self) -> 'LocalPostgres':
+        self.directory = tempfile.mkdtemp(prefix='seeksphere-bench-')
+        data = os.path.join(self.directory, 'data')
+
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+
+        subprocess.run([self.tool('initdb'), '-D', data, '-U', 'postgres', '-A', 'trust', '--no-sync'],
+                       check=True, stdout=subprocess.DEVNULL)
+        options = f"-p {port} -k {self.directory} -c listen_addresses='' -c fsync=off -c full_page_writes=off"
+        subprocess.run([self.tool('pg_ctl'), '-D', data, '-o', options, '-l', os.path.join(self.directory, 'log'), '-w', 'start'],
+                       check=True, stdout=subprocess.DEVNULL)
+
+        self.url = f"postgresql://postgres@/postgres?host={self.directory}&port={port}"
+        return self
+
+    def __exit__(self, *exc):
+        subprocess.run([self.tool('pg_ctl'), '-D', os.path.join(self.directory, 'data'), '-m', 'immediate', 'stop'],
+                       stdout=subprocess.DEVNULL)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def create_database(admin_url: str, name: str) -> str:
+    """Create an empty database with the application schema and return its DSN."""
+    admin = psycopg2.connect(admin_url)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS {name}")
+        cursor.execute(f"CREATE DATABASE {name}")
+    admin.close()
+
+    dsn = psycopg2.extensions.make_dsn(admin_url, dbname=name)
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+
+    with open(gd.SCHEMA_FILE) as f, connection.cursor() as cursor:
+        for statement in f.read().split(';'):
+            if not statement.strip():
+                continue
+            try:
+                cursor.execute(statement)
+            except (psycopg2.errors.UndefinedFile, psycopg2.errors.FeatureNotSupported):
+                # Extension not shipped with this server: uuid-ossp has a built-in
+                # replacement, and trigram indexes are skipped by build_indexes
+                if 'uuid-ossp' in statement:
+                    cursor.execute("CREATE FUNCTION uuid_generate_v4() RETURNS uuid LANGUAGE sql AS 'SELECT gen_random_uuid()'")
+
+    connection.close()
+    return dsn
+
+def drop_database(admin_url: str, name: str):
+    admin = psycopg2.connect(admin_url)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS {name}")
+    admin.close()
+
+def run_scale(backend: str, scale: int, admin_url: Optional[str], chunk_size: int, seed: int, verbose: bool,
+              mode: str = 'normal') -> List[Dict[str, Any]]:
+    """Run every phase once at one scale, in normal or fast-load mode, and return a result row per phase."""
+    database = f"seeksphere_bench_{os.getpid()}"
+    if backend == 'fake':
+        db = FakeConnection('fake://')
+    else:
+        db = CountingConnection(create_database(admin_url, database))
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    results = []
+
+    try:
+        with output:
+            db.connect()
+            generator = gd.DataGenerator(gd.PostgresSink(db, batch_size=chunk_size), seed=seed, chunk_size=chunk_size)
+
+            def result(phase: str, rows: Optional[int], wall: float, cpu: float, written: int,
+                       parent: Optional[str] = None) -> Dict[str, Any]:
+                statements = db.statements.get(phase, {})
+                return {
+                    'backend': backend,
+                    'scale': scale,
+                    'mode': mode,
+                    'phase': phase,
+                    'parent': parent,
+                    'rows': rows,
+                    'rows_written': written,
+                    'seconds': round(wall, 4),
+                    'cpu_seconds': round(cpu, 4),
+                    'rows_per_second': round(rows / wall, 1) if rows is not None and wall > 0 else None,
+                    'round_trips': sum(statements.values()),
+                    'statements': statements,
+                    'peak_rss_kb': gd.peak_rss_kb()
+                }
+
+            def measure(phase: str, rows: Any, action):
+                """Time one generator call; the phases it opens itself get their own rows,
+                and the call's row keeps only the time spent outside them."""
+                written = sum(stats[0] for stats in generator.load_stats.values())
+                with generator.metrics.phase(phase) as stats:
+                    action()
+                written = sum(stats[0] for stats in generator.load_stats.values()) - written
+                nested = [inner for inner in generator.metrics.phases if inner.parent == phase]
+                rows = rows() if callable(rows) else rows
+                results.append(result(phase, rows,
+                                      stats.wall_seconds - sum(inner.wall_seconds for inner in nested),
+                                      stats.cpu_seconds - sum(inner.cpu_seconds for inner in nested),
+                                      written))
+                for inner in nested:
+                    inner_rows = None if backend == 'fake' and inner.name in SQL_PHASES else scale
+                    results.append(result(inner.name, inner_rows, inner.wall_seconds, inner.cpu_seconds,
+                                          sum(inner.rows_written.values()), parent=phase))
+
+            # Chunks are recorded in generation_progress, as in a real run
+            generator.start_run({'seed': seed, 'properties': scale, 'agents': gd.AGENTS_COUNT, 'chunk_size': chunk_size,
+                                 'partition_by': None, 'fast_load': mode == 'fast-load'})
+            if mode == 'fast-load':
+                measure('begin_fast_load', 0, generator.begin_fast_load)
+            measure('insert_lookup_data', lambda: sum(len(rows) for rows in generator.lookup_rows.values()),
+                    generator.insert_lookup_data)
+            measure('generate_agents', gd.AGENTS_COUNT, generator.generate_agents)
+            # The production path: history partitions, routes and progress bookkeeping, then
+            # finish_fast_load, update_search_vectors and build_search_table as nested phases.
+            # Statements run on the helper connections are not counted as round trips
+            measure('generate_properties', scale, lambda: generator.generate_properties(scale))
+    finally:
+        db.close()
+        if backend == 'postgres':
+            drop_database(admin_url, database)
+
+    return results
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """Print the rows/s change against a baseline report; False if any phase regressed past the limit."""
+    previous = {(r['backend'], r['scale'], r.get('mode', 'normal'), r['phase']): r for r in baseline['results']}
+    ok = True
+
+    print(f"\n📊 Compared with {baseline.get('commit') or 'baseline'}:")
+    for result in results:
+        old = previous.get((result['backend'], result['scale'], result['mode'], result['phase']))
+        if not old or not old['rows_per_second'] or not result['rows_per_second']:
+            continue
+        change = (result['rows_per_second'] / old['rows_per_second'] - 1) * 100
+        flag = ''
+        if max_regression is not None and change < -max_regression:
+            flag = '  ❌ regression'
+            ok = False
+        print(f"   {result['backend']:8} {result['scale']:>8} {result['mode']:9} {result['phase']:24} {change:+7.1f}% rows/s, "
+              f"round trips {old['round_trips']} -> {result['round_trips']}{flag}")
+
+    return ok
+
+def fast_load_savings(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Load time of each postgres scale in normal and fast-load mode, and the difference."""
+    totals: Dict[tuple, float] = {}
+    for result in results:
+        if result['phase'] in LOAD_PHASES:
+            key = (result['backend'], result['scale'], result['mode'])
+            totals[key] = totals.get(key, 0.0) + result['seconds']
+
+    savings = []
+    for (backend, scale, mode), fast in totals.items():
+        normal = totals.get((backend, scale, 'normal'))
+        if mode != 'fast-load' or not normal:
+            continue
+        savings.append({
+            'backend': backend,
+            'scale': scale,
+            'normal_seconds': round(normal, 4),
+            'fast_load_seconds': round(fast, 4),
+            'seconds_saved': round(normal - fast, 4),
+            'percent_saved': round((normal - fast) / normal * 100, 1)
+        })
+    return savings
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Benchmark the Seeksphere data generator phase by phase')
+    parser.add_argument('--backends', default='fake,postgres', help='Comma-separated backends to run: fake, postgres (default: fake,postgres)')
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)), help='Comma-separated property counts (default: 1000,20000,200000)')
+    parser.add_argument('--database-url', help='Existing server to create throwaway databases on; without it a temporary cluster is started')
+    parser.add_argument('--pg-bin', help='Directory holding initdb and pg_ctl for the temporary cluster (default: PATH)')
+    parser.add_argument('--chunk-size', type=int, default=gd.CHUNK_SIZE, help=f'Generator chunk size (default: {gd.CHUNK_SIZE})')
+    parser.add_argument('--seed', type=int, default=42, help='Base random seed (default: 42)')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare rows/s and round trips against')
+    parser.add_argument('--max-regression', type=float, help='Exit non-zero if any phase loses more than this percentage of rows/s against --baseline')
+    parser.add_argument('--fast-load', action='store_true', help='Also run each postgres scale with UNLOGGED tables and deferred constraints, and report the load time saved')
+    parser.add_argument('--verbose', action='store_true', help="Show the generator's own output")
+
+    args = parser.parse_args()
+    backends = [backend.strip() for backend in args.backends.split(',') if backend.strip()]
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+
+    for backend in backends:
+        if backend not in BACKENDS:
+            parser.error(f"unknown backend: {backend}")
+
+    cluster = None
+    admin_url = args.database_url
+    if 'postgres' in backends and not admin_url:
+        cluster = LocalPostgres(args.pg_bin).__enter__()
+        admin_url = cluster.url
+
+    results = []
+    try:
+        # One fresh process per run keeps peak RSS and module state independent
+        context = multiprocessing.get_context('spawn')
+        for backend in backends:
+            modes = ['normal', 'fast-load'] if args.fast_load and backend == 'postgres' else ['normal']
+            for scale in scales:
+                for mode in modes:
+                    print(f"⏱️  {backend} backend, {scale} properties{', fast load' if mode == 'fast-load' else ''}...", file=sys.stderr)
+                    with context.Pool(1) as pool:
+                        rows = pool.apply(run_scale, (backend, scale, admin_url, args.chunk_size, args.seed, args.verbose, mode))
+                    for row in rows:
+                        print(f"   {row['phase']:24} {row['seconds']:8.3f}s {row['rows_per_second'] or 0:>12,.0f} rows/s "
+                              f"{row['round_trips']:>6} round trips {row['peak_rss_kb'] / 1024:8.1f} MiB peak", file=sys.stderr)
+                    results.extend(rows)
+    finally:
+        if cluster:
+            cluster.__exit__(None, None, None)
+
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'chunk_size': args.chunk_size,
+        'results': results
+    }
+
+    savings = fast_load_savings(results)
+    if savings:
+        report['fast_load_savings'] = savings
+        for row in savings:
+            print(f"⚡ {row['scale']} properties: load took {row['fast_load_seconds']:.2f}s with --fast-load vs "
+                  f"{row['normal_seconds']:.2f}s, {row['seconds_saved']:.2f}s ({row['percent_saved']:.1f}%) saved", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with contextlib.redirect_stdout(sys.stderr):
+            ok = compare(results, baseline, args.max_regression)
+        if not ok:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
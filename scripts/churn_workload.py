@@ -0,0 +1,369 @@
+"""
+Live listing churn for search load tests.
+
+A ChurnRunner applies a steady stream of the mutations a listings database sees
+in production: price reductions, status transitions (Active to Pending to Sold,
+rentals to Rented, with sold_date filled on closing), new listings and
+delistings. Each mutation writes properties and property_history and pushes the
+property's row into search_table in the same transaction, the way the
+incremental refresh does, so the search indexes and facet counts are maintained
+while reads run against them.
+
+New listings come from the generator's own property engine with the seed and
+property count of the run that loaded the database, so they look like the
+generated ones and their MLS numbers continue the same keyed permutation. Each
+is recorded in generation_progress under its own step, `churn`, so the run's
+`properties` chunks still describe exactly what it generated.
+"""
+
+import itertools
+import sys
+import threading
+import time
+import uuid
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+import generate_data as gd
+
+# Mutation kinds and their default share of the churn
+CHURN_MUTATIONS = [
+    ('price_change', 0.5),
+    ('status_change', 0.2),
+    ('new_listing', 0.15),
+    ('delisting', 0.15)
+]
+
+# Tables whose writes and index growth are reported
+CHURN_TABLES = ['properties', 'property_history', 'search_table']
+
+# Separates the churn random streams from the read workers' [seed, index]
+CHURN_STREAM = 1
+
+PERCENTILES = [50, 95, 99]
+
+PICK_PROPERTY = """
+    SELECT id, status_id, listing_type_id, list_price, monthly_rent, total_area_sqft
+    FROM properties
+    WHERE id >= %s::uuid AND status_id = ANY(%s)
+    ORDER BY id
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+"""
+
+INSERT_HISTORY = """
+    INSERT INTO property_history (property_id, event_type, old_value, new_value, price_change, status_change, event_date, notes)
+    VALUES (%s, %s, %s, %s, %s, %s, LOCALTIMESTAMP, %s)
+"""
+
+# Sums over the leaf partitions of a table, or the table itself when it is not partitioned
+TABLE_ACTIVITY = """
+    WITH leaves AS (
+        SELECT %(table)s::regclass AS relid
+        UNION SELECT relid FROM pg_partition_tree(%(table)s::regclass) WHERE isleaf
+    )
+    SELECT COALESCE(SUM(s.n_tup_ins), 0) AS inserted, COALESCE(SUM(s.n_tup_upd), 0) AS updated,
+           COALESCE(SUM(s.n_tup_hot_upd), 0) AS hot_updated, COALESCE(SUM(s.n_tup_del), 0) AS deleted,
+           (SELECT COALESCE(SUM(pg_indexes_size(relid)), 0) FROM leaves) AS index_bytes
+    FROM pg_stat_user_tables s
+    WHERE s.relid IN (SELECT relid FROM leaves)
+"""
+
+def parse_mix(text: str) -> List[Tuple[str, float]]:
+    """Parse `kind=share,...` into CHURN_MUTATIONS form; kinds left out get no share."""
+    kinds = [name for name, _ in CHURN_MUTATIONS]
+    shares = dict.fromkeys(kinds, 0.0)
+    for item in text.split(','):
+        name, _, share = item.partition('=')
+        name = name.strip()
+        if name not in shares:
+            raise ValueError(f"Unknown mutation {name!r}, expected one of {', '.join(kinds)}")
+        shares[name] = float(share)
+    if sum(shares.values()) <= 0:
+        raise ValueError("The churn mix needs at least one positive share")
+    return [(name, shares[name]) for name in kinds]
+
+def table_activity(db: gd.DatabaseConnection) -> Dict[str, Dict[str, int]]:
+    """Row write counters and total index size of each CHURN_TABLES table."""
+    activity = {}
+    for table in CHURN_TABLES:
+        cursor = db.execute_query(TABLE_ACTIVITY, {'table': table})
+        activity[table] = {key: int(value) for key, value in cursor.fetchone().items()}
+    db.commit()
+    return activity
+
+class ChurnRunner:
+    """Apply listing mutations from several connections and record latencies per mutation kind."""
+
+    def __init__(self, connections: List[gd.DatabaseConnection], seed: int, rate: Optional[float], duration: float,
+                 mix: List[Tuple[str, float]] = CHURN_MUTATIONS):
+        self.connections = connections
+        self.seed = seed
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix
+        self.tickets = itertools.count()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        kinds = [name for name, _ in CHURN_MUTATIONS]
+        self.latencies: Dict[str, List[float]] = {name: [] for name in kinds}
+        self.write_times: Dict[str, List[float]] = {name: [] for name in kinds}
+        self.search_times: Dict[str, List[float]] = {name: [] for name in kinds}
+        self.errors: Dict[str, int] = {name: 0 for name in kinds}
+        self.elapsed = 0.0
+        self.load_run(connections[0])
+
+    def load_run(self, db: gd.DatabaseConnection):
+        """Find the run that generated the data, and the lookups and ids mutations need."""
+        cursor = db.execute_query("SELECT to_regclass('generation_runs') IS NOT NULL AS exists")
+        run = None
+        if cursor.fetchone()['exists']:
+            cursor = db.execute_query(
+                "SELECT id, settings FROM generation_runs WHERE completed_at IS NOT NULL ORDER BY id DESC LIMIT 1"
+            )
+            run = cursor.fetchone()
+
+        if run is not None:
+            self.run_id = run['id']
+            self.run_seed = run['settings']['seed']
+            self.run_properties = run['settings']['properties']
+            cursor = db.execute_query(
+                "SELECT COALESCE(MAX(chunk_start + row_count), 0) AS next FROM generation_progress "
+                "WHERE run_id = %s AND step IN ('properties', 'churn')",
+                (self.run_id,)
+            )
+            self.next_index = max(cursor.fetchone()['next'], self.run_properties)
+        else:
+            # Loaded from files or a snapshot: MLS numbers of new listings may collide with existing ones
+            print("⚠️  No completed generation run recorded, new listings use --seed and the current property count",
+                  file=sys.stderr)
+            cursor = db.execute_query("SELECT COUNT(*) AS count FROM properties")
+            self.run_id = None
+            self.run_seed = self.seed
+            self.run_properties = self.next_index = cursor.fetchone()['count']
+
+        cursor = db.execute_query("SELECT id, name FROM property_status")
+        self.status_ids = {row['name']: row['id'] for row in cursor.fetchall()}
+        self.status_names = {status_id: name for name, status_id in self.status_ids.items()}
+        cursor = db.execute_query("SELECT id, name FROM listing_types")
+        self.rental_listing_ids = {row['id'] for row in cursor.fetchall() if row['name'] in gd.RENTAL_LISTING_TYPES}
+        cursor = db.execute_query("SELECT id FROM agents ORDER BY id")
+        self.agent_ids = [row['id'] for row in cursor.fetchall()]
+
+        inspector = gd.DataGenerator(gd.PostgresSink(db))
+        self.property_routes = inspector.find_property_routes()
+        self.partition_key = inspector.partition_key('search_table')
+        # Churn events are dated now, so make sure their months have partitions
+        inspector.create_loaded_history_partitions()
+        db.commit()
+
+        generator = self.open_generator(db)
+        self.engine = gd.ColumnarPropertyGenerator(generator.load_property_lookups(), self.run_seed, date.today(),
+                                                   self.run_properties)
+
+        # A wider allocator would permute differently and reissue the run's numbers, so
+        # new listings only get the indices left in the run's key space
+        space = self.engine.mls_keys.space
+        if dict(self.mix).get('new_listing') and self.next_index >= space:
+            raise ValueError(f"All {space} MLS numbers of the generation run's key space are taken, "
+                             "so new listings cannot be added; leave new_listing out of --churn-mix")
+
+    def open_generator(self, db: gd.DatabaseConnection) -> gd.DataGenerator:
+        """A DataGenerator writing single rows over db, for new listings and search_table pushes."""
+        generator = gd.DataGenerator(gd.PostgresSink(db, load_method='insert'), seed=self.run_seed,
+                                     property_routes=self.property_routes, run_id=self.run_id)
+        generator.lookup_rows = generator.build_lookup_rows()
+        generator.agent_ids = self.agent_ids
+        return generator
+
+    def run(self) -> 'ChurnRunner':
+        self.before = table_activity(self.connections[0])
+        self.started = time.perf_counter()
+        self.deadline = self.started + self.duration
+        threads = [threading.Thread(target=self.worker, args=(index, db)) for index, db in enumerate(self.connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        self.after = table_activity(self.connections[0])
+        return self
+
+    def stop(self):
+        """Make the workers return after their current mutation."""
+        self.stopping.set()
+
+    def worker(self, index: int, db: gd.DatabaseConnection):
+        rng = np.random.default_rng([self.seed, CHURN_STREAM, index])
+        generator = self.open_generator(db)
+        names = [name for name, _ in self.mix]
+        shares = np.array([share for _, share in self.mix])
+        shares = shares / shares.sum()
+
+        while not self.stopping.is_set():
+            if self.rate:
+                scheduled = self.started + next(self.tickets) / self.rate
+                if scheduled >= self.deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0 and self.stopping.wait(delay):
+                    break
+            else:
+                scheduled = time.perf_counter()
+                if scheduled >= self.deadline:
+                    break
+
+            kind = names[rng.choice(len(names), p=shares)]
+            began = time.perf_counter()
+            try:
+                property_ids = getattr(self, kind)(generator, rng)
+                written = time.perf_counter()
+                if property_ids:
+                    generator.refresh_search_table_rows(property_ids, self.partition_key)
+                else:
+                    db.rollback()
+            except Exception as e:
+                db.rollback()
+                with self.lock:
+                    self.errors[kind] += 1
+                    if self.errors[kind] == 1:
+                        print(f"❌ {kind} failed: {e}", file=sys.stderr)
+                continue
+            finished = time.perf_counter()
+
+            with self.lock:
+                self.latencies[kind].append(finished - scheduled)
+                self.write_times[kind].append(written - began)
+                self.search_times[kind].append(finished - written)
+
+        # Statistics of this backend are otherwise only flushed once it has been idle for a while
+        cursor = db.execute_query("SELECT current_setting('server_version_num')::int >= 150000 AS flushable")
+        if cursor.fetchone()['flushable']:
+            db.execute_query("SELECT pg_stat_force_next_flush()")
+        db.commit()
+
+    def pick_property(self, db: gd.DatabaseConnection, rng: np.random.Generator, statuses: List[str]) -> Optional[Dict[str, Any]]:
+        """Lock a random property in one of the statuses, starting from a random point of the id order."""
+        status_ids = [self.status_ids[name] for name in statuses]
+        for low in (str(uuid.UUID(bytes=rng.bytes(16))), str(uuid.UUID(int=0))):
+            row = db.execute_query(PICK_PROPERTY, (low, status_ids)).fetchone()
+            if row is not None:
+                return row
+        return None
+
+    def price_change(self, generator: gd.DataGenerator, rng: np.random.Generator) -> List[str]:
+        """Reduce the asking price or rent of an Active listing by PRICE_DROP_RANGE."""
+        row = self.pick_property(generator.db, rng, ['Active'])
+        if row is None:
+            return []
+        drop = rng.uniform(*gd.PRICE_DROP_RANGE)
+        if row['listing_type_id'] in self.rental_listing_ids:
+            old_price = float(row['monthly_rent'])
+            new_price = round(old_price * (1 - drop), 2)
+            generator.db.execute_query(
+                "UPDATE properties SET monthly_rent = %s, last_updated = LOCALTIMESTAMP WHERE id = %s",
+                (new_price, row['id'])
+            )
+        else:
+            old_price = float(row['list_price'])
+            new_price = round(old_price * (1 - drop), 2)
+            generator.db.execute_query(
+                "UPDATE properties SET list_price = %s, price_per_sqft = %s, last_updated = LOCALTIMESTAMP WHERE id = %s",
+                (new_price, round(new_price / row['total_area_sqft'], 2), row['id'])
+            )
+        generator.db.execute_query(INSERT_HISTORY, (
+            row['id'], 'price_change', f"{old_price:.2f}", f"{new_price:.2f}", round(new_price - old_price, 2), None,
+            f"Price reduced {drop:.1%}"
+        ))
+        return [str(row['id'])]
+
+    def status_change(self, generator: gd.DataGenerator, rng: np.random.Generator) -> List[str]:
+        """Move a listing one step on: a sale to Pending and then Sold, a rental to Rented."""
+        row = self.pick_property(generator.db, rng, ['Active', 'Pending'])
+        if row is None:
+            return []
+        old_status = self.status_names[row['status_id']]
+        if old_status == 'Pending':
+            new_status = 'Sold'
+        elif row['listing_type_id'] in self.rental_listing_ids:
+            new_status = 'Rented'
+        else:
+            new_status = 'Pending'
+        return self.set_status(generator, row, old_status, new_status)
+
+    def delisting(self, generator: gd.DataGenerator, rng: np.random.Generator) -> List[str]:
+        """Take an Active listing off the market."""
+        row = self.pick_property(generator.db, rng, ['Active'])
+        if row is None:
+            return []
+        return self.set_status(generator, row, 'Active', 'Off Market')
+
+    def set_status(self, generator: gd.DataGenerator, row: Dict[str, Any], old_status: str, new_status: str) -> List[str]:
+        # Sales and rentals close on the day they leave the market as Sold or Rented
+        closed = new_status in ('Sold', 'Rented')
+        generator.db.execute_query(f"""
+            UPDATE properties
+            SET status_id = %s, last_updated = LOCALTIMESTAMP{', sold_date = CURRENT_DATE' if closed else ''}
+            WHERE id = %s
+        """, (self.status_ids[new_status], row['id']))
+        generator.db.execute_query(INSERT_HISTORY, (
+            row['id'], 'status_change', old_status, new_status, None, new_status, gd.STATUS_CHANGE_NOTES.get(new_status)
+        ))
+        return [str(row['id'])]
+
+    def new_listing(self, generator: gd.DataGenerator, rng: np.random.Generator) -> List[str]:
+        """Generate and write one new Active listing, with features, images and its listing event."""
+        with self.lock:
+            start = self.next_index
+            self.next_index += 1
+        if start >= self.engine.mls_keys.space:
+            raise ValueError(f"MLS key space of the generation run ({self.engine.mls_keys.space} numbers) is used up")
+        chunk = self.engine.generate(start, 1, new_listings=True)
+        generator.write_chunk(chunk, step='churn')
+        return [str(uuid.UUID(bytes=bytes(property_id))) for property_id in chunk.columns['id'].tolist()]
+
+    def report(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Mutations per second and latency percentiles (ms) per kind plus an `all` row, and per-table write activity."""
+        rows = []
+        kinds = [name for name, _ in CHURN_MUTATIONS]
+        for kind in kinds + ['all']:
+            if kind == 'all':
+                latencies = [value for name in kinds for value in self.latencies[name]]
+                write_times = [value for name in kinds for value in self.write_times[name]]
+                search_times = [value for name in kinds for value in self.search_times[name]]
+                errors = sum(self.errors.values())
+            else:
+                latencies, write_times, search_times = self.latencies[kind], self.write_times[kind], self.search_times[kind]
+                errors = self.errors[kind]
+
+            row = {
+                'mutation': kind,
+                'mutations': len(latencies),
+                'errors': errors,
+                'mutations_per_second': round(len(latencies) / self.elapsed, 1) if self.elapsed > 0 else None
+            }
+            for percentile in PERCENTILES:
+                row[f'p{percentile}_ms'] = round(float(np.percentile(latencies, percentile)) * 1000, 2) if latencies else None
+            row['max_ms'] = round(max(latencies) * 1000, 2) if latencies else None
+            # Time in properties and property_history, then in the search_table upsert and commit
+            row['mean_write_ms'] = round(float(np.mean(write_times)) * 1000, 2) if write_times else None
+            row['mean_search_push_ms'] = round(float(np.mean(search_times)) * 1000, 2) if search_times else None
+            rows.append(row)
+
+        tables = []
+        for table in CHURN_TABLES:
+            before, after = self.before[table], self.after[table]
+            updated = after['updated'] - before['updated']
+            tables.append({
+                'table': table,
+                'inserted': after['inserted'] - before['inserted'],
+                'updated': updated,
+                'deleted': after['deleted'] - before['deleted'],
+                # HOT updates change no index; the rest write a new entry into every index
+                'hot_update_ratio': round((after['hot_updated'] - before['hot_updated']) / updated, 3) if updated else None,
+                'index_bytes_before': before['index_bytes'],
+                'index_bytes_growth': after['index_bytes'] - before['index_bytes']
+            })
+        return rows, tables
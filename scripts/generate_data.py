@@ -4,19 +4,41 @@ Isolated Python script to generate real estate data for the Seeksphere demo.
 This script is completely independent of the Next.js application.
 """
 
+import atexit
+import contextlib
+import cProfile
+import csv
+import functools
+import glob
+import hashlib
+import io
+import itertools
+import json
+import math
+import multiprocessing
 import os
+import numpy as np
 import psycopg2
 import psycopg2.extras
 import random
+import resource
 import string
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import struct
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
 import argparse
+import re
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Configuration
 TOTAL_PROPERTIES = 20000
-BATCH_SIZE = 1000
+CHUNK_SIZE = 5000
 AGENTS_COUNT = 500
 NEIGHBORHOODS_PER_CITY = 5
 
@@ -34,6 +56,52 @@ PROVINCES_DATA = [
     {'code': 'PE', 'name': 'Prince Edward Island', 'cities': ['Charlottetown', 'Summerside']}
 ]
 
+# City centers (latitude, longitude); generated listings cluster around their neighborhoods
+CITY_COORDINATES = {
+    'Toronto': (43.6532, -79.3832), 'Ottawa': (45.4215, -75.6972), 'Hamilton': (43.2557, -79.8711),
+    'London': (42.9849, -81.2453), 'Kitchener': (43.4516, -80.4925), 'Windsor': (42.3149, -83.0364),
+    'Mississauga': (43.5890, -79.6441), 'Brampton': (43.7315, -79.7624),
+    'Montreal': (45.5017, -73.5673), 'Quebec City': (46.8139, -71.2080), 'Laval': (45.6066, -73.7124),
+    'Gatineau': (45.4765, -75.7013), 'Longueuil': (45.5312, -73.5185), 'Sherbrooke': (45.4042, -71.8929),
+    'Vancouver': (49.2827, -123.1207), 'Victoria': (48.4284, -123.3656), 'Surrey': (49.1913, -122.8490),
+    'Burnaby': (49.2488, -122.9805), 'Richmond': (49.1666, -123.1336), 'Abbotsford': (49.0504, -122.3045),
+    'Calgary': (51.0447, -114.0719), 'Edmonton': (53.5461, -113.4938), 'Red Deer': (52.2690, -113.8116),
+    'Lethbridge': (49.6956, -112.8451), 'Medicine Hat': (50.0405, -110.6766),
+    'Winnipeg': (49.8951, -97.1384), 'Brandon': (49.8485, -99.9501), 'Steinbach': (49.5258, -96.6839),
+    'Thompson': (55.7435, -97.8558),
+    'Saskatoon': (52.1332, -106.6700), 'Regina': (50.4452, -104.6189), 'Prince Albert': (53.2033, -105.7531),
+    'Moose Jaw': (50.3934, -105.5519),
+    'Halifax': (44.6488, -63.5752), 'Sydney': (46.1368, -60.1942), 'Dartmouth': (44.6713, -63.5772),
+    'Truro': (45.3650, -63.2869),
+    'Saint John': (45.2733, -66.0633), 'Moncton': (46.0878, -64.7782), 'Fredericton': (45.9636, -66.6431),
+    'Dieppe': (46.0942, -64.6872),
+    'St. Johns': (47.5615, -52.7126), 'Mount Pearl': (47.5189, -52.8058), 'Corner Brook': (48.9500, -57.9522),
+    'Charlottetown': (46.2382, -63.1311), 'Summerside': (46.3959, -63.7876)
+}
+
+# Neighborhood centers as (km north, km east) of their city center
+NEIGHBORHOOD_OFFSETS_KM = {
+    'Downtown': (0.0, 0.0), 'Central': (0.8, -0.6), 'Midtown': (2.5, 0.0), 'Uptown': (5.0, 0.5),
+    'Old Town': (-1.0, 1.2), 'New Town': (-3.0, -4.0), 'Riverside': (1.0, 3.5), 'Hillside': (-2.5, -2.0),
+    'Parkside': (3.0, -3.0), 'Westside': (0.0, -5.0), 'Eastside': (0.0, 5.0), 'Northside': (7.0, 0.0),
+    'Southside': (-6.0, 0.0), 'Heights': (4.5, 3.5), 'Gardens': (-4.0, 3.0)
+}
+
+# Standard deviation of listing coordinates around their neighborhood (or city) center
+NEIGHBORHOOD_SPREAD_KM = 1.0
+CITY_SPREAD_KM = 5.0
+
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+# search_table.grid_cell numbers a fixed 0.01 degree latitude/longitude grid row by
+# row (cells are about 1.1 km tall). The SEARCH_TABLE_SELECT expression must agree.
+GRID_CELLS_PER_DEGREE = 100
+GRID_COLUMNS = 360 * GRID_CELLS_PER_DEGREE
+
+# KeyAllocator streams: each unique key column gets its own permutation of its indices
+KEY_STREAMS = {'mls_number': 1, 'agent_email': 2, 'license_number': 3}
+
 PROPERTY_TYPES_DATA = [
     {'name': 'House', 'description': 'Single-family detached house', 'category': 'residential'},
     {'name': 'Condo', 'description': 'Condominium unit', 'category': 'residential'},
@@ -59,6 +127,9 @@ PROPERTY_STATUS_DATA = [
     {'name': 'Off Market', 'description': 'Temporarily unavailable', 'is_available': False}
 ]
 
+# search_table.property_features_mask sets bit (property_features.id - 1) for each of
+# a listing's features; ids follow the order of this list, which must stay within the
+# 63 bits of a bigint. The SEARCH_TABLE_SELECT expression must agree.
 PROPERTY_FEATURES_DATA = [
     # Interior features
     {'name': 'Hardwood Floors', 'category': 'interior', 'description': 'Beautiful hardwood flooring throughout'},
@@ -101,18 +172,775 @@ PROPERTY_FEATURES_DATA = [
     {'name': 'Downtown', 'category': 'neighborhood', 'description': 'Downtown location'}
 ]
 
+# Property type configurations for realistic data
+PROPERTY_CONFIGS = {
+    'House': {'bedrooms_range': (2, 5), 'bathrooms_range': (1.5, 4.5), 'sqft_range': (1200, 3500), 'price_range': (300000, 1200000)},
+    'Condo': {'bedrooms_range': (1, 3), 'bathrooms_range': (1.0, 2.5), 'sqft_range': (600, 1800), 'price_range': (200000, 800000)},
+    'Townhouse': {'bedrooms_range': (2, 4), 'bathrooms_range': (1.5, 3.5), 'sqft_range': (1000, 2500), 'price_range': (250000, 900000)},
+    'Apartment': {'bedrooms_range': (1, 2), 'bathrooms_range': (1.0, 2.0), 'sqft_range': (500, 1200), 'price_range': (150000, 500000)},
+    'Duplex': {'bedrooms_range': (3, 6), 'bathrooms_range': (2.0, 4.0), 'sqft_range': (1500, 3000), 'price_range': (400000, 1000000)},
+    'Bungalow': {'bedrooms_range': (2, 4), 'bathrooms_range': (1.5, 3.0), 'sqft_range': (1000, 2500), 'price_range': (300000, 900000)},
+    'Loft': {'bedrooms_range': (1, 2), 'bathrooms_range': (1.0, 2.0), 'sqft_range': (800, 2000), 'price_range': (250000, 700000)},
+    'Studio': {'bedrooms_range': (0, 1), 'bathrooms_range': (1.0, 1.5), 'sqft_range': (400, 800), 'price_range': (150000, 400000)}
+}
+
+# Property types that get a lot size, a unit number or a maintenance fee
+LOT_SIZE_PROPERTY_TYPES = ['House', 'Townhouse', 'Duplex', 'Bungalow']
+UNIT_NUMBER_PROPERTY_TYPES = ['Condo', 'Apartment', 'Loft', 'Studio']
+MAINTENANCE_FEE_PROPERTY_TYPES = ['Condo', 'Apartment']
+RENTAL_LISTING_TYPES = ['Rent', 'Lease']
+
+# property_history events: listings drop their price about every PRICE_DROP_INTERVAL_DAYS
+# while on the market, by PRICE_DROP_RANGE of the asking price, at most MAX_PRICE_DROPS times
+PRICE_DROP_INTERVAL_DAYS = 90
+PRICE_DROP_RANGE = (0.02, 0.08)
+MAX_PRICE_DROPS = 4
+STATUS_CHANGE_NOTES = {item['name']: item['description'] for item in PROPERTY_STATUS_DATA}
+
+HEATING_TYPES = ['Forced Air', 'Radiant', 'Baseboard', 'Heat Pump', 'Electric', 'Gas', 'Oil']
+COOLING_TYPES = ['Central Air', 'Window Units', 'None', 'Heat Pump']
+PARKING_TYPES = ['Garage', 'Driveway', 'Street', 'Underground', 'Surface Lot']
+UTILITIES = ['Electricity', 'Water', 'Heat', 'Internet', 'Cable']
+IMAGE_TYPES = ['exterior', 'interior', 'floor_plan', 'kitchen', 'bathroom', 'bedroom', 'living_room']
+UNIT_SUFFIXES = ['A', 'B', 'C', '']
+
+STREET_NAMES = [
+    'Main St', 'Oak Ave', 'Maple Dr', 'Pine Rd', 'Cedar Blvd', 'Elm St', 'King St', 'Queen St',
+    'First Ave', 'Second Ave', 'Park Ave', 'Church St', 'Mill Rd', 'Hill St', 'Lake Dr',
+    'Forest Ave', 'Garden St', 'Spring St', 'River Rd', 'Mountain View Dr', 'Sunset Blvd',
+    'Victoria St', 'Wellington St', 'Richmond St', 'York St', 'Bay St', 'College St'
+]
+
+TITLE_ADJECTIVES = [
+    'Beautiful', 'Stunning', 'Modern', 'Spacious', 'Charming', 'Luxurious', 'Cozy', 'Bright',
+    'Updated', 'Renovated', 'Contemporary', 'Classic', 'Elegant', 'Comfortable', 'Stylish'
+]
+
+TITLE_FEATURES = [
+    'with great views', 'in prime location', 'with modern amenities', 'near downtown',
+    'with parking', 'newly renovated', 'move-in ready', 'with outdoor space',
+    'in quiet neighborhood', 'with lots of natural light'
+]
+
+# Columns of the denormalized search_table, in insert order
+SEARCH_TABLE_COLUMNS = [
+    'id', 'mls_number', 'street_address', 'unit_number', 'title', 'description', 'year_built',
+    'total_area_sqft', 'lot_size_sqft', 'bedrooms', 'bathrooms', 'half_bathrooms', 'floors', 'list_price',
+    'price_per_sqft', 'monthly_rent', 'maintenance_fee', 'property_taxes_annual', 'heating_type',
+    'cooling_type', 'utilities_included', 'parking_spaces', 'parking_type', 'pet_friendly', 'furnished',
+    'listed_date', 'available_date', 'sold_date', 'last_updated', 'created_at', 'latitude', 'longitude',
+    'province_code', 'province_name', 'province_country_code', 'city_name', 'city_population',
+    'city_latitude', 'city_longitude', 'neighborhood_name', 'neighborhood_average_income',
+    'neighborhood_walkability_score', 'neighborhood_safety_rating', 'property_type_name',
+    'property_type_description', 'property_type_category', 'listing_type_name', 'listing_type_description',
+    'property_status_name', 'property_status_description', 'property_status_is_available',
+    'agent_first_name', 'agent_last_name', 'agent_email', 'agent_phone', 'agent_license_number',
+    'agent_agency_name', 'agent_years_experience', 'agent_rating', 'agent_total_reviews',
+    'property_features_names', 'property_features_categories', 'property_features_descriptions',
+    'search_vector', 'grid_cell', 'property_features_mask'
+]
+
+# Denormalizing SELECT behind search_table; {where} narrows it to a subset of properties
+SEARCH_TABLE_SELECT = """
+    SELECT 
+        p.id,
+        p.mls_number,
+        p.street_address,
+        p.unit_number,
+        p.title,
+        p.description,
+        p.year_built,
+        p.total_area_sqft,
+        p.lot_size_sqft,
+        p.bedrooms,
+        p.bathrooms,
+        p.half_bathrooms,
+        p.floors,
+        p.list_price,
+        p.price_per_sqft,
+        p.monthly_rent,
+        p.maintenance_fee,
+        p.property_taxes_annual,
+        p.heating_type,
+        p.cooling_type,
+        p.utilities_included,
+        p.parking_spaces,
+        p.parking_type,
+        p.pet_friendly,
+        p.furnished,
+        p.listed_date,
+        p.available_date,
+        p.sold_date,
+        p.last_updated,
+        p.created_at,
+        p.latitude,
+        p.longitude,
+        prov.code AS province_code,
+        prov.name AS province_name,
+        prov.country_code AS province_country_code,
+        c.name AS city_name,
+        c.population AS city_population,
+        c.latitude AS city_latitude,
+        c.longitude AS city_longitude,
+        n.name AS neighborhood_name,
+        n.average_income AS neighborhood_average_income,
+        n.walkability_score AS neighborhood_walkability_score,
+        n.safety_rating AS neighborhood_safety_rating,
+        pt.name AS property_type_name,
+        pt.description AS property_type_description,
+        pt.category AS property_type_category,
+        lt.name AS listing_type_name,
+        lt.description AS listing_type_description,
+        ps.name AS property_status_name,
+        ps.description AS property_status_description,
+        ps.is_available AS property_status_is_available,
+        a.first_name AS agent_first_name,
+        a.last_name AS agent_last_name,
+        a.email AS agent_email,
+        a.phone AS agent_phone,
+        a.license_number AS agent_license_number,
+        a.agency_name AS agent_agency_name,
+        a.years_experience AS agent_years_experience,
+        a.rating AS agent_rating,
+        a.total_reviews AS agent_total_reviews,
+        COALESCE(
+            ARRAY_AGG(DISTINCT pf.name) FILTER (WHERE pf.name IS NOT NULL),
+            ARRAY[]::TEXT[]
+        ) AS property_features_names,
+        COALESCE(
+            ARRAY_AGG(DISTINCT pf.category) FILTER (WHERE pf.category IS NOT NULL),
+            ARRAY[]::TEXT[]
+        ) AS property_features_categories,
+        COALESCE(
+            ARRAY_AGG(DISTINCT pf.description) FILTER (WHERE pf.description IS NOT NULL),
+            ARRAY[]::TEXT[]
+        ) AS property_features_descriptions,
+        p.search_vector,
+        (FLOOR((p.latitude + 90) * 100) * 36000 + FLOOR((p.longitude + 180) * 100))::INTEGER AS grid_cell,
+        COALESCE(BIT_OR(1::BIGINT << (pf.id - 1)), 0) AS property_features_mask
+    FROM properties p
+    LEFT JOIN provinces prov ON p.province_id = prov.id
+    LEFT JOIN cities c ON p.city_id = c.id
+    LEFT JOIN neighborhoods n ON p.neighborhood_id = n.id
+    LEFT JOIN property_types pt ON p.property_type_id = pt.id
+    LEFT JOIN listing_types lt ON p.listing_type_id = lt.id
+    LEFT JOIN property_status ps ON p.status_id = ps.id
+    LEFT JOIN agents a ON p.agent_id = a.id
+    LEFT JOIN property_feature_mappings pfm ON p.id = pfm.property_id
+    LEFT JOIN property_features pf ON pfm.feature_id = pf.id
+    {where}
+    GROUP BY 
+        -- The partition keys keep p's primary key in the grouping when properties is partitioned
+        p.id, p.province_id, p.listing_type_id, p.mls_number, p.street_address, p.unit_number, p.title, p.description, p.year_built,
+        p.total_area_sqft, p.lot_size_sqft, p.bedrooms, p.bathrooms, p.half_bathrooms, p.floors,
+        p.list_price, p.price_per_sqft, p.monthly_rent, p.maintenance_fee, p.property_taxes_annual,
+        p.heating_type, p.cooling_type, p.utilities_included,
+        p.parking_spaces, p.parking_type, p.pet_friendly, p.furnished,
+        p.listed_date, p.available_date, p.sold_date, p.last_updated, p.created_at,
+        p.latitude, p.longitude,
+        prov.code, prov.name, prov.country_code,
+        c.name, c.population, c.latitude, c.longitude,
+        n.name, n.average_income, n.walkability_score, n.safety_rating,
+        pt.name, pt.description, pt.category,
+        lt.name, lt.description,
+        ps.name, ps.description, ps.is_available,
+        a.first_name, a.last_name, a.email, a.phone, a.license_number,
+        a.agency_name, a.years_experience, a.rating, a.total_reviews
+"""
+
+# Facets counted in search_facet_counts, as value expressions over search_table s.
+# Prices are counted per bucket, named by the bucket's lower bound.
+SALE_PRICE_BUCKETS = [0, 250000, 500000, 750000, 1000000, 1500000, 2000000, 3000000, 5000000]
+RENT_PRICE_BUCKETS = [0, 1000, 1500, 2000, 2500, 3000, 4000, 6000]
+
+def price_bucket_sql(column: str, buckets: List[int]) -> str:
+    """SQL naming the price bucket `column` falls in by its lower bound; NULL prices stay NULL."""
+    bounds = ', '.join(str(bound) for bound in buckets)
+    return f"(ARRAY[{bounds}])[width_bucket({column}, ARRAY[{bounds}]::numeric[])]::text"
+
+SEARCH_FACETS = {
+    'city': 's.city_name',
+    'property_type': 's.property_type_name',
+    'listing_type': 's.listing_type_name',
+    'status': 's.property_status_name',
+    'bedrooms': 's.bedrooms::text',
+    'price': price_bucket_sql('s.list_price', SALE_PRICE_BUCKETS),
+    'monthly_rent': price_bucket_sql('s.monthly_rent', RENT_PRICE_BUCKETS)
+}
+FACET_COUNT_COLUMNS = ['facet', 'facet_value', 'province_code', 'listing_type_name', 'property_count']
+
+# Counts every facet value of the rows in {source} within each filter scope: all
+# listings, per province, per listing type, and per province and listing type;
+# '' stands for "any" in a scope column
+FACET_COUNTS_SELECT = f"""
+    SELECT
+        f.facet,
+        f.facet_value,
+        CASE WHEN GROUPING(s.province_code) = 1 THEN '' ELSE s.province_code END AS province_code,
+        CASE WHEN GROUPING(s.listing_type_name) = 1 THEN '' ELSE s.listing_type_name END AS listing_type_name,
+        COUNT(*) AS property_count
+    FROM {{source}} s
+    CROSS JOIN LATERAL (VALUES {', '.join(f"('{name}', {value})" for name, value in SEARCH_FACETS.items())}) AS f(facet, facet_value)
+    WHERE f.facet_value IS NOT NULL
+    GROUP BY f.facet, f.facet_value,
+        GROUPING SETS ((), (s.province_code), (s.listing_type_name), (s.province_code, s.listing_type_name))
+"""
+
+# Facet counts of the rows in {source}, signed: added for new rows, subtracted for old ones
+FACET_COUNTS_DELTA = f"""
+    SELECT facet, facet_value, province_code, listing_type_name, {{sign}}property_count AS property_count
+    FROM ({FACET_COUNTS_SELECT}) counts
+"""
+
+# Applies the summed {deltas} in key order. Changes that cancel out (a price change
+# within its bucket) touch no row, and concurrent writers lock the rows they share
+# (the all-listings scope above all) in the same order, so they queue instead of deadlocking
+FACET_COUNTS_APPLY = f"""
+    INSERT INTO search_facet_counts ({', '.join(FACET_COUNT_COLUMNS)})
+    SELECT facet, facet_value, province_code, listing_type_name, SUM(property_count)
+    FROM ({{deltas}}) deltas
+    GROUP BY facet, facet_value, province_code, listing_type_name
+    HAVING SUM(property_count) <> 0
+    ORDER BY facet, province_code, listing_type_name, facet_value
+    ON CONFLICT (facet, province_code, listing_type_name, facet_value)
+    DO UPDATE SET property_count = search_facet_counts.property_count + EXCLUDED.property_count
+"""
+
+# Statement-level triggers keep search_facet_counts in step with every change to
+# search_table, including rows removed by ON DELETE CASCADE from properties. Full
+# rebuilds set search_facet_counts.skip for their transaction and recount once.
+# An UPDATE applies its old and new rows as one delta, locking each count row once.
+FACET_COUNTS_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION maintain_search_facet_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF current_setting('search_facet_counts.skip', true) = 'on' THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP = 'UPDATE' THEN
+            {FACET_COUNTS_APPLY.format(deltas=FACET_COUNTS_DELTA.format(sign='', source='new_rows') + ' UNION ALL ' + FACET_COUNTS_DELTA.format(sign='-', source='old_rows'))};
+        ELSIF TG_OP = 'INSERT' THEN
+            {FACET_COUNTS_APPLY.format(deltas=FACET_COUNTS_DELTA.format(sign='', source='new_rows'))};
+        ELSE
+            {FACET_COUNTS_APPLY.format(deltas=FACET_COUNTS_DELTA.format(sign='-', source='old_rows'))};
+        END IF;
+        DELETE FROM search_facet_counts WHERE property_count = 0;
+        RETURN NULL;
+    END
+    $$
+"""
+FACET_COUNTS_TRIGGERS = [
+    ('search_facet_counts_insert', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('search_facet_counts_update', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('search_facet_counts_delete', 'DELETE', 'OLD TABLE AS old_rows')
+]
+
+# Weighted full-text document per property: title (A), city and neighborhood (B),
+# description and feature names (C); {where} narrows it to a subset of properties
+SEARCH_VECTOR_UPDATE = """
+    UPDATE properties p SET search_vector =
+        setweight(to_tsvector('english', COALESCE(p.title, '')), 'A') ||
+        setweight(to_tsvector('english',
+            COALESCE((SELECT c.name FROM cities c WHERE c.id = p.city_id), '') || ' ' ||
+            COALESCE((SELECT n.name FROM neighborhoods n WHERE n.id = p.neighborhood_id), '')
+        ), 'B') ||
+        setweight(to_tsvector('english',
+            COALESCE(p.description, '') || ' ' ||
+            COALESCE((
+                SELECT STRING_AGG(pf.name, ' ' ORDER BY pf.name)
+                FROM property_feature_mappings pfm
+                JOIN property_features pf ON pfm.feature_id = pf.id
+                WHERE pfm.property_id = p.id
+            ), '')
+        ), 'C')
+    {where}
+"""
+
+# Column layouts for COPY-based bulk loading: (column name, wire type), in foreign
+# key dependency order. The wire type selects the encoder used for the binary COPY
+# format. Lookup and agent ids are assigned client-side so no output needs a database.
+COPY_TABLES = {
+    'provinces': [('id', 'int4'), ('code', 'text'), ('name', 'text'), ('country_code', 'text')],
+    'cities': [
+        ('id', 'int4'), ('name', 'text'), ('province_id', 'int4'), ('population', 'int4'),
+        ('latitude', 'numeric'), ('longitude', 'numeric')
+    ],
+    'neighborhoods': [
+        ('id', 'int4'), ('name', 'text'), ('city_id', 'int4'), ('average_income', 'int4'),
+        ('walkability_score', 'int4'), ('safety_rating', 'int4')
+    ],
+    'property_types': [('id', 'int4'), ('name', 'text'), ('description', 'text'), ('category', 'text')],
+    'listing_types': [('id', 'int4'), ('name', 'text'), ('description', 'text')],
+    'property_status': [('id', 'int4'), ('name', 'text'), ('description', 'text'), ('is_available', 'bool')],
+    'property_features': [('id', 'int4'), ('name', 'text'), ('category', 'text'), ('description', 'text')],
+    'agents': [
+        ('id', 'int4'), ('first_name', 'text'), ('last_name', 'text'), ('email', 'text'), ('phone', 'text'),
+        ('license_number', 'text'), ('agency_name', 'text'), ('years_experience', 'int4'),
+        ('rating', 'numeric'), ('total_reviews', 'int4')
+    ],
+    'properties': [
+        ('id', 'uuid'), ('mls_number', 'text'), ('property_type_id', 'int4'), ('listing_type_id', 'int4'),
+        ('status_id', 'int4'), ('agent_id', 'int4'), ('street_address', 'text'), ('unit_number', 'text'),
+        ('neighborhood_id', 'int4'), ('city_id', 'int4'), ('province_id', 'int4'), ('postal_code', 'text'),
+        ('latitude', 'numeric'), ('longitude', 'numeric'), ('title', 'text'), ('description', 'text'),
+        ('year_built', 'int4'), ('total_area_sqft', 'int4'), ('lot_size_sqft', 'int4'), ('bedrooms', 'int4'),
+        ('bathrooms', 'numeric'), ('half_bathrooms', 'int4'), ('floors', 'int4'), ('list_price', 'numeric'),
+        ('price_per_sqft', 'numeric'), ('monthly_rent', 'numeric'), ('maintenance_fee', 'numeric'),
+        ('property_taxes_annual', 'numeric'), ('heating_type', 'text'), ('cooling_type', 'text'),
+        ('utilities_included', 'text[]'), ('parking_spaces', 'int4'), ('parking_type', 'text'),
+        ('pet_friendly', 'bool'), ('furnished', 'bool'), ('listed_date', 'date'), ('available_date', 'date'),
+        ('sold_date', 'date')
+    ],
+    'property_feature_mappings': [
+        ('property_id', 'uuid'), ('feature_id', 'int4')
+    ],
+    'property_images': [
+        ('property_id', 'uuid'), ('image_url', 'text'), ('image_type', 'text'), ('caption', 'text'),
+        ('display_order', 'int4'), ('is_primary', 'bool')
+    ],
+    'property_history': [
+        ('property_id', 'uuid'), ('event_type', 'text'), ('old_value', 'text'), ('new_value', 'text'),
+        ('price_change', 'numeric'), ('status_change', 'text'), ('event_date', 'timestamp'), ('notes', 'text')
+    ]
+}
+
+LOOKUP_TABLES = ['provinces', 'cities', 'neighborhoods', 'property_types', 'listing_types', 'property_status', 'property_features']
+
+# SERIAL tables whose ids are written explicitly, so their sequences must be moved past them
+EXPLICIT_ID_TABLES = [table for table, columns in COPY_TABLES.items() if columns[0] == ('id', 'int4')]
+
+# Secondary indexes built after the bulk load: (name, table, access method and columns).
+# They cover the filters in src/app/api/properties/filter/route.ts and the search_table
+# equivalents; building them once the rows are in place keeps the load itself fast.
+POST_LOAD_INDEXES = [
+    ('idx_properties_list_price', 'properties', 'USING btree (list_price)'),
+    ('idx_properties_total_area_sqft', 'properties', 'USING btree (total_area_sqft)'),
+    ('idx_properties_bedrooms_bathrooms', 'properties', 'USING btree (bedrooms, bathrooms)'),
+    ('idx_properties_city_id', 'properties', 'USING btree (city_id)'),
+    ('idx_properties_province_id', 'properties', 'USING btree (province_id)'),
+    ('idx_properties_property_type_id', 'properties', 'USING btree (property_type_id)'),
+    ('idx_properties_listing_type_price', 'properties', 'USING btree (listing_type_id, status_id, list_price)'),
+    ('idx_properties_agent_id', 'properties', 'USING btree (agent_id)'),
+    ('idx_properties_created_at', 'properties', 'USING btree (created_at DESC)'),
+    ('idx_properties_last_updated_brin', 'properties', 'USING brin (last_updated)'),
+    ('idx_properties_search_vector', 'properties', 'USING gin (search_vector)'),
+    ('idx_properties_title_trgm', 'properties', 'USING gin (title gin_trgm_ops)'),
+    ('idx_property_images_primary', 'property_images', 'USING btree (property_id) WHERE is_primary'),
+    ('idx_property_feature_mappings_feature_id', 'property_feature_mappings', 'USING btree (feature_id)'),
+    ('idx_search_table_list_price', 'search_table', 'USING btree (list_price)'),
+    ('idx_search_table_total_area_sqft', 'search_table', 'USING btree (total_area_sqft)'),
+    ('idx_search_table_bedrooms_bathrooms', 'search_table', 'USING btree (bedrooms, bathrooms)'),
+    ('idx_search_table_city_name', 'search_table', 'USING btree (city_name)'),
+    ('idx_search_table_province_code', 'search_table', 'USING btree (province_code)'),
+    ('idx_search_table_property_type_name', 'search_table', 'USING btree (property_type_name)'),
+    ('idx_search_table_listing_status_price', 'search_table', 'USING btree (listing_type_name, property_status_name, list_price)'),
+    ('idx_search_table_last_updated', 'search_table', 'USING btree (last_updated)'),
+    ('idx_search_table_features_names', 'search_table', 'USING gin (property_features_names)'),
+    ('idx_search_table_search_vector', 'search_table', 'USING gin (search_vector)'),
+    ('idx_search_table_title_trgm', 'search_table', 'USING gin (title gin_trgm_ops)'),
+    ('idx_search_table_grid_cell', 'search_table', 'USING btree (grid_cell)'),
+    ('idx_property_history_property_date', 'property_history', 'USING btree (property_id, event_date DESC)')
+]
+
+# search_table is rewritten in this order after the load, so the rows one province,
+# city and price band filter returns sit on a few adjacent pages instead of one per row
+SEARCH_LOCALITY_INDEX = ('idx_search_table_locality', 'search_table', 'USING btree (province_code, city_name, list_price)')
+
+# Multi-column statistics for the filter pairs the API combines. Per-column statistics
+# assume independence and misestimate e.g. bedrooms within a property type or price
+# within a listing type; created before ANALYZE, which fills them
+EXTENDED_STATISTICS = [
+    ('stx_search_table_type_size', 'search_table', 'ndistinct, dependencies, mcv', 'property_type_name, bedrooms, total_area_sqft'),
+    ('stx_search_table_listing_price', 'search_table', 'dependencies, mcv', 'listing_type_name, list_price, monthly_rent'),
+    ('stx_search_table_location', 'search_table', 'ndistinct, dependencies', 'province_code, city_name, neighborhood_name'),
+    ('stx_properties_type_size', 'properties', 'ndistinct, dependencies, mcv', 'property_type_id, bedrooms, total_area_sqft'),
+    ('stx_properties_listing_price', 'properties', 'dependencies, mcv', 'listing_type_id, list_price, monthly_rent'),
+    ('stx_properties_location', 'properties', 'ndistinct, dependencies', 'province_id, city_id, neighborhood_id')
+]
+
+# Relations the search and detail pages read, most requested first. Their heaps and
+# indexes are loaded into shared_buffers after a reseed until shared_buffers is full
+PREWARM_TABLES = ['search_table', 'search_facet_counts', 'property_images', 'property_feature_mappings',
+                  'properties', 'agents'] + LOOKUP_TABLES
+
+# Monthly property_history partitions are created this far past the reference date,
+# so events written after the load (app updates, the churn simulator) find their
+# month's partition instead of piling up in the default one
+HISTORY_PARTITION_DAYS_AHEAD = 366
+
+# History of one property as the detail page reads it. The event_date bound (the
+# listing date; no event predates it) lets the planner skip older monthly partitions.
+PROPERTY_HISTORY_LOOKUP = """
+    SELECT id, event_type, old_value, new_value, price_change, status_change, event_date, notes
+    FROM property_history
+    WHERE property_id = %s AND event_date >= %s::timestamp
+    ORDER BY event_date DESC
+    LIMIT 20
+"""
+
+LOAD_METHODS = ['copy', 'insert']
+COPY_FORMATS = ['text', 'binary']
+SINK_TYPES = ['postgres', 'copy-files', 'parquet', 'csv', 'null']
+FILE_SINK_TYPES = ['copy-files', 'parquet', 'csv']
+DB_BACKENDS = ['psycopg2', 'psycopg3']
+
+# Statements the psycopg 3 backend prepares server-side; DDL and SET run unprepared
+PREPARED_STATEMENT_KINDS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+# SQLSTATE raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = '55P03'
+
+COPY_READ_SIZE = 65536
+
+PG_EPOCH = date(2000, 1, 1)
+PG_EPOCH_TIMESTAMP = datetime(2000, 1, 1)
+TEXT_OID = 25
+BINARY_COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+BINARY_COPY_TRAILER = struct.pack('!h', -1)
+
+def _copy_text_escape(value: str) -> str:
+    """Escape a value for the COPY text format."""
+    return (value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def _array_literal(values: Iterable[Any]) -> str:
+    """Render a one-dimensional PostgreSQL array literal."""
+    elements = ','.join(
+        '"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"' for item in values
+    )
+    return '{' + elements + '}'
+
+def _copy_text_value(value: Any) -> str:
+    """Render a single field in COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, tuple)):
+        return _copy_text_escape(_array_literal(value))
+    if isinstance(value, date):
+        return value.isoformat()
+    return _copy_text_escape(str(value))
+
+def encode_copy_text_row(row: tuple) -> bytes:
+    """Encode one row as a COPY text-format line."""
+    return ('\t'.join(_copy_text_value(value) for value in row) + '\n').encode('utf-8')
+
+def _encode_numeric(value: Any) -> bytes:
+    """Encode a number using PostgreSQL's binary NUMERIC representation."""
+    sign, digits, exponent = Decimal(str(value)).as_tuple()
+    frac_len = max(-exponent, 0)
+    digit_str = ''.join(map(str, digits)) + '0' * max(exponent, 0)
+    if len(digit_str) <= frac_len:
+        digit_str = '0' * (frac_len - len(digit_str) + 1) + digit_str
+    int_part = digit_str[:len(digit_str) - frac_len].lstrip('0')
+    frac_part = digit_str[len(digit_str) - frac_len:]
+    int_part = '0' * (-len(int_part) % 4) + int_part
+    frac_part = frac_part + '0' * (-len(frac_part) % 4)
+    packed = int_part + frac_part
+    groups = [int(packed[i:i + 4]) for i in range(0, len(packed), 4)]
+    weight = len(int_part) // 4 - 1
+    
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+    
+    return struct.pack(f'!hhHh{len(groups)}h', len(groups), weight, 0x4000 if sign else 0, frac_len, *groups)
+
+def _encode_text_array(values: List[str]) -> bytes:
+    """Encode a one-dimensional TEXT[] in binary array format."""
+    if not values:
+        return struct.pack('!iii', 0, 0, TEXT_OID)
+    parts = [struct.pack('!iiiii', 1, 0, TEXT_OID, len(values), 1)]
+    for item in values:
+        encoded = str(item).encode('utf-8')
+        parts.append(struct.pack('!i', len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+BINARY_ENCODERS = {
+    'int4': lambda value: struct.pack('!i', value),
+    'numeric': _encode_numeric,
+    'text': lambda value: str(value).encode('utf-8'),
+    'bool': lambda value: b'\x01' if value else b'\x00',
+    'uuid': lambda value: value.bytes if isinstance(value, uuid.UUID) else uuid.UUID(str(value)).bytes,
+    'date': lambda value: struct.pack('!i', (value - PG_EPOCH).days),
+    'timestamp': lambda value: struct.pack('!q', (value - PG_EPOCH_TIMESTAMP) // timedelta(microseconds=1)),
+    'text[]': _encode_text_array
+}
+
+def encode_copy_binary_row(row: tuple, wire_types: List[str]) -> bytes:
+    """Encode one row as a COPY binary-format tuple."""
+    parts = [struct.pack('!h', len(row))]
+    for value, wire_type in zip(row, wire_types):
+        if value is None:
+            parts.append(struct.pack('!i', -1))
+        else:
+            encoded = BINARY_ENCODERS[wire_type](value)
+            parts.append(struct.pack('!i', len(encoded)))
+            parts.append(encoded)
+    return b''.join(parts)
+
+class CopyStream(io.RawIOBase):
+    """File-like object that lazily encodes rows for COPY ... FROM STDIN."""
+    
+    def __init__(self, rows: Iterable[tuple], wire_types: List[str], binary: bool = False):
+        self.rows = iter(rows)
+        self.wire_types = wire_types
+        self.binary = binary
+        self.row_count = 0
+        self.buffer = BINARY_COPY_HEADER if binary else b''
+        self.finished = False
+    
+    def readable(self) -> bool:
+        return True
+    
+    def _encode(self, row: tuple) -> bytes:
+        if self.binary:
+            return encode_copy_binary_row(row, self.wire_types)
+        return encode_copy_text_row(row)
+    
+    def _fill(self, size: int):
+        """Encode rows until at least `size` bytes are buffered or the rows run out."""
+        parts = [self.buffer]
+        buffered = len(self.buffer)
+        
+        for row in self.rows:
+            encoded = self._encode(row)
+            parts.append(encoded)
+            buffered += len(encoded)
+            self.row_count += 1
+            if buffered >= size:
+                break
+        else:
+            if self.binary:
+                parts.append(BINARY_COPY_TRAILER)
+            self.finished = True
+        
+        self.buffer = b''.join(parts)
+    
+    def readinto(self, target) -> int:
+        if len(self.buffer) < len(target) and not self.finished:
+            self._fill(len(target))
+        
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+# Upper bounds (milliseconds) of the database call latency histogram buckets
+LATENCY_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+def peak_rss_kb(who: int = resource.RUSAGE_SELF) -> int:
+    """Peak resident set size so far, in KiB, of this process or its finished children."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+class PhaseStats:
+    """Timings, row counts and database call latencies collected for one phase."""
+    
+    def __init__(self, name: str, parent: Optional[str] = None):
+        self.name = name
+        self.parent = parent
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.children_cpu_seconds = 0.0
+        self.rows_generated = 0
+        self.rows_written: Dict[str, int] = {}
+        # method -> [calls, total seconds, histogram counts (one per bucket plus overflow)]
+        self.db_calls: Dict[str, list] = {}
+        self.peak_rss_kb = 0
+        self.children_peak_rss_kb = 0
+    
+    def record_call(self, method: str, seconds: float):
+        stats = self.db_calls.setdefault(method, [0, 0.0, [0] * (len(LATENCY_BUCKETS_MS) + 1)])
+        stats[0] += 1
+        stats[1] += seconds
+        milliseconds = seconds * 1000
+        stats[2][next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds < bound), len(LATENCY_BUCKETS_MS))] += 1
+    
+    def merge(self, other: Dict[str, Any]):
+        """Add counters reported by another process (see counters())."""
+        self.rows_generated += other['rows_generated']
+        for table, rows in other['rows_written'].items():
+            self.rows_written[table] = self.rows_written.get(table, 0) + rows
+        for method, (calls, seconds, histogram) in other['db_calls'].items():
+            stats = self.db_calls.setdefault(method, [0, 0.0, [0] * (len(LATENCY_BUCKETS_MS) + 1)])
+            stats[0] += calls
+            stats[1] += seconds
+            stats[2] = [a + b for a, b in zip(stats[2], histogram)]
+    
+    def counters(self) -> Dict[str, Any]:
+        return {'rows_generated': self.rows_generated, 'rows_written': self.rows_written, 'db_calls': self.db_calls}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<{bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">={LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'phase': self.name,
+            'parent': self.parent,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'children_cpu_seconds': round(self.children_cpu_seconds, 4),
+            'rows_generated': self.rows_generated,
+            'rows_written': self.rows_written,
+            'db_calls': {
+                method: {
+                    'calls': calls,
+                    'total_seconds': round(seconds, 4),
+                    'histogram': dict(zip(labels, histogram))
+                }
+                for method, (calls, seconds, histogram) in self.db_calls.items()
+            },
+            'peak_rss_kb': self.peak_rss_kb,
+            'children_peak_rss_kb': self.children_peak_rss_kb
+        }
+
+class Metrics:
+    """Per-phase instrumentation: wall/CPU time, rows, database call latencies and peak memory.
+    
+    Phases may nest: calls and rows go to the innermost phase, while an outer
+    phase's times include its inner ones. Work done outside any phase is collected
+    under 'other'. With a profile directory, each top-level phase also runs under
+    cProfile.
+    """
+    
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = profile_dir
+        self.phases: List[PhaseStats] = []
+        self.other = PhaseStats('other')
+        self.current = self.other
+        self.lock = threading.Lock()
+    
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Collect everything recorded inside the block under phase `name`."""
+        parent = self.current
+        stats = PhaseStats(name, parent=None if parent is self.other else parent.name)
+        self.phases.append(stats)
+        self.current = stats
+        profiler = cProfile.Profile() if self.profile_dir and parent is self.other else None
+        wall, cpu, children_cpu = time.perf_counter(), time.process_time(), self.children_cpu()
+        
+        if profiler:
+            profiler.enable()
+        try:
+            yield stats
+        finally:
+            if profiler:
+                profiler.disable()
+            stats.wall_seconds = time.perf_counter() - wall
+            stats.cpu_seconds = time.process_time() - cpu
+            stats.children_cpu_seconds = self.children_cpu() - children_cpu
+            stats.peak_rss_kb = peak_rss_kb()
+            stats.children_peak_rss_kb = peak_rss_kb(resource.RUSAGE_CHILDREN)
+            self.current = parent
+            if profiler:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f"{name}.prof")
+                profiler.dump_stats(path)
+                print(f"   Profile of {name} written to {path}")
+    
+    @staticmethod
+    def children_cpu() -> float:
+        """CPU seconds used by finished child processes, such as shard workers."""
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+    
+    def record_call(self, method: str, seconds: float):
+        with self.lock:
+            self.current.record_call(method, seconds)
+    
+    def add_generated(self, rows: int):
+        with self.lock:
+            self.current.rows_generated += rows
+    
+    def add_written(self, table: str, rows: int):
+        with self.lock:
+            self.current.rows_written[table] = self.current.rows_written.get(table, 0) + rows
+    
+    def merge(self, counters: Dict[str, Any]):
+        with self.lock:
+            self.current.merge(counters)
+    
+    def print_summary(self):
+        """Print one line per phase."""
+        if not self.phases:
+            return
+        
+        print("⏱️  Phase summary:")
+        for stats in self.phases:
+            calls = sum(call[0] for call in stats.db_calls.values())
+            db_seconds = sum(call[1] for call in stats.db_calls.values())
+            written = sum(stats.rows_written.values())
+            print(f"   {'  ' if stats.parent else ''}- {stats.name}: {stats.wall_seconds:.2f}s wall, "
+                  f"{stats.cpu_seconds + stats.children_cpu_seconds:.2f}s CPU, "
+                  f"{stats.rows_generated} generated, {written} written, {calls} DB calls ({db_seconds:.2f}s), "
+                  f"{stats.peak_rss_kb / 1024:.0f} MiB peak")
+    
+    def write_json(self, path: str):
+        phases = self.phases + ([self.other] if self.other.db_calls or self.other.rows_generated else [])
+        with open(path, 'w') as f:
+            json.dump({'phases': [stats.to_dict() for stats in phases]}, f, indent=2)
+
+def timed_call(method):
+    """Record the latency of a DatabaseConnection method in the connection's metrics, if any."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.metrics is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.metrics.record_call(method.__name__, time.perf_counter() - started)
+    return wrapper
+
+class ProgressReporter:
+    """Print throughput and ETA for a long-running loop at most once per interval."""
+    
+    def __init__(self, label: str, total: int, interval: float = 5.0):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.started = self.last_report = time.perf_counter()
+    
+    def update(self, rows: int):
+        self.done += rows
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval or self.done >= self.total:
+            self.last_report = now
+            elapsed = now - self.started
+            rate = self.done / elapsed if elapsed > 0 else 0.0
+            eta = (self.total - self.done) / rate if rate > 0 else 0.0
+            print(f"   {self.label}: {self.done:,}/{self.total:,} ({self.done / max(self.total, 1):.0%}), "
+                  f"{rate:,.0f} rows/s, ETA {timedelta(seconds=round(eta))}")
+
 class DatabaseConnection:
     """Handle database connections and operations."""
     
+    backend = 'psycopg2'
+    
     def __init__(self, database_url: str):
         self.database_url = database_url
         self.connection = None
+        self.metrics: Optional[Metrics] = None
+    
+    def sibling(self) -> 'DatabaseConnection':
+        """An unconnected connection of the same backend to the same database, sharing metrics."""
+        db = DatabaseConnection(self.database_url)
+        db.metrics = self.metrics
+        return db
     
     def connect(self) -> bool:
         """Test and establish database connection."""
         try:
             self.connection = psycopg2.connect(self.database_url)
             self.connection.autocommit = False
+            psycopg2.extras.register_uuid(conn_or_curs=self.connection)
             
             # Test connection
             with self.connection.cursor() as cursor:
@@ -125,12 +953,14 @@ class DatabaseConnection:
             print(f"❌ Database connection failed: {e}")
             return False
     
+    @timed_call
     def execute_query(self, query: str, params: tuple = None) -> psycopg2.extras.RealDictCursor:
         """Execute a single query."""
         cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute(query, params)
         return cursor
     
+    @timed_call
     def execute_query_returning(self, query: str, params: tuple = None) -> Any:
         """Execute a query with RETURNING clause and return the result."""
         with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
@@ -138,15 +968,55 @@ class DatabaseConnection:
             result = cursor.fetchone()
             return result
     
+    @timed_call
     def execute_many(self, query: str, params_list: List[tuple]) -> None:
         """Execute query with multiple parameter sets."""
         with self.connection.cursor() as cursor:
             cursor.executemany(query, params_list)
     
+    @timed_call
+    def copy_rows(self, table: str, columns: List[Tuple[str, str]], rows: Iterable[tuple], binary: bool = False) -> int:
+        """Stream rows into a table with COPY ... FROM STDIN and return the row count."""
+        column_list = ', '.join(name for name, _ in columns)
+        copy_format = 'BINARY' if binary else 'TEXT'
+        stream = CopyStream(rows, [wire_type for _, wire_type in columns], binary=binary)
+        
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT {copy_format})", stream, size=COPY_READ_SIZE)
+        
+        return stream.row_count
+    
+    @timed_call
+    def copy_file(self, table: str, columns: Optional[List[Tuple[str, str]]], path: str, binary: bool = False):
+        """Load a file in COPY text or binary format into a table; columns None means all of them."""
+        column_list = f" ({', '.join(name for name, _ in columns)})" if columns else ''
+        copy_format = 'BINARY' if binary else 'TEXT'
+        
+        with open(path, 'rb') as f, self.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table}{column_list} FROM STDIN WITH (FORMAT {copy_format})", f, size=COPY_READ_SIZE)
+    
+    @timed_call
+    def copy_table_to_file(self, table: str, path: str, binary: bool = True):
+        """Dump every column of a table to a file with COPY ... TO STDOUT.
+        
+        Copies from a query rather than the table itself so partitioned tables
+        are dumped as a whole.
+        """
+        copy_format = 'BINARY' if binary else 'TEXT'
+        
+        with open(path, 'wb') as f, self.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY (SELECT * FROM {table}) TO STDOUT WITH (FORMAT {copy_format})", f, size=COPY_READ_SIZE)
+    
+    def set_autocommit(self, enabled: bool):
+        """Switch autocommit on or off, e.g. for statements that cannot run in a transaction."""
+        self.connection.autocommit = enabled
+    
+    @timed_call
     def commit(self):
         """Commit transaction."""
         self.connection.commit()
     
+    @timed_call
     def rollback(self):
         """Rollback transaction."""
         self.connection.rollback()
@@ -156,649 +1026,2277 @@ class DatabaseConnection:
         if self.connection:
             self.connection.close()
 
-class DataGenerator:
-    """Generate sample real estate data."""
+_connection_pools: Dict[Tuple[str, int], Any] = {}
+_connection_pools_lock = threading.Lock()
+
+class Psycopg3Connection(DatabaseConnection):
+    """psycopg 3 backend: pooled connections, pipelined executemany and prepared statements.
     
-    def __init__(self, db: DatabaseConnection):
-        self.db = db
-        random.seed(42)  # For reproducible results
+    Connections come from a per-process pool shared by every Psycopg3Connection to the
+    same database, so the key-range threads reuse sessions (and their prepared statements)
+    instead of reconnecting. Requires the optional psycopg[binary,pool] packages.
+    """
     
-    def check_existing_data(self) -> bool:
-        """Check if data already exists in the database."""
+    backend = 'psycopg3'
+    
+    def __init__(self, database_url: str, pool_size: int = 4):
+        super().__init__(database_url)
+        self.pool_size = pool_size
+        self.pool = None
+    
+    def sibling(self) -> 'Psycopg3Connection':
+        db = Psycopg3Connection(self.database_url, self.pool_size)
+        db.metrics = self.metrics
+        return db
+    
+    def connect(self) -> bool:
+        """Check out a connection from the shared pool, creating the pool on first use."""
         try:
-            cursor = self.db.execute_query("SELECT COUNT(*) as count FROM properties")
-            properties_count = cursor.fetchone()['count']
+            import psycopg.rows
+            import psycopg_pool
+        except ImportError:
+            print("❌ The psycopg3 backend requires: pip install 'psycopg[binary,pool]'")
+            return False
+        
+        try:
+            with _connection_pools_lock:
+                key = (self.database_url, self.pool_size)
+                if key not in _connection_pools:
+                    # Only statements run with prepare=True are prepared, never DDL. UTF8 makes
+                    # text decode to str even on SQL_ASCII databases, as it does with psycopg2.
+                    pool = psycopg_pool.ConnectionPool(
+                        self.database_url, min_size=1, max_size=self.pool_size, open=True,
+                        kwargs={'autocommit': False, 'row_factory': psycopg.rows.dict_row,
+                                'prepare_threshold': None, 'client_encoding': 'UTF8'}
+                    )
+                    atexit.register(pool.close)
+                    _connection_pools[key] = pool
+                self.pool = _connection_pools[key]
             
-            cursor = self.db.execute_query("SELECT COUNT(*) as count FROM agents")
-            agents_count = cursor.fetchone()['count']
+            self.connection = self.pool.getconn()
             
-            if properties_count > 0 or agents_count > 0:
-                print(f"📊 Existing data found:")
-                print(f"   - Properties: {properties_count}")
-                print(f"   - Agents: {agents_count}")
-                return True
+            # Test connection
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
             
-            return False
+            print("✅ Database connection successful")
+            return True
         except Exception as e:
-            print(f"❌ Error checking existing data: {e}")
+            print(f"❌ Database connection failed: {e}")
             return False
     
+    @staticmethod
+    def should_prepare(query: str) -> bool:
+        words = query.split(None, 1)
+        return bool(words) and words[0].upper() in PREPARED_STATEMENT_KINDS
     
-    def random_int(self, min_val: int, max_val: int) -> int:
-        """Generate random integer between min and max (inclusive)."""
-        return random.randint(min_val, max_val)
+    @timed_call
+    def execute_query(self, query: str, params: tuple = None) -> Any:
+        """Execute a single query, as a prepared statement when it is DML or a SELECT."""
+        cursor = self.connection.cursor()
+        cursor.execute(query, params, prepare=self.should_prepare(query))
+        return cursor
     
-    def random_float(self, min_val: float, max_val: float) -> float:
-        """Generate random float between min and max."""
-        return random.uniform(min_val, max_val)
+    @timed_call
+    def execute_query_returning(self, query: str, params: tuple = None) -> Any:
+        """Execute a query with RETURNING clause and return the result."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params, prepare=self.should_prepare(query))
+            return cursor.fetchone()
     
-    def random_choice(self, choices: List[Any]) -> Any:
-        """Choose random item from list."""
-        return random.choice(choices)
+    @timed_call
+    def execute_many(self, query: str, params_list: List[tuple]) -> None:
+        """Execute query with multiple parameter sets as one prepared statement in pipeline mode."""
+        with self.connection.pipeline(), self.connection.cursor() as cursor:
+            cursor.executemany(query, params_list)
     
-    def random_choices(self, choices: List[Any], count: int) -> List[Any]:
-        """Choose multiple random items from list without replacement."""
-        return random.sample(choices, min(count, len(choices)))
-    
-    def generate_postal_code(self, province_code: str) -> str:
-        """Generate Canadian postal code."""
-        letters = string.ascii_uppercase
-        digits = string.digits
-        
-        return f"{random.choice(letters)}{random.choice(digits)}{random.choice(letters)} {random.choice(digits)}{random.choice(letters)}{random.choice(digits)}"
-    
-    def generate_street_address(self) -> str:
-        """Generate random street address."""
-        street_number = self.random_int(1, 9999)
-        street_names = [
-            'Main St', 'Oak Ave', 'Maple Dr', 'Pine Rd', 'Cedar Blvd', 'Elm St', 'King St', 'Queen St',
-            'First Ave', 'Second Ave', 'Park Ave', 'Church St', 'Mill Rd', 'Hill St', 'Lake Dr',
-            'Forest Ave', 'Garden St', 'Spring St', 'River Rd', 'Mountain View Dr', 'Sunset Blvd',
-            'Victoria St', 'Wellington St', 'Richmond St', 'York St', 'Bay St', 'College St'
-        ]
+    @timed_call
+    def copy_rows(self, table: str, columns: List[Tuple[str, str]], rows: Iterable[tuple], binary: bool = False) -> int:
+        """Stream rows into a table with COPY ... FROM STDIN and return the row count."""
+        column_list = ', '.join(name for name, _ in columns)
+        copy_format = 'BINARY' if binary else 'TEXT'
+        stream = CopyStream(rows, [wire_type for _, wire_type in columns], binary=binary)
+        
+        with self.connection.cursor() as cursor:
+            with cursor.copy(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT {copy_format})") as copy:
+                while True:
+                    data = stream.read(COPY_READ_SIZE)
+                    if not data:
+                        break
+                    copy.write(data)
         
-        return f"{street_number} {self.random_choice(street_names)}"
+        return stream.row_count
     
-    def generate_property_title(self, property_type: str, city: str) -> str:
-        """Generate property title."""
-        adjectives = [
-            'Beautiful', 'Stunning', 'Modern', 'Spacious', 'Charming', 'Luxurious', 'Cozy', 'Bright',
-            'Updated', 'Renovated', 'Contemporary', 'Classic', 'Elegant', 'Comfortable', 'Stylish'
-        ]
+    @timed_call
+    def copy_file(self, table: str, columns: Optional[List[Tuple[str, str]]], path: str, binary: bool = False):
+        """Load a file in COPY text or binary format into a table; columns None means all of them."""
+        column_list = f" ({', '.join(name for name, _ in columns)})" if columns else ''
+        copy_format = 'BINARY' if binary else 'TEXT'
         
-        features = [
-            'with great views', 'in prime location', 'with modern amenities', 'near downtown',
-            'with parking', 'newly renovated', 'move-in ready', 'with outdoor space',
-            'in quiet neighborhood', 'with lots of natural light'
-        ]
+        with open(path, 'rb') as f, self.connection.cursor() as cursor:
+            with cursor.copy(f"COPY {table}{column_list} FROM STDIN WITH (FORMAT {copy_format})") as copy:
+                while True:
+                    data = f.read(COPY_READ_SIZE)
+                    if not data:
+                        break
+                    copy.write(data)
+    
+    @timed_call
+    def copy_table_to_file(self, table: str, path: str, binary: bool = True):
+        """Dump every column of a table to a file with COPY ... TO STDOUT."""
+        copy_format = 'BINARY' if binary else 'TEXT'
         
-        adjective = self.random_choice(adjectives)
-        feature = f" {self.random_choice(features)}" if random.random() > 0.5 else ""
+        with open(path, 'wb') as f, self.connection.cursor() as cursor:
+            with cursor.copy(f"COPY (SELECT * FROM {table}) TO STDOUT WITH (FORMAT {copy_format})") as copy:
+                for data in copy:
+                    f.write(data)
+    
+    def close(self):
+        """Discard any open transaction and return the connection to the pool."""
+        if self.connection:
+            self.connection.rollback()
+            self.pool.putconn(self.connection)
+            self.connection = None
+
+def create_connection(database_url: str, backend: str = 'psycopg2', pool_size: int = 4) -> DatabaseConnection:
+    """Create an unconnected DatabaseConnection for the chosen driver backend."""
+    if backend == 'psycopg3':
+        return Psycopg3Connection(database_url, pool_size)
+    return DatabaseConnection(database_url)
+
+def error_sqlstate(error: Exception) -> Optional[str]:
+    """SQLSTATE of a psycopg2 or psycopg 3 database error, None for other exceptions."""
+    return getattr(error, 'pgcode', None) or getattr(error, 'sqlstate', None)
+
+class OutputSink:
+    """Destination for generated rows, written per table in COPY_TABLES column order."""
+    
+    db: Optional[DatabaseConnection] = None
+    
+    def spec(self) -> Dict[str, Any]:
+        """Picklable settings from which open_sink recreates this sink in a worker process."""
+        raise NotImplementedError
+    
+    def describe(self) -> str:
+        return self.spec()['type']
+    
+    def write_rows(self, table: str, rows: Iterable[tuple], partition: Optional[str] = None) -> int:
+        """Write rows to a table, or straight into one of its partitions, and return how many were written.
         
-        return f"{adjective} {property_type} in {city}{feature}"
+        Sinks without partitions write every row to `table`.
+        """
+        raise NotImplementedError
     
-    def generate_property_description(self, property_data: Dict[str, Any]) -> str:
-        """Generate property description."""
-        descriptions = [
-            f"This {property_data['bedrooms']}-bedroom, {property_data['bathrooms']}-bathroom {property_data['property_type']} offers {property_data['total_area_sqft']} sq ft of comfortable living space.",
-            f"Located in the heart of {property_data['city']}, this property features modern amenities and excellent access to local attractions.",
-            f"Perfect for {'professionals or small families' if property_data['bedrooms'] <= 2 else 'families'}, with {'parking included' if property_data['parking_spaces'] > 0 else 'street parking available'}.",
-            f"{'Pet-friendly property' if property_data['pet_friendly'] else 'No pets allowed'} with {'furnished' if property_data['furnished'] else 'unfurnished'} accommodation."
-        ]
+    def reset_sequences(self, tables: List[str]):
+        """Move SERIAL sequences past explicitly written ids; only meaningful for databases."""
+    
+    def commit(self):
+        """Make everything written so far durable."""
+    
+    def rollback(self):
+        """Discard uncommitted writes where the sink supports it."""
+    
+    def close(self):
+        """Release connections and file handles."""
+
+class PostgresSink(OutputSink):
+    """Write rows into PostgreSQL with COPY or batched INSERTs."""
+    
+    def __init__(self, db: DatabaseConnection, load_method: str = 'copy', copy_format: str = 'text',
+                 batch_size: int = CHUNK_SIZE, owns_connection: bool = False):
+        self.db = db
+        self.load_method = load_method
+        self.copy_format = copy_format
+        self.batch_size = batch_size
+        self.owns_connection = owns_connection
+        self.synchronous_commit = True
+    
+    def spec(self) -> Dict[str, Any]:
+        return {
+            'type': 'postgres',
+            'database_url': self.db.database_url,
+            'load_method': self.load_method,
+            'copy_format': self.copy_format,
+            'batch_size': self.batch_size,
+            'db_backend': self.db.backend,
+            'pool_size': getattr(self.db, 'pool_size', None),
+            'synchronous_commit': self.synchronous_commit
+        }
+    
+    def describe(self) -> str:
+        return f"{self.load_method}{', ' + self.copy_format if self.load_method == 'copy' else ''}"
+    
+    def write_rows(self, table: str, rows: Iterable[tuple], partition: Optional[str] = None) -> int:
+        columns = COPY_TABLES[table]
+        table = partition or table
+        
+        if self.load_method == 'copy':
+            return self.db.copy_rows(table, columns, rows, binary=(self.copy_format == 'binary'))
         
-        selected_descriptions = self.random_choices(descriptions, self.random_int(2, 4))
-        return ' '.join(selected_descriptions)
+        column_list = ', '.join(name for name, _ in columns)
+        placeholders = ', '.join(['%s'] * len(columns))
+        row_count = 0
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.db.execute_many(
+                f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})",
+                batch
+            )
+            row_count += len(batch)
+        return row_count
     
-    def insert_lookup_data(self):
-        """Insert all lookup/reference data."""
-        print("📝 Inserting lookup data...")
+    def reset_sequences(self, tables: List[str]):
+        for table in tables:
+            self.db.execute_query(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}",
+                (table,)
+            )
+    
+    def set_synchronous_commit(self, enabled: bool):
+        """Whether commits wait for their WAL to reach disk; a crash may lose the last unflushed commits, never corrupt."""
+        self.synchronous_commit = enabled
+        self.db.execute_query("SELECT set_config('synchronous_commit', %s, false)", ('on' if enabled else 'off',))
+        self.db.commit()
+    
+    def commit(self):
+        self.db.commit()
+    
+    def rollback(self):
+        self.db.rollback()
+    
+    def close(self):
+        if self.owns_connection:
+            self.db.close()
+
+class FileSink(OutputSink):
+    """Base for sinks writing one file per table and part under a directory.
+    
+    Each process writes its own part (the index of its first property), so shards
+    never share a file; readers take the parts of a table in sorted order.
+    """
+    
+    extension = ''
+    
+    def __init__(self, directory: str, part: int = 0):
+        self.directory = directory
+        self.part = part
+        self.files: Dict[str, Any] = {}
+    
+    def path(self, table: str) -> str:
+        return os.path.join(self.directory, table, f"part-{self.part:09d}.{self.extension}")
+    
+    def open_file(self, table: str, path: str) -> Any:
+        raise NotImplementedError
+    
+    def close_file(self, table: str, handle: Any):
+        handle.close()
+    
+    def handle(self, table: str) -> Any:
+        if table not in self.files:
+            os.makedirs(os.path.join(self.directory, table), exist_ok=True)
+            self.files[table] = self.open_file(table, self.path(table))
+        return self.files[table]
+    
+    def close(self):
+        for table, handle in self.files.items():
+            self.close_file(table, handle)
+        self.files = {}
+
+class CopyFileSink(FileSink):
+    """Write COPY text or binary files that --load-copy-files bulk-loads into any database."""
+    
+    def __init__(self, directory: str, copy_format: str = 'text', part: int = 0):
+        super().__init__(directory, part)
+        self.copy_format = copy_format
+        self.extension = 'bin' if copy_format == 'binary' else 'copy'
+    
+    def spec(self) -> Dict[str, Any]:
+        return {'type': 'copy-files', 'directory': self.directory, 'copy_format': self.copy_format}
+    
+    def describe(self) -> str:
+        return f"copy-files, {self.copy_format}"
+    
+    def open_file(self, table: str, path: str) -> Any:
+        f = open(path, 'wb')
+        if self.copy_format == 'binary':
+            f.write(BINARY_COPY_HEADER)
+        return f
+    
+    def close_file(self, table: str, handle: Any):
+        if self.copy_format == 'binary':
+            handle.write(BINARY_COPY_TRAILER)
+        handle.close()
+    
+    def write_rows(self, table: str, rows: Iterable[tuple], partition: Optional[str] = None) -> int:
+        f = self.handle(table)
+        wire_types = [wire_type for _, wire_type in COPY_TABLES[table]]
+        row_count = 0
         
-        try:
-            # Insert provinces
-            for province in PROVINCES_DATA:
-                cursor = self.db.execute_query(
-                    "INSERT INTO provinces (code, name, country_code) VALUES (%s, %s, %s) ON CONFLICT (code) DO NOTHING",
-                    (province['code'], province['name'], 'CA')
-                )
-            
-            # Insert cities
-            for province in PROVINCES_DATA:
-                cursor = self.db.execute_query("SELECT id FROM provinces WHERE code = %s", (province['code'],))
-                province_id = cursor.fetchone()['id']
-                
-                for city_name in province['cities']:
-                    population = self.random_int(50000, 3000000)
-                    latitude = round(self.random_float(42.0, 70.0), 8)
-                    longitude = round(self.random_float(-141.0, -52.0), 8)
-                    
-                    cursor = self.db.execute_query(
-                        "INSERT INTO cities (name, province_id, population, latitude, longitude) VALUES (%s, %s, %s, %s, %s) ON CONFLICT DO NOTHING",
-                        (city_name, province_id, population, latitude, longitude)
-                    )
-            
-            # Insert neighborhoods
-            cursor = self.db.execute_query("SELECT id, name FROM cities")
-            cities = cursor.fetchall()
-            
-            for city in cities:
-                neighborhood_names = [
-                    'Downtown', 'Uptown', 'Midtown', 'Old Town', 'New Town', 'Riverside', 'Hillside', 'Parkside',
-                    'Westside', 'Eastside', 'Northside', 'Southside', 'Central', 'Heights', 'Gardens'
-                ]
-                
-                selected_neighborhoods = self.random_choices(neighborhood_names, NEIGHBORHOODS_PER_CITY)
-                
-                for neighborhood_name in selected_neighborhoods:
-                    average_income = self.random_int(40000, 150000)
-                    walkability_score = self.random_int(20, 100)
-                    safety_rating = self.random_int(1, 5)
-                    
-                    cursor = self.db.execute_query(
-                        "INSERT INTO neighborhoods (name, city_id, average_income, walkability_score, safety_rating) VALUES (%s, %s, %s, %s, %s) ON CONFLICT DO NOTHING",
-                        (neighborhood_name, city['id'], average_income, walkability_score, safety_rating)
-                    )
-            
-            # Insert property types
-            for property_type in PROPERTY_TYPES_DATA:
-                cursor = self.db.execute_query(
-                    "INSERT INTO property_types (name, description, category) VALUES (%s, %s, %s) ON CONFLICT (name) DO NOTHING",
-                    (property_type['name'], property_type['description'], property_type['category'])
-                )
-            
-            # Insert listing types
-            for listing_type in LISTING_TYPES_DATA:
-                cursor = self.db.execute_query(
-                    "INSERT INTO listing_types (name, description) VALUES (%s, %s) ON CONFLICT (name) DO NOTHING",
-                    (listing_type['name'], listing_type['description'])
-                )
-            
-            # Insert property status
-            for status in PROPERTY_STATUS_DATA:
-                cursor = self.db.execute_query(
-                    "INSERT INTO property_status (name, description, is_available) VALUES (%s, %s, %s) ON CONFLICT (name) DO NOTHING",
-                    (status['name'], status['description'], status['is_available'])
-                )
-            
-            # Insert property features
-            for feature in PROPERTY_FEATURES_DATA:
-                cursor = self.db.execute_query(
-                    "INSERT INTO property_features (name, category, description) VALUES (%s, %s, %s) ON CONFLICT (name) DO NOTHING",
-                    (feature['name'], feature['category'], feature['description'])
-                )
-            
-            self.db.commit()
-            print("✅ Lookup data inserted successfully")
-            
-        except Exception as e:
-            print(f"❌ Error inserting lookup data: {e}")
-            self.db.rollback()
-            raise
+        for row in rows:
+            f.write(encode_copy_binary_row(row, wire_types) if self.copy_format == 'binary' else encode_copy_text_row(row))
+            row_count += 1
+        return row_count
     
-    def generate_agents(self):
-        """Generate sample agents."""
-        print(f"👥 Generating {AGENTS_COUNT} agents...")
+    def commit(self):
+        for f in self.files.values():
+            f.flush()
+
+class ColumnarFileSink(FileSink):
+    """Write Parquet files (one row group per chunk) or CSV files for analytics tools.
+    
+    Parquet needs the optional pyarrow package; CSV files carry a header row and
+    PostgreSQL array literals, so COPY ... WITH (FORMAT csv, HEADER) reads them back.
+    """
+    
+    def __init__(self, directory: str, file_format: str = 'parquet', part: int = 0):
+        super().__init__(directory, part)
+        self.file_format = file_format
+        self.extension = file_format
         
-        first_names = [
-            'John', 'Jane', 'Michael', 'Sarah', 'David', 'Lisa', 'Robert', 'Jennifer', 'William', 'Jessica',
-            'James', 'Ashley', 'Christopher', 'Amanda', 'Daniel', 'Melissa', 'Matthew', 'Michelle', 'Anthony', 'Kimberly',
-            'Mark', 'Amy', 'Donald', 'Angela', 'Steven', 'Helen', 'Paul', 'Deborah', 'Andrew', 'Rachel'
-        ]
+        if file_format == 'parquet':
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise RuntimeError("The parquet sink requires pyarrow: pip install pyarrow")
+            self.pa = pyarrow
+            self.pq = pyarrow.parquet
+    
+    def spec(self) -> Dict[str, Any]:
+        return {'type': self.file_format, 'directory': self.directory}
+    
+    def arrow_schema(self, table: str) -> Any:
+        arrow_types = {
+            'int4': self.pa.int32(),
+            'numeric': self.pa.float64(),
+            'text': self.pa.string(),
+            'bool': self.pa.bool_(),
+            'uuid': self.pa.string(),
+            'date': self.pa.date32(),
+            'timestamp': self.pa.timestamp('us'),
+            'text[]': self.pa.list_(self.pa.string())
+        }
+        return self.pa.schema([(name, arrow_types[wire_type]) for name, wire_type in COPY_TABLES[table]])
+    
+    def open_file(self, table: str, path: str) -> Any:
+        if self.file_format == 'parquet':
+            return self.pq.ParquetWriter(path, self.arrow_schema(table))
         
-        last_names = [
-            'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+        f = open(path, 'w', newline='', encoding='utf-8')
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in COPY_TABLES[table]])
+        return (f, writer)
+    
+    def close_file(self, table: str, handle: Any):
+        if self.file_format == 'parquet':
+            handle.close()
+        else:
+            handle[0].close()
+    
+    def write_rows(self, table: str, rows: Iterable[tuple], partition: Optional[str] = None) -> int:
+        handle = self.handle(table)
+        columns = COPY_TABLES[table]
+        
+        if self.file_format == 'csv':
+            row_count = 0
+            for row in rows:
+                handle[1].writerow([
+                    _array_literal(value) if isinstance(value, (list, tuple)) else value for value in row
+                ])
+                row_count += 1
+            return row_count
+        
+        values = list(zip(*rows))
+        if not values:
+            return 0
+        
+        arrays = []
+        for (name, wire_type), column in zip(columns, values):
+            if wire_type == 'numeric':
+                column = [None if value is None else float(value) for value in column]
+            elif wire_type == 'uuid':
+                column = [None if value is None else str(value) for value in column]
+            arrays.append(column)
+        handle.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(column, type=field.type) for column, field in zip(arrays, self.arrow_schema(table))],
+            schema=self.arrow_schema(table)
+        ))
+        return len(values[0])
+
+class NullSink(OutputSink):
+    """Consume and discard rows, to measure generation throughput without any I/O."""
+    
+    def spec(self) -> Dict[str, Any]:
+        return {'type': 'null'}
+    
+    def write_rows(self, table: str, rows: Iterable[tuple], partition: Optional[str] = None) -> int:
+        return sum(1 for _ in rows)
+
+def open_sink(spec: Dict[str, Any], part: int = 0) -> OutputSink:
+    """Create the sink described by `spec`; database sinks open their own connection."""
+    sink_type = spec['type']
+    
+    if sink_type == 'postgres':
+        db = create_connection(spec['database_url'], spec['db_backend'], spec['pool_size'])
+        if not db.connect():
+            raise RuntimeError(f"Could not connect to database for part {part}")
+        sink = PostgresSink(db, spec['load_method'], spec['copy_format'], spec['batch_size'], owns_connection=True)
+        if not spec['synchronous_commit']:
+            sink.set_synchronous_commit(False)
+        return sink
+    if sink_type == 'copy-files':
+        return CopyFileSink(spec['directory'], spec['copy_format'], part)
+    if sink_type in ('parquet', 'csv'):
+        return ColumnarFileSink(spec['directory'], sink_type, part)
+    return NullSink()
+
+def search_table_insert_sql(where: str = '', upsert: bool = False, table: str = 'search_table',
+                            conflict_columns: str = 'id') -> str:
+    """Build the INSERT ... SELECT that fills search_table (or a copy or partition of it), optionally as an upsert."""
+    sql = f"INSERT INTO {table} ({', '.join(SEARCH_TABLE_COLUMNS)})" + SEARCH_TABLE_SELECT.format(where=where)
+    if upsert:
+        updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in SEARCH_TABLE_COLUMNS if column != 'id')
+        sql += f" ON CONFLICT ({conflict_columns}) DO UPDATE SET {updates}"
+    return sql
+
+def partition_name(table: str, label: str) -> str:
+    """Name of the partition of `table` holding `label`, e.g. properties_on or search_table_rent."""
+    return f"{table}_{re.sub(r'[^a-z0-9]+', '_', label.lower()).strip('_')}"
+
+def sql_literal(value: Any) -> str:
+    """Render an int or str as a SQL literal, for DDL that cannot take bind parameters."""
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(int(value))
+
+SEARCH_SHADOW_TABLE = 'search_table_shadow'
+SEARCH_REBUILD_MODES = ['in-place', 'shadow']
+
+# Optional LIST partitioning of properties (on a lookup id) and search_table (on the
+# matching name), one partition per (id, name) value. Lookup ids are assigned in
+# insertion order, so the partitions can be created before any data is loaded.
+PARTITION_SCHEMES = {
+    'province': {
+        'properties_key': 'province_id',
+        'search_table_key': 'province_code',
+        'values': [(i, item['code']) for i, item in enumerate(PROVINCES_DATA, start=1)]
+    },
+    'listing-type': {
+        'properties_key': 'listing_type_id',
+        'search_table_key': 'listing_type_name',
+        'values': [(i, item['name']) for i, item in enumerate(LISTING_TYPES_DATA, start=1)]
+    }
+}
+
+# Settings a generation run's rows depend on; --resume reuses the interrupted run's values
+RUN_SETTINGS = ['seed', 'properties', 'agents', 'chunk_size', 'partition_by', 'fast_load']
+
+# Tables captured by a dataset snapshot, in foreign key dependency order
+SNAPSHOT_TABLES = LOOKUP_TABLES + ['agents', 'properties', 'property_feature_mappings', 'property_images',
+                                   'property_history', 'search_table', 'search_facet_counts']
+SERIAL_TABLES = [table for table in SNAPSHOT_TABLES if table not in ('properties', 'search_table', 'search_facet_counts')]
+
+# Constraints --fast-load drops for the load and re-adds afterwards: every foreign key
+# between the loaded tables, plus these unique constraints, which are checked per row
+FAST_LOAD_UNIQUE_TABLES = ['property_feature_mappings']
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'schema.sql')
+
+def snapshot_key(settings: Dict[str, Any], schema_file: str = SCHEMA_FILE) -> str:
+    """Content address of a generated dataset.
+    
+    `settings` holds everything the rows depend on (seed, counts, chunk size, server
+    version, month of the reference date); the generator's own source and schema.sql
+    are hashed in, so editing either one invalidates every earlier snapshot.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+    for path in (os.path.abspath(__file__), schema_file):
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()[:16]
+
+def uuid_key_ranges(parts: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Split the UUID key space into `parts` contiguous [low, high) ranges; None means unbounded."""
+    bounds = [str(uuid.UUID(int=(i << 128) // parts)) for i in range(1, parts)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+def key_range_where(column: str, low: Optional[str], high: Optional[str]) -> Tuple[str, tuple]:
+    """WHERE clause and params restricting a UUID column to [low, high)."""
+    conditions, params = [], []
+    if low is not None:
+        conditions.append(f"{column} >= %s::uuid")
+        params.append(low)
+    if high is not None:
+        conditions.append(f"{column} < %s::uuid")
+        params.append(high)
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), tuple(params)
+
+def offset_coordinates(latitude: float, longitude: float, north_km: float, east_km: float) -> Tuple[float, float]:
+    """The point north_km and east_km away from (latitude, longitude), on a locally flat earth."""
+    return (latitude + north_km / KM_PER_DEGREE,
+            longitude + east_km / (KM_PER_DEGREE * math.cos(math.radians(latitude))))
+
+def grid_cell(latitude: float, longitude: float) -> int:
+    """search_table.grid_cell of a point."""
+    return (math.floor((latitude + 90) * GRID_CELLS_PER_DEGREE) * GRID_COLUMNS
+            + math.floor((longitude + 180) * GRID_CELLS_PER_DEGREE))
+
+def feature_mask(names: Iterable[str]) -> int:
+    """search_table.property_features_mask bits of the named features."""
+    positions = {item['name']: i for i, item in enumerate(PROPERTY_FEATURES_DATA)}
+    mask = 0
+    for name in names:
+        mask |= 1 << positions[name]
+    return mask
+
+def radius_search_sql(latitude: float, longitude: float, radius_km: float,
+                      columns: str = 's.id, s.title, s.list_price, s.latitude, s.longitude',
+                      limit: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+    """Query and params for search_table rows within radius_km of a point, nearest first.
+    
+    The bounding box becomes one contiguous grid_cell range per grid row, answered
+    by a bitmap scan of idx_search_table_grid_cell; the haversine distance then
+    drops the box corners. Rows without coordinates have no cell and never match.
+    """
+    north, east = offset_coordinates(latitude, longitude, radius_km, radius_km)
+    south, west = offset_coordinates(latitude, longitude, -radius_km, -radius_km)
+    low_cell, high_cell = grid_cell(south, west), grid_cell(north, east)
+    low_column, high_column = low_cell % GRID_COLUMNS, high_cell % GRID_COLUMNS
+    
+    params: Dict[str, Any] = {'latitude': latitude, 'longitude': longitude, 'radius_km': radius_km, 'limit': limit}
+    cell_ranges = []
+    for row in range(low_cell // GRID_COLUMNS, high_cell // GRID_COLUMNS + 1):
+        cell_ranges.append(f"s.grid_cell BETWEEN %(low_{row})s AND %(high_{row})s")
+        params[f'low_{row}'] = row * GRID_COLUMNS + low_column
+        params[f'high_{row}'] = row * GRID_COLUMNS + high_column
+    
+    sql = f"""
+        SELECT {columns}, nearby.distance_km
+        FROM search_table s
+        CROSS JOIN LATERAL (
+            SELECT {EARTH_RADIUS_KM} * 2 * ASIN(SQRT(
+                POWER(SIN(RADIANS(s.latitude - %(latitude)s) / 2), 2) +
+                COS(RADIANS(%(latitude)s)) * COS(RADIANS(s.latitude)) * POWER(SIN(RADIANS(s.longitude - %(longitude)s) / 2), 2)
+            )) AS distance_km
+        ) nearby
+        WHERE ({' OR '.join(cell_ranges)})
+          AND nearby.distance_km <= %(radius_km)s
+        ORDER BY nearby.distance_km
+        {'LIMIT %(limit)s' if limit is not None else ''}
+    """
+    return sql, params
+
+def chunk_rng(base_seed: int, start: int, stream: int = 0) -> np.random.Generator:
+    """Random generator for the chunk beginning at property index `start`.
+    
+    Seeding per chunk rather than per process means a chunk's rows depend only on
+    the base seed and its position, so any split into shards yields the same data.
+    Further `stream`s give independent generators for the same chunk.
+    """
+    return np.random.default_rng(np.random.SeedSequence(base_seed, spawn_key=chunk_spawn_key(start, stream)))
+
+def chunk_spawn_key(start: int, stream: int = 0) -> Tuple[int, ...]:
+    """SeedSequence spawn key of a chunk's `stream`; with the base seed it fixes the chunk's random state."""
+    return (start,) if stream == 0 else (start, stream)
+
+class KeyAllocator:
+    """Unique, random-looking numeric keys for the indices 0..count-1.
+
+    Keys are fixed-width numbers (six digits, or more when `count` needs them),
+    drawn from a keyed bijection of the index: a four-round Feistel network over
+    the smallest even bit width covering the key space, cycle-walked back into it.
+    Distinct indices always get distinct keys, so callers allocating from disjoint
+    index ranges (chunks, shards) never collide and nothing is remembered.
+    """
+    
+    ROUNDS = 4
+    
+    def __init__(self, count: int, seed: int, stream: int, min_digits: int = 6):
+        digits = min_digits
+        while 9 * 10 ** (digits - 1) < count:
+            digits += 1
+        self.base = 10 ** (digits - 1)
+        self.space = 9 * self.base
+        
+        self.half_bits = ((self.space - 1).bit_length() + 1) // 2
+        self.half_mask = np.uint64((1 << self.half_bits) - 1)
+        self.round_keys = np.random.default_rng([seed, stream]).integers(0, 2 ** 63, self.ROUNDS, dtype=np.uint64)
+    
+    def _round(self, right: np.ndarray, key: np.uint64) -> np.ndarray:
+        # A multiply-xorshift mix of the right half and the round key (uint64 arithmetic wraps)
+        mixed = (right ^ key) * np.uint64(0x9E3779B97F4A7C15)
+        mixed ^= mixed >> np.uint64(29)
+        mixed *= np.uint64(0xBF58476D1CE4E5B9)
+        mixed ^= mixed >> np.uint64(32)
+        return mixed & self.half_mask
+    
+    def _encrypt(self, values: np.ndarray) -> np.ndarray:
+        shift = np.uint64(self.half_bits)
+        left, right = values >> shift, values & self.half_mask
+        for key in self.round_keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << shift) | right
+    
+    def keys(self, indices: np.ndarray) -> np.ndarray:
+        """Keys of the given indices, each in [base, 10 * base)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) and (indices.min() < 0 or indices.max() >= self.space):
+            raise ValueError(f"Key index out of range 0..{self.space - 1}")
+        
+        # The network permutes a power-of-two range at least as large as the key
+        # space; re-encrypting values that land outside it keeps the map a bijection
+        values = self._encrypt(indices.astype(np.uint64))
+        outside = np.flatnonzero(values >= self.space)
+        while len(outside):
+            values[outside] = self._encrypt(values[outside])
+            outside = outside[values[outside] >= self.space]
+        return self.base + values.astype(np.int64)
+
+def _nullable(mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Return an object column holding values where mask is set and None elsewhere."""
+    column = np.full(len(mask), None, dtype=object)
+    column[mask] = values[mask]
+    return column
+
+def _as_list(values: Any) -> list:
+    """Convert a column to a list of native Python values."""
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+def _take(values: Any, rows: Optional[np.ndarray]) -> Any:
+    """Select `rows` of a column held as an array or a list; None selects every row."""
+    if rows is None:
+        return values
+    if isinstance(values, np.ndarray):
+        return values[rows]
+    return [values[row] for row in rows.tolist()]
+
+def _uuid_list(values: np.ndarray) -> List[uuid.UUID]:
+    """Convert a column of raw 16-byte ids to UUID objects."""
+    return [uuid.UUID(bytes=value) for value in values.tolist()]
+
+def _random_uuids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Draw n version-4 UUIDs as raw 16-byte values."""
+    raw = rng.integers(0, 256, (n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return raw.view('V16').ravel()
+
+class PropertyChunk:
+    """A contiguous run of generated properties held as columns."""
+    
+    def __init__(self, start: int, columns: Dict[str, Any], feature_columns: Dict[str, Any], image_columns: Dict[str, Any],
+                 history_columns: Dict[str, Any]):
+        self.start = start
+        self.columns = columns
+        self.feature_columns = feature_columns
+        self.image_columns = image_columns
+        self.history_columns = history_columns
+    
+    def __len__(self) -> int:
+        return len(self.columns['id'])
+    
+    @staticmethod
+    def _rows(table: str, columns: Dict[str, Any], rows: Optional[np.ndarray] = None) -> Iterator[tuple]:
+        return zip(*(
+            _uuid_list(_take(columns[name], rows)) if wire_type == 'uuid' else _as_list(_take(columns[name], rows))
+            for name, wire_type in COPY_TABLES[table]
+        ))
+    
+    def property_rows(self) -> Iterator[tuple]:
+        """Rows for the properties table in COPY column order."""
+        return self._rows('properties', self.columns)
+    
+    def property_rows_by(self, column: str) -> Iterator[Tuple[Any, Iterator[tuple]]]:
+        """Properties rows grouped by the value of `column`, e.g. to write each group to its partition."""
+        keys = np.asarray(self.columns[column])
+        order = np.argsort(keys, kind='stable')
+        values, starts = np.unique(keys[order], return_index=True)
+        for value, rows in zip(values.tolist(), np.split(order, starts[1:])):
+            yield value, self._rows('properties', self.columns, rows)
+    
+    def feature_rows(self) -> Iterator[tuple]:
+        """Rows for the property_feature_mappings table."""
+        return self._rows('property_feature_mappings', self.feature_columns)
+    
+    def image_rows(self) -> Iterator[tuple]:
+        """Rows for the property_images table."""
+        return self._rows('property_images', self.image_columns)
+    
+    def history_rows(self) -> Iterator[tuple]:
+        """Rows for the property_history table."""
+        return self._rows('property_history', self.history_columns)
+
+class ColumnarPropertyGenerator:
+    """Generate whole chunks of properties at once as NumPy columns."""
+    
+    def __init__(self, lookups: Dict[str, Any], seed: int, reference_date: date, total_count: int):
+        self.seed = seed
+        self.reference_date = np.datetime64(reference_date, 'D')
+        
+        # MLS numbers are keyed permutations of the global property index, so
+        # shards never collide without having to coordinate
+        self.mls_keys = KeyAllocator(total_count, seed, KEY_STREAMS['mls_number'])
+        
+        # Property types, with per-type config ranges and rule masks
+        self.type_ids = np.array([type_id for type_id, _ in lookups['property_types']])
+        self.type_names = np.array([name for _, name in lookups['property_types']], dtype=object)
+        configs = [PROPERTY_CONFIGS.get(name, PROPERTY_CONFIGS['House']) for name in self.type_names]
+        self.type_ranges = {key: np.array([config[key] for config in configs]) for key in PROPERTY_CONFIGS['House']}
+        self.type_has_lot = np.array([name in LOT_SIZE_PROPERTY_TYPES for name in self.type_names])
+        self.type_has_unit = np.array([name in UNIT_NUMBER_PROPERTY_TYPES for name in self.type_names])
+        self.type_has_fee = np.array([name in MAINTENANCE_FEE_PROPERTY_TYPES for name in self.type_names])
+        self.type_is_bungalow = self.type_names == 'Bungalow'
+        self.type_is_studio = self.type_names == 'Studio'
+        self.image_captions = np.array([
+            [f"{name} - {image_type.replace('_', ' ').title()}" for image_type in IMAGE_TYPES]
+            for name in self.type_names
+        ], dtype=object)
+        
+        # Listing types
+        self.listing_type_ids = np.array([listing_id for listing_id, _ in lookups['listing_types']])
+        listing_names = [name for _, name in lookups['listing_types']]
+        self.listing_is_sale = np.array([name == 'Sale' for name in listing_names])
+        self.listing_is_rental = np.array([name in RENTAL_LISTING_TYPES for name in listing_names])
+        
+        # Statuses
+        self.status_ids = np.array([status_id for status_id, _ in lookups['statuses']])
+        self.active_status_id = next(status_id for status_id, name in lookups['statuses'] if name == 'Active')
+        self.status_names = np.full(max(self.status_ids) + 1, None, dtype=object)
+        for status_id, name in lookups['statuses']:
+            self.status_names[status_id] = name
+        
+        self.agent_ids = np.array(lookups['agent_ids'], dtype=np.int64)
+        self.feature_ids = np.array(lookups['feature_ids'])
+        
+        # Locations (one entry per city/neighborhood pair)
+        locations = lookups['locations']
+        self.province_codes = sorted({location['province_code'] for location in locations})
+        self.location_city_ids = np.array([location['city_id'] for location in locations])
+        self.location_city_names = np.array([location['city_name'] for location in locations], dtype=object)
+        self.location_province_ids = np.array([location['province_id'] for location in locations])
+        self.location_province_idx = np.array([self.province_codes.index(location['province_code']) for location in locations])
+        self.location_neighborhood_ids = np.array([location['neighborhood_id'] for location in locations], dtype=object)
+        self.location_latitudes = np.array([location['center'][0] for location in locations])
+        self.location_longitudes = np.array([location['center'][1] for location in locations])
+        self.location_spread_km = np.array([location['spread_km'] for location in locations])
+        
+        # Every ordered pick of up to three utilities, indexed by (count, first, second, third)
+        size = len(UTILITIES)
+        self.utility_combinations = np.full((4, size, size, size), None, dtype=object)
+        for picks in itertools.product(range(size), repeat=3):
+            for count in range(1, 4):
+                self.utility_combinations[(count,) + picks] = [UTILITIES[j] for j in picks[:count]]
+        
+        # Description sentences that only depend on a few discrete values
+        self.location_sentences = np.array([
+            f"Located in the heart of {city}, this property features modern amenities and excellent access to local attractions."
+            for city in self.location_city_names
+        ], dtype=object)
+        self.suitability_sentences = np.array([
+            f"Perfect for {audience}, with {parking}."
+            for audience in ['professionals or small families', 'families']
+            for parking in ['street parking available', 'parking included']
+        ], dtype=object)
+        self.policy_sentences = np.array([
+            f"{pets} with {furnishing} accommodation."
+            for pets in ['No pets allowed', 'Pet-friendly property']
+            for furnishing in ['unfurnished', 'furnished']
+        ], dtype=object)
+    
+    def _type_range(self, key: str, type_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-row (low, high) bounds of a property_configs range."""
+        bounds = self.type_ranges[key][type_idx]
+        return bounds[:, 0], bounds[:, 1]
+    
+    def _postal_codes(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Generate Canadian postal codes (A1A 1A1) as a string column."""
+        codes = np.empty((n, 7), dtype=np.uint8)
+        codes[:, [0, 2, 5]] = ord('A') + rng.integers(0, 26, (n, 3))
+        codes[:, [1, 4, 6]] = ord('0') + rng.integers(0, 10, (n, 3))
+        codes[:, 3] = ord(' ')
+        return codes.view('S7').ravel().astype('U7')
+    
+    def _mls_numbers(self, has_mls: np.ndarray, province_idx: np.ndarray, start: int) -> np.ndarray:
+        """MLS numbers for the rows in has_mls, unique across every chunk and shard."""
+        rows = np.flatnonzero(has_mls)
+        numbers = self.mls_keys.keys(start + rows)
+        
+        mls_numbers = np.full(len(has_mls), None, dtype=object)
+        mls_numbers[rows] = [f"{self.province_codes[p]}{number}" for p, number in zip(province_idx[rows].tolist(), numbers.tolist())]
+        return mls_numbers
+    
+    def _descriptions(self, rng: np.random.Generator, bedrooms, bathrooms, type_names, total_area_sqft, location_idx,
+                      parking_spaces, pet_friendly, furnished) -> List[str]:
+        """Pick 2-4 of the description sentences per property, in random order."""
+        n = len(bedrooms)
+        sentence_count = rng.integers(2, 4, n, endpoint=True)
+        order = np.argsort(rng.random((n, 4)), axis=1)
+        
+        sentences = np.empty((n, 4), dtype=object)
+        sentences[:, 0] = [
+            f"This {bed}-bedroom, {bath}-bathroom {ptype} offers {sqft} sq ft of comfortable living space."
+            for bed, bath, ptype, sqft in zip(bedrooms.tolist(), bathrooms.tolist(), type_names.tolist(), total_area_sqft.tolist())
+        ]
+        sentences[:, 1] = self.location_sentences[location_idx]
+        sentences[:, 2] = self.suitability_sentences[(bedrooms > 2) * 2 + (parking_spaces > 0)]
+        sentences[:, 3] = self.policy_sentences[pet_friendly * 2 + furnished]
+        picked = np.take_along_axis(sentences, order, axis=1)
+        
+        return [' '.join(row[:k]) for row, k in zip(picked.tolist(), sentence_count.tolist())]
+    
+    def _history(self, start: int, property_ids: np.ndarray, listed_days: np.ndarray, status_ids: np.ndarray,
+                 prices: np.ndarray, is_rental: np.ndarray) -> Tuple[Dict[str, Any], np.ndarray]:
+        """Events leading each property from its listing to its current status.
+        
+        Every property is listed at its original asking price, may have price drops
+        while on the market that end at its current price, and then moves through
+        Pending to Sold, or straight to its other final status. Returns the
+        property_history columns and the closing date of Sold and Rented properties.
+        The events come from their own stream of the chunk seed.
+        """
+        rng = chunk_rng(self.seed, start, stream=1)
+        n = len(property_ids)
+        days_listed = (self.reference_date - listed_days).astype(np.int64)
+        statuses = self.status_names[status_ids]
+        is_pending = statuses == 'Pending'
+        is_sold = statuses == 'Sold'
+        changed = statuses != 'Active'
+        
+        # Days after listing of the final status change, and of going under contract for sales
+        close_day = np.where(changed, np.ceil(days_listed * rng.uniform(0.3, 1.0, n)).astype(np.int64), days_listed)
+        pending_day = np.where(is_sold, np.maximum(close_day - rng.integers(7, 45, n, endpoint=True), 0), close_day)
+        
+        # Price drops while on the market, sorted by day within each property
+        has_price = ~np.isnan(prices)
+        drop_count = np.where(has_price, np.minimum(rng.poisson(pending_day / PRICE_DROP_INTERVAL_DAYS), MAX_PRICE_DROPS), 0)
+        drop_owner = np.repeat(np.arange(n), drop_count)
+        drop_day = 1 + np.floor(rng.random(len(drop_owner)) * pending_day[drop_owner]).astype(np.int64)
+        drop_day = np.minimum(drop_day, pending_day[drop_owner])
+        order = np.lexsort((drop_day, drop_owner))
+        drop_day = drop_day[order]
+        drop_seq = np.arange(len(drop_owner)) - np.repeat(np.cumsum(drop_count) - drop_count, drop_count) + 1
+        
+        # Work back from the current price: the price after drop j is the current
+        # price divided by the factors of the drops that follow it
+        drop_log = np.log1p(-rng.uniform(*PRICE_DROP_RANGE, len(drop_owner)))
+        total_log = np.bincount(drop_owner, weights=drop_log, minlength=n)
+        cumulative_log = np.cumsum(drop_log)
+        cumulative_log -= np.concatenate([[0.0], cumulative_log])[np.repeat(np.cumsum(drop_count) - drop_count, drop_count)]
+        remaining_log = total_log[drop_owner] - cumulative_log
+        price_after = np.round(prices[drop_owner] * np.exp(-remaining_log), 2)
+        price_before = np.round(prices[drop_owner] * np.exp(-(remaining_log + drop_log)), 2)
+        original_price = np.round(prices * np.exp(-total_log), 2)
+        
+        # Status changes: to Pending (sales that closed, and pending ones), then to the final status
+        pending_owner = np.flatnonzero(is_sold | is_pending)
+        final_owner = np.flatnonzero(changed & ~is_pending)
+        
+        owner = np.concatenate([np.arange(n), drop_owner, pending_owner, final_owner])
+        day = np.concatenate([np.zeros(n, dtype=np.int64), drop_day, pending_day[pending_owner], close_day[final_owner]])
+        seq = np.concatenate([
+            np.zeros(n, dtype=np.int64), drop_seq, drop_count[pending_owner] + 1,
+            drop_count[final_owner] + 1 + is_sold[final_owner]
+        ])
+        
+        rent_suffix = np.where(is_rental, '/month', '')
+        listing_notes = [
+            f"Listed for {'rent' if rental else 'sale'} at ${price:,.2f}{suffix}" if priced else 'Listed'
+            for price, priced, rental, suffix in zip(original_price.tolist(), has_price.tolist(), is_rental.tolist(), rent_suffix.tolist())
+        ]
+        final_old = np.where(is_sold[final_owner], 'Pending', 'Active').astype(object)
+        final_new = statuses[final_owner]
+        
+        event_type = np.concatenate([
+            np.full(n, 'listing', dtype=object), np.full(len(drop_owner), 'price_change', dtype=object),
+            np.full(len(pending_owner) + len(final_owner), 'status_change', dtype=object)
+        ])
+        old_value = np.concatenate([
+            np.full(n, None, dtype=object), np.array([f"{value:.2f}" for value in price_before.tolist()], dtype=object),
+            np.full(len(pending_owner), 'Active', dtype=object), final_old
+        ])
+        new_value = np.concatenate([
+            _nullable(has_price, np.array([f"{value:.2f}" for value in original_price.tolist()], dtype=object)),
+            np.array([f"{value:.2f}" for value in price_after.tolist()], dtype=object),
+            np.full(len(pending_owner), 'Pending', dtype=object), final_new
+        ])
+        price_change = np.concatenate([
+            np.full(n, None, dtype=object), np.round(price_after - price_before, 2).astype(object),
+            np.full(len(pending_owner) + len(final_owner), None, dtype=object)
+        ])
+        status_change = np.concatenate([
+            np.full(n, 'Active', dtype=object), np.full(len(drop_owner), None, dtype=object),
+            np.full(len(pending_owner), 'Pending', dtype=object), final_new
+        ])
+        notes = np.concatenate([
+            np.array(listing_notes, dtype=object),
+            np.array([f"Price reduced {-change:.1%}" for change in np.expm1(drop_log).tolist()], dtype=object),
+            np.full(len(pending_owner), STATUS_CHANGE_NOTES['Pending'], dtype=object),
+            np.array([STATUS_CHANGE_NOTES.get(name) for name in final_new.tolist()], dtype=object)
+        ])
+        
+        # Events happen during the working day, one hour apart within a day
+        seconds = 9 * 3600 + seq * 3600 + rng.integers(0, 3600, len(owner))
+        event_date = (listed_days[owner] + day).astype('datetime64[s]') + seconds
+        
+        order = np.lexsort((seq, owner))
+        history_columns = {
+            'property_id': property_ids[owner[order]],
+            'event_type': event_type[order],
+            'old_value': old_value[order],
+            'new_value': new_value[order],
+            'price_change': price_change[order],
+            'status_change': status_change[order],
+            'event_date': event_date[order].astype(object),
+            'notes': notes[order]
+        }
+        
+        closed = is_sold | (statuses == 'Rented')
+        sold_dates = _nullable(closed, (listed_days + close_day).astype(object))
+        return history_columns, sold_dates
+    
+    def generate(self, start: int, count: int, new_listings: bool = False) -> PropertyChunk:
+        """Generate properties start..start+count-1 along with their features and images.
+        
+        With new_listings every property is Active and listed on the reference date,
+        as when it has just come on the market; the other columns are unchanged.
+        """
+        rng = chunk_rng(self.seed, start)
+        n = count
+        
+        # Location
+        location_idx = rng.integers(0, len(self.location_city_ids), n)
+        city_names = self.location_city_names[location_idx]
+        
+        # Property type and size, from the property_configs ranges
+        type_idx = rng.integers(0, len(self.type_ids), n)
+        type_names = self.type_names[type_idx]
+        bedrooms = rng.integers(*self._type_range('bedrooms_range', type_idx), endpoint=True)
+        bathrooms = np.round(rng.uniform(*self._type_range('bathrooms_range', type_idx)), 1)
+        half_bathrooms = np.where(bedrooms >= 2, rng.integers(0, 2, n, endpoint=True), 0)
+        total_area_sqft = rng.integers(*self._type_range('sqft_range', type_idx), endpoint=True)
+        lot_size_sqft = _nullable(self.type_has_lot[type_idx], rng.integers(total_area_sqft, total_area_sqft * 3, endpoint=True))
+        floors = np.where(self.type_is_bungalow[type_idx], 1, rng.integers(1, 3, n, endpoint=True))
+        
+        # Pricing based on listing type
+        listing_idx = rng.integers(0, len(self.listing_type_ids), n)
+        is_sale = self.listing_is_sale[listing_idx]
+        is_rental = self.listing_is_rental[listing_idx]
+        base_price = rng.uniform(*self._type_range('price_range', type_idx))
+        list_price = np.round(base_price, 2)
+        price_per_sqft = np.round(list_price / total_area_sqft, 2)
+        monthly_rent = np.round(base_price / 200, 2)  # Rough conversion
+        
+        # Maintenance fee for condos and some apartments
+        has_fee = self.type_has_fee[type_idx] & (rng.random(n) > 0.3)
+        maintenance_fee = np.round(rng.uniform(200, 800, n), 2)
+        
+        # Property taxes (roughly 1-2% of property value annually)
+        property_taxes_annual = np.round(list_price * rng.uniform(0.01, 0.02, n), 2)
+        
+        # Status - mostly active, some pending/sold/rented
+        status_ids = np.where(
+            rng.random(n) < 0.7,
+            self.active_status_id,
+            self.status_ids[rng.integers(0, len(self.status_ids), n)]
+        )
+        if new_listings:
+            status_ids = np.full(n, self.active_status_id)
+        
+        # Agent assignment (80% have agents)
+        has_agent = rng.random(n) < 0.8
+        if len(self.agent_ids):
+            agent_ids = _nullable(has_agent, self.agent_ids[rng.integers(0, len(self.agent_ids), n)])
+        else:
+            agent_ids = np.full(n, None, dtype=object)
+        
+        # Address
+        street_numbers = rng.integers(1, 9999, n, endpoint=True)
+        street_idx = rng.integers(0, len(STREET_NAMES), n)
+        street_addresses = [f"{number} {STREET_NAMES[idx]}" for number, idx in zip(street_numbers.tolist(), street_idx.tolist())]
+        has_unit = self.type_has_unit[type_idx] & (rng.random(n) > 0.5)
+        unit_values = rng.integers(100, 999, n, endpoint=True)
+        unit_suffix_idx = rng.integers(0, len(UNIT_SUFFIXES), n)
+        unit_numbers = np.full(n, None, dtype=object)
+        unit_rows = np.flatnonzero(has_unit)
+        unit_numbers[unit_rows] = [f"{value}{UNIT_SUFFIXES[idx]}" for value, idx in zip(unit_values[unit_rows].tolist(), unit_suffix_idx[unit_rows].tolist())]
+        postal_codes = self._postal_codes(rng, n)
+        
+        # Coordinates scattered around the neighborhood center
+        center_latitudes = self.location_latitudes[location_idx]
+        spread_km = self.location_spread_km[location_idx]
+        latitudes = np.round(center_latitudes + rng.normal(0.0, spread_km) / KM_PER_DEGREE, 8)
+        longitudes = np.round(self.location_longitudes[location_idx] + rng.normal(0.0, spread_km)
+                              / (KM_PER_DEGREE * np.cos(np.radians(center_latitudes))), 8)
+        
+        # Title
+        adjective_idx = rng.integers(0, len(TITLE_ADJECTIVES), n)
+        has_title_feature = rng.random(n) > 0.5
+        title_feature_idx = rng.integers(0, len(TITLE_FEATURES), n)
+        titles = [
+            f"{TITLE_ADJECTIVES[adj]} {ptype} in {city}{' ' + TITLE_FEATURES[feat] if has_feat else ''}"
+            for adj, ptype, city, has_feat, feat in zip(
+                adjective_idx.tolist(), type_names.tolist(), city_names.tolist(),
+                has_title_feature.tolist(), title_feature_idx.tolist())
+        ]
+        year_built = rng.integers(1950, 2023, n, endpoint=True)
+        
+        # Amenities and description
+        parking_spaces = np.where(self.type_is_studio[type_idx], 0, rng.integers(0, 3, n, endpoint=True))
+        pet_friendly = rng.random(n) > 0.4
+        furnished = rng.random(n) > 0.7
+        descriptions = self._descriptions(rng, bedrooms, bathrooms, type_names, total_area_sqft, location_idx,
+                                          parking_spaces, pet_friendly, furnished)
+        
+        # Dates
+        listed_days = self.reference_date - rng.integers(0, 365, n, endpoint=True)
+        if new_listings:
+            listed_days = np.full(n, self.reference_date)
+        listed_dates = listed_days.astype(object)
+        available_dates = _nullable(is_rental, (self.reference_date + rng.integers(0, 90, n, endpoint=True)).astype(object))
+        
+        # MLS number (optional, 70% have one)
+        mls_numbers = self._mls_numbers(rng.random(n) < 0.7, self.location_province_idx[location_idx], start)
+        
+        # Other details
+        heating_types = np.array(HEATING_TYPES, dtype=object)[rng.integers(0, len(HEATING_TYPES), n)]
+        cooling_types = np.array(COOLING_TYPES, dtype=object)[rng.integers(0, len(COOLING_TYPES), n)]
+        parking_types = _nullable(parking_spaces > 0, np.array(PARKING_TYPES, dtype=object)[rng.integers(0, len(PARKING_TYPES), n)])
+        
+        # Utilities included (for rentals)
+        utility_count = rng.integers(0, 3, n, endpoint=True)
+        utility_order = np.argsort(rng.random((n, len(UTILITIES))), axis=1)
+        utilities_included = _nullable(
+            is_rental,
+            self.utility_combinations[utility_count, utility_order[:, 0], utility_order[:, 1], utility_order[:, 2]]
+        )
+        
+        # Property UUIDs are assigned client-side so child rows can reference
+        # them without a RETURNING round trip
+        property_ids = _random_uuids(rng, n)
+        
+        history_columns, sold_dates = self._history(
+            start, property_ids, listed_days, status_ids,
+            np.where(is_sale, list_price, np.where(is_rental, monthly_rent, np.nan)), is_rental
+        )
+        
+        columns = {
+            'id': property_ids,
+            'mls_number': mls_numbers,
+            'property_type_id': self.type_ids[type_idx],
+            'listing_type_id': self.listing_type_ids[listing_idx],
+            'status_id': status_ids,
+            'agent_id': agent_ids,
+            'street_address': street_addresses,
+            'unit_number': unit_numbers,
+            'neighborhood_id': self.location_neighborhood_ids[location_idx],
+            'city_id': self.location_city_ids[location_idx],
+            'province_id': self.location_province_ids[location_idx],
+            'postal_code': postal_codes,
+            'latitude': latitudes,
+            'longitude': longitudes,
+            'title': titles,
+            'description': descriptions,
+            'year_built': year_built,
+            'total_area_sqft': total_area_sqft,
+            'lot_size_sqft': lot_size_sqft,
+            'bedrooms': bedrooms,
+            'bathrooms': bathrooms,
+            'half_bathrooms': half_bathrooms,
+            'floors': floors,
+            'list_price': _nullable(is_sale, list_price),
+            'price_per_sqft': _nullable(is_sale, price_per_sqft),
+            'monthly_rent': _nullable(is_rental, monthly_rent),
+            'maintenance_fee': _nullable(has_fee, maintenance_fee),
+            'property_taxes_annual': _nullable(is_sale, property_taxes_annual),
+            'heating_type': heating_types,
+            'cooling_type': cooling_types,
+            'utilities_included': utilities_included,
+            'parking_spaces': parking_spaces,
+            'parking_type': parking_types,
+            'pet_friendly': pet_friendly,
+            'furnished': furnished,
+            'listed_date': listed_dates,
+            'available_date': available_dates,
+            'sold_date': sold_dates,
+            # Not written to properties; kept for consumers that need the names
+            'property_type_name': type_names,
+            'city_name': city_names
+        }
+        
+        # Property features (3-8 features per property)
+        feature_count = rng.integers(3, min(8, len(self.feature_ids)), n, endpoint=True)
+        feature_order = np.argsort(rng.random((n, len(self.feature_ids))), axis=1)
+        feature_mask = np.arange(len(self.feature_ids)) < feature_count[:, None]
+        feature_owner = np.repeat(np.arange(n), feature_count)
+        feature_columns = {
+            'property_id': property_ids[feature_owner],
+            'feature_id': self.feature_ids[feature_order][feature_mask]
+        }
+        
+        # Property images (1-5 images, the first one is the primary exterior shot,
+        # IMAGE_TYPES[0])
+        image_count = rng.integers(1, 5, n, endpoint=True)
+        image_owner = np.repeat(np.arange(n), image_count)
+        display_order = np.arange(len(image_owner)) - np.repeat(np.cumsum(image_count) - image_count, image_count)
+        is_primary = display_order == 0
+        image_type_idx = np.where(is_primary, 0, rng.integers(0, len(IMAGE_TYPES), len(image_owner)))
+        image_columns = {
+            'property_id': property_ids[image_owner],
+            'image_url': [f"https://picsum.photos/800/600?random={(start + owner) * 100 + order}"
+                          for owner, order in zip(image_owner.tolist(), display_order.tolist())],
+            'image_type': np.array(IMAGE_TYPES, dtype=object)[image_type_idx],
+            'caption': self.image_captions[type_idx[image_owner], image_type_idx],
+            'display_order': display_order,
+            'is_primary': is_primary
+        }
+        
+        return PropertyChunk(start, columns, feature_columns, image_columns, history_columns)
+
+class DataGenerator:
+    """Generate sample real estate data."""
+    
+    def __init__(self, sink: OutputSink, seed: int = 42, chunk_size: int = CHUNK_SIZE, workers: int = 1,
+                 search_rebuild: str = 'in-place', metrics: Optional[Metrics] = None, progress_interval: float = 5.0,
+                 property_routes: Optional[Tuple[str, Dict[int, str]]] = None, run_id: Optional[int] = None):
+        self.sink = sink
+        self.db = sink.db
+        self.metrics = metrics or Metrics()
+        self.progress_interval = progress_interval
+        if self.db is not None:
+            self.db.metrics = self.metrics
+        self.search_rebuild = search_rebuild
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.workers = workers
+        # (key column, {key value: partition}) when properties rows go straight to their partition
+        self.property_routes = property_routes
+        # generation_runs row that committed steps and chunks are recorded against, if any
+        self.run_id = run_id
+        self.reference_date: Optional[date] = None
+        self.completed_steps: Set[str] = set()
+        self.completed_chunks: Set[int] = set()
+        # Set by begin_fast_load: new history partitions are created UNLOGGED too
+        self.fast_load = False
+        self.load_stats: Dict[str, List[float]] = {}
+        self.lookup_rows: Dict[str, List[tuple]] = {}
+        self.agent_ids: List[int] = []
+        # Private stream for reproducible results; libraries such as psycopg_pool draw from the global one
+        self.random = random.Random(seed)
+    
+    def check_existing_data(self) -> bool:
+        """Check if data already exists in the database."""
+        try:
+            cursor = self.db.execute_query("SELECT COUNT(*) as count FROM properties")
+            properties_count = cursor.fetchone()['count']
+            
+            cursor = self.db.execute_query("SELECT COUNT(*) as count FROM agents")
+            agents_count = cursor.fetchone()['count']
+            
+            if properties_count > 0 or agents_count > 0:
+                print(f"📊 Existing data found:")
+                print(f"   - Properties: {properties_count}")
+                print(f"   - Agents: {agents_count}")
+                return True
+            
+            return False
+        except Exception as e:
+            print(f"❌ Error checking existing data: {e}")
+            return False
+    
+    
+    def write_rows(self, table: str, rows: Iterable[tuple], partition: Optional[str] = None):
+        """Write rows to a table, or directly to one of its partitions, through the output sink and record throughput."""
+        start = time.perf_counter()
+        row_count = self.sink.write_rows(table, rows, partition)
+        self.metrics.add_written(table, row_count)
+        
+        stats = self.load_stats.setdefault(table, [0, 0.0])
+        stats[0] += row_count
+        stats[1] += time.perf_counter() - start
+    
+    def print_load_report(self):
+        """Print rows per second achieved for each bulk-loaded table."""
+        if not self.load_stats:
+            return
+        
+        print(f"📈 Load throughput ({self.sink.describe()}):")
+        for table, (rows, seconds) in self.load_stats.items():
+            rate = rows / seconds if seconds > 0 else float('inf')
+            print(f"   - {table}: {rows} rows in {seconds:.2f}s ({rate:,.0f} rows/s)")
+    
+    def random_int(self, min_val: int, max_val: int) -> int:
+        """Generate random integer between min and max (inclusive)."""
+        return self.random.randint(min_val, max_val)
+    
+    def random_float(self, min_val: float, max_val: float) -> float:
+        """Generate random float between min and max."""
+        return self.random.uniform(min_val, max_val)
+    
+    def random_choice(self, choices: List[Any]) -> Any:
+        """Choose random item from list."""
+        return self.random.choice(choices)
+    
+    def random_choices(self, choices: List[Any], count: int) -> List[Any]:
+        """Choose multiple random items from list without replacement."""
+        return self.random.sample(choices, min(count, len(choices)))
+    
+    def build_lookup_rows(self) -> Dict[str, List[tuple]]:
+        """Build all lookup/reference rows, with ids assigned in insertion order."""
+        rows = {table: [] for table in LOOKUP_TABLES}
+        
+        # Provinces and their cities
+        for province_id, province in enumerate(PROVINCES_DATA, start=1):
+            rows['provinces'].append((province_id, province['code'], province['name'], 'CA'))
+            
+            for city_name in province['cities']:
+                population = self.random_int(50000, 3000000)
+                latitude, longitude = CITY_COORDINATES[city_name]
+                
+                rows['cities'].append((len(rows['cities']) + 1, city_name, province_id, population, latitude, longitude))
+        
+        # Neighborhoods
+        neighborhood_names = [
+            'Downtown', 'Uptown', 'Midtown', 'Old Town', 'New Town', 'Riverside', 'Hillside', 'Parkside',
+            'Westside', 'Eastside', 'Northside', 'Southside', 'Central', 'Heights', 'Gardens'
+        ]
+        
+        for city in rows['cities']:
+            selected_neighborhoods = self.random_choices(neighborhood_names, NEIGHBORHOODS_PER_CITY)
+            
+            for neighborhood_name in selected_neighborhoods:
+                average_income = self.random_int(40000, 150000)
+                walkability_score = self.random_int(20, 100)
+                safety_rating = self.random_int(1, 5)
+                
+                rows['neighborhoods'].append((
+                    len(rows['neighborhoods']) + 1, neighborhood_name, city[0],
+                    average_income, walkability_score, safety_rating
+                ))
+        
+        rows['property_types'] = [
+            (i, item['name'], item['description'], item['category']) for i, item in enumerate(PROPERTY_TYPES_DATA, start=1)
+        ]
+        rows['listing_types'] = [
+            (i, item['name'], item['description']) for i, item in enumerate(LISTING_TYPES_DATA, start=1)
+        ]
+        rows['property_status'] = [
+            (i, item['name'], item['description'], item['is_available']) for i, item in enumerate(PROPERTY_STATUS_DATA, start=1)
+        ]
+        rows['property_features'] = [
+            (i, item['name'], item['category'], item['description']) for i, item in enumerate(PROPERTY_FEATURES_DATA, start=1)
+        ]
+        
+        return rows
+    
+    def insert_lookup_data(self):
+        """Insert all lookup/reference data."""
+        if 'lookup_data' in self.completed_steps:
+            # The rows are fixed, so the engine's lookups can be rebuilt without reading them back
+            self.lookup_rows = self.build_lookup_rows()
+            print("⏩ Lookup data was committed by the interrupted run")
+            return
+        
+        print("📝 Inserting lookup data...")
+        
+        try:
+            self.lookup_rows = self.build_lookup_rows()
+            self.metrics.add_generated(sum(len(rows) for rows in self.lookup_rows.values()))
+            
+            for table, rows in self.lookup_rows.items():
+                self.write_rows(table, rows)
+            
+            self.sink.reset_sequences(LOOKUP_TABLES)
+            self.record_progress('lookup_data')
+            self.sink.commit()
+            print("✅ Lookup data inserted successfully")
+            
+        except Exception as e:
+            print(f"❌ Error inserting lookup data: {e}")
+            self.sink.rollback()
+            raise
+    
+    def generate_agents(self):
+        """Generate sample agents."""
+        if 'agents' in self.completed_steps:
+            self.agent_ids = list(range(1, AGENTS_COUNT + 1))
+            print("⏩ Agents were committed by the interrupted run")
+            return
+        
+        print(f"👥 Generating {AGENTS_COUNT} agents...")
+        
+        first_names = [
+            'John', 'Jane', 'Michael', 'Sarah', 'David', 'Lisa', 'Robert', 'Jennifer', 'William', 'Jessica',
+            'James', 'Ashley', 'Christopher', 'Amanda', 'Daniel', 'Melissa', 'Matthew', 'Michelle', 'Anthony', 'Kimberly',
+            'Mark', 'Amy', 'Donald', 'Angela', 'Steven', 'Helen', 'Paul', 'Deborah', 'Andrew', 'Rachel'
+        ]
+        
+        last_names = [
+            'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
             'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
             'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson'
         ]
         
-        agencies = [
-            'Royal LePage', 'RE/MAX', 'Century 21', 'Coldwell Banker', 'Keller Williams', 'Sutton Group',
-            'HomeLife', 'Realty Executives', 'Exit Realty', 'Chestnut Park Real Estate', 'Bosley Real Estate',
-            'Right at Home Realty', 'iPro Realty', 'Sage Real Estate'
-        ]
+        agencies = [
+            'Royal LePage', 'RE/MAX', 'Century 21', 'Coldwell Banker', 'Keller Williams', 'Sutton Group',
+            'HomeLife', 'Realty Executives', 'Exit Realty', 'Chestnut Park Real Estate', 'Bosley Real Estate',
+            'Right at Home Realty', 'iPro Realty', 'Sage Real Estate'
+        ]
+        
+        # Email and license numbers are permuted agent indices: unique without a lookup
+        email_numbers = KeyAllocator(AGENTS_COUNT, self.seed, KEY_STREAMS['agent_email']).keys(np.arange(AGENTS_COUNT)).tolist()
+        license_numbers = KeyAllocator(AGENTS_COUNT, self.seed, KEY_STREAMS['license_number']).keys(np.arange(AGENTS_COUNT)).tolist()
+        
+        def agent_rows() -> Iterator[tuple]:
+            for i in range(AGENTS_COUNT):
+                first_name = self.random_choice(first_names)
+                last_name = self.random_choice(last_names)
+                
+                # Generate unique email and license number
+                domain = self.random_choice(['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com'])
+                email = f"{first_name.lower()}.{last_name.lower()}.{email_numbers[i]}@{domain}"
+                license_number = f"RE{license_numbers[i]}"
+                
+                phone = f"{self.random_int(200, 999)}-{self.random_int(200, 999)}-{self.random_int(1000, 9999)}"
+                agency_name = self.random_choice(agencies)
+                years_experience = self.random_int(1, 30)
+                rating = round(self.random_float(3.0, 5.0), 2)
+                total_reviews = self.random_int(5, 200)
+                
+                yield (
+                    i + 1, first_name, last_name, email, phone, license_number, agency_name,
+                    years_experience, rating, total_reviews
+                )
+        
+        try:
+            self.write_rows('agents', agent_rows())
+            self.agent_ids = list(range(1, AGENTS_COUNT + 1))
+            self.metrics.add_generated(AGENTS_COUNT)
+            
+            self.sink.reset_sequences(['agents'])
+            self.record_progress('agents', row_count=AGENTS_COUNT)
+            self.sink.commit()
+            print(f"✅ Generated {AGENTS_COUNT} agents successfully")
+            
+        except Exception as e:
+            print(f"❌ Error generating agents: {e}")
+            self.sink.rollback()
+            raise
+
+    def load_property_lookups(self) -> Dict[str, Any]:
+        """Collect the lookup ids and names the property engine resolves from the generated lookup rows."""
+        rows = self.lookup_rows
+        province_codes = {row[0]: row[1] for row in rows['provinces']}
+        city_neighborhoods: Dict[int, List[Tuple[int, str]]] = {}
+        for row in rows['neighborhoods']:
+            city_neighborhoods.setdefault(row[2], []).append((row[0], row[1]))
+        
+        lookups = {
+            'property_types': [(row[0], row[1]) for row in rows['property_types']],
+            'listing_types': [(row[0], row[1]) for row in rows['listing_types']],
+            'statuses': [(row[0], row[1]) for row in rows['property_status']],
+            'agent_ids': list(self.agent_ids),
+            'locations': [
+                {
+                    'city_id': city_id, 'city_name': city_name, 'province_id': province_id,
+                    'province_code': province_codes[province_id], 'neighborhood_id': neighborhood_id,
+                    'center': offset_coordinates(latitude, longitude, *NEIGHBORHOOD_OFFSETS_KM.get(neighborhood_name, (0.0, 0.0))),
+                    'spread_km': NEIGHBORHOOD_SPREAD_KM if neighborhood_id is not None else CITY_SPREAD_KM
+                }
+                for city_id, city_name, province_id, _, latitude, longitude in rows['cities']
+                for neighborhood_id, neighborhood_name in city_neighborhoods.get(city_id, [(None, None)])
+            ],
+            'feature_ids': [row[0] for row in rows['property_features']]
+        }
+        
+        return lookups
+    
+    def iter_property_chunks(self, engine: 'ColumnarPropertyGenerator', start: int, end: int,
+                             completed: Iterable[int] = ()) -> Iterator[PropertyChunk]:
+        """Yield generated properties start..end-1 in chunks of at most chunk_size rows, skipping `completed` chunk starts."""
+        completed = set(completed)
+        for chunk_start in range(start, end, self.chunk_size):
+            if chunk_start not in completed:
+                yield engine.generate(chunk_start, min(self.chunk_size, end - chunk_start))
+    
+    def flush_chunk(self, chunk: PropertyChunk):
+        """Write a chunk of properties with its feature and image rows, then commit it."""
+        self.write_chunk(chunk)
+        self.sink.commit()
+    
+    def write_chunk(self, chunk: PropertyChunk, step: str = 'properties'):
+        """Write a chunk of properties with its child rows and its progress record under `step`, without committing."""
+        # Properties are written before their child rows so foreign keys resolve
+        if self.property_routes:
+            column, routes = self.property_routes
+            for value, rows in chunk.property_rows_by(column):
+                self.write_rows('properties', rows, routes.get(value))
+        else:
+            self.write_rows('properties', chunk.property_rows())
+        self.write_rows('property_feature_mappings', chunk.feature_rows())
+        self.write_rows('property_images', chunk.image_rows())
+        self.write_rows('property_history', chunk.history_rows())
+        self.record_progress(step, chunk.start, len(chunk))
+    
+    def plan_shards(self, count: int) -> List[Tuple[int, int]]:
+        """Split 0..count-1 into at most `workers` contiguous, chunk-aligned ranges."""
+        chunk_count = (count + self.chunk_size - 1) // self.chunk_size
+        shard_count = max(1, min(self.workers, chunk_count))
+        shards = []
+        
+        for shard in range(shard_count):
+            first_chunk = chunk_count * shard // shard_count
+            last_chunk = chunk_count * (shard + 1) // shard_count
+            shards.append((first_chunk * self.chunk_size, min(last_chunk * self.chunk_size, count)))
+        
+        return shards
+    
+    def generate_shard(self, lookups: Dict[str, Any], reference_date: date, total_count: int, start: int, end: int,
+                       completed: Iterable[int] = ()) -> int:
+        """Generate and commit properties start..end-1, except the `completed` chunks, returning how many were committed."""
+        completed = set(completed)
+        engine = ColumnarPropertyGenerator(lookups, seed=self.seed, reference_date=reference_date, total_count=total_count)
+        pending = sum(min(self.chunk_size, end - chunk_start) for chunk_start in range(start, end, self.chunk_size)
+                      if chunk_start not in completed)
+        progress = ProgressReporter(f"shard {start}-{end - 1}", pending, self.progress_interval)
+        committed = 0
+        
+        try:
+            for chunk in self.iter_property_chunks(engine, start, end, completed):
+                self.metrics.add_generated(len(chunk))
+                self.flush_chunk(chunk)
+                committed += len(chunk)
+                progress.update(len(chunk))
+        except Exception as e:
+            print(f"❌ Shard {start}-{end - 1} failed after committing {committed} properties: {e}")
+            self.sink.rollback()
+            raise
+        
+        return committed
+    
+    def generate_properties(self, count: int):
+        """Generate sample properties."""
+        shards = self.plan_shards(count)
+        print(f"🏠 Generating {count} properties in chunks of {self.chunk_size} across {len(shards)} worker(s)...")
+        
+        try:
+            if not self.lookup_rows:
+                print("❌ No cities found. Please run lookup data insertion first.")
+                return
+            
+            lookups = self.load_property_lookups()
+            
+            # A resumed run keeps the original date, which the rows are generated relative to
+            reference_date = self.reference_date or date.today()
+            started = time.perf_counter()
+            
+            # Chunks committed before an interruption are skipped; every other chunk is
+            # generated from the seed and its position, whatever the shard layout
+            completed = {chunk_start for chunk_start in self.completed_chunks if chunk_start < count}
+            pending_shards = [
+                (start, end, sorted(chunk_start for chunk_start in completed if start <= chunk_start < end))
+                for start, end in shards
+            ]
+            pending_shards = [(start, end, done) for start, end, done in pending_shards
+                              if len(done) < len(range(start, end, self.chunk_size))]
+            if completed:
+                print(f"⏩ Resuming: {len(completed)} of {len(range(0, count, self.chunk_size))} chunks were committed by the interrupted run")
+            
+            if self.db is not None:
+                # Every partition must exist before the shards write their history
+                self.create_history_partitions(reference_date - timedelta(days=365),
+                                               reference_date + timedelta(days=HISTORY_PARTITION_DAYS_AHEAD))
+                self.property_routes = self.find_property_routes()
+                self.db.commit()
+            
+            if len(pending_shards) == 1:
+                self.generate_shard(lookups, reference_date, count, *pending_shards[0])
+            elif pending_shards:
+                settings = {
+                    'seed': self.seed,
+                    'chunk_size': self.chunk_size,
+                    'progress_interval': self.progress_interval,
+                    'property_routes': self.property_routes,
+                    'run_id': self.run_id
+                }
+                # Spawned rather than forked workers, so no child inherits this
+                # process's open database connection
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+                    futures = [
+                        executor.submit(generate_property_shard, self.sink.spec(), settings,
+                                        lookups, reference_date, count, start, end, done)
+                        for start, end, done in pending_shards
+                    ]
+                    for future in futures:
+                        load_stats, counters = future.result()
+                        for table, (rows, seconds) in load_stats.items():
+                            stats = self.load_stats.setdefault(table, [0, 0.0])
+                            stats[0] += rows
+                            stats[1] += seconds
+                        self.metrics.merge(counters)
+            
+            elapsed = time.perf_counter() - started
+            print(f"✅ Generated {count} properties successfully in {elapsed:.2f}s ({count / elapsed:,.0f} properties/s)")
+            self.print_load_report()
+            
+            if self.db is None:
+                print(f"   Skipping search vectors and search_table: the {self.sink.describe()} sink has no database")
+                return
+            
+            if self.fast_load:
+                # The search vector and search_table queries look rows up through the
+                # unique keys the fast load deferred
+                with self.metrics.phase('finish_fast_load'):
+                    self.finish_fast_load()
+            
+            with self.metrics.phase('update_search_vectors'):
+                self.update_search_vectors()
+            
+            # Populate search_table
+            print("   Populating search_table...")
+            with self.metrics.phase('build_search_table'):
+                self.build_search_table()
+            print("✅ Search table populated successfully")
+            
+        except Exception as e:
+            print(f"❌ Error generating properties: {e}")
+            import traceback
+            traceback.print_exc()
+            self.sink.rollback()
+            raise
+    
+    def start_run(self, settings: Dict[str, Any]):
+        """Record a new generation run, so it can be resumed with --resume if it is interrupted."""
+        cursor = self.db.execute_query("SELECT to_regclass('generation_runs') IS NOT NULL AS tracked")
+        if not cursor.fetchone()['tracked']:
+            print("⚠️  generation_runs is missing (schema.sql predates it); this run cannot be resumed")
+            self.db.commit()
+            return
+        
+        self.reference_date = date.today()
+        cursor = self.db.execute_query(
+            "INSERT INTO generation_runs (settings, reference_date) VALUES (%s::jsonb, %s) RETURNING id",
+            (json.dumps(settings, sort_keys=True), self.reference_date)
+        )
+        self.run_id = cursor.fetchone()['id']
+        self.db.commit()
+    
+    def resume_run(self, run: Dict[str, Any]):
+        """Continue an interrupted run: reuse its date and skip the steps and chunks it committed."""
+        self.run_id = run['id']
+        self.reference_date = run['reference_date']
+        cursor = self.db.execute_query(
+            "SELECT step, chunk_start FROM generation_progress WHERE run_id = %s", (self.run_id,)
+        )
+        for row in cursor.fetchall():
+            if row['step'] == 'properties':
+                self.completed_chunks.add(row['chunk_start'])
+            else:
+                self.completed_steps.add(row['step'])
+        self.db.commit()
+    
+    def record_progress(self, step: str, chunk_start: int = 0, row_count: int = 0):
+        """Record a committed step, or one chunk of properties with its random state, in the transaction writing it."""
+        if self.run_id is None:
+            return
+        self.db.execute_query("""
+            INSERT INTO generation_progress (run_id, step, chunk_start, row_count, seed, spawn_key)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (self.run_id, step, chunk_start, row_count, self.seed, list(chunk_spawn_key(chunk_start))))
+    
+    def finish_run(self):
+        """Mark the run complete; --resume only picks up unfinished runs."""
+        if self.run_id is None:
+            return
+        self.db.execute_query("UPDATE generation_runs SET completed_at = CURRENT_TIMESTAMP WHERE id = %s", (self.run_id,))
+        self.db.commit()
+    
+    def save_snapshot(self, directory: str, key_settings: Dict[str, Any]):
+        """Dump every generated table to binary COPY files under `directory`.
+        
+        Files are written to a private staging directory that is renamed into place
+        once complete, so a reader never sees a partial snapshot.
+        """
+        staging = f"{directory}.partial-{os.getpid()}"
+        print(f"📸 Saving dataset snapshot to {directory}...")
+        started = time.perf_counter()
+        
+        try:
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            
+            manifest = {'settings': key_settings, 'created_at': datetime.now().isoformat(), 'tables': {}}
+            for table in SNAPSHOT_TABLES:
+                self.db.copy_table_to_file(table, os.path.join(staging, f"{table}.bin"))
+                cursor = self.db.execute_query(f"SELECT COUNT(*) AS count FROM {table}")
+                manifest['tables'][table] = cursor.fetchone()['count']
+            self.db.commit()
+            
+            with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            
+            try:
+                os.rename(staging, directory)
+            except OSError:
+                # Another process saved the same snapshot first
+                shutil.rmtree(staging, ignore_errors=True)
+            
+            print(f"✅ Snapshot saved in {time.perf_counter() - started:.2f}s")
+            
+        except Exception as e:
+            # A missing snapshot only costs the next start a regeneration
+            print(f"⚠️  Could not save snapshot: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            self.db.rollback()
+    
+    def restore_snapshot(self, directory: str):
+        """Bulk-load a snapshot written by save_snapshot into freshly created tables."""
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        
+        print(f"📦 Restoring dataset snapshot from {directory}...")
+        started = time.perf_counter()
+        
+        try:
+            # The snapshot carries its own facet counts
+            self.skip_facet_triggers()
+            for table, rows in manifest['tables'].items():
+                table_started = time.perf_counter()
+                if table == 'property_history':
+                    self.create_loaded_history_partitions()
+                self.db.copy_file(table, None, os.path.join(directory, f"{table}.bin"), binary=True)
+                print(f"   {table}: {rows} rows in {time.perf_counter() - table_started:.2f}s")
+            
+            self.sink.reset_sequences(SERIAL_TABLES)
+            self.install_facet_triggers()
+            self.db.commit()
+            print(f"✅ Snapshot restored in {time.perf_counter() - started:.2f}s")
+            
+        except Exception as e:
+            print(f"❌ Error restoring snapshot: {e}")
+            self.db.rollback()
+            raise
+    
+    def load_copy_files(self, directory: str):
+        """Bulk-load the output of the copy-files sink, then compute search vectors and search_table."""
+        print(f"📦 Loading COPY files from {directory}...")
+        started = time.perf_counter()
+        
+        try:
+            for table, columns in COPY_TABLES.items():
+                paths = sorted(glob.glob(os.path.join(directory, table, 'part-*.copy')) +
+                               glob.glob(os.path.join(directory, table, 'part-*.bin')))
+                table_started = time.perf_counter()
+                if table == 'property_history':
+                    self.create_loaded_history_partitions()
+                for path in paths:
+                    self.db.copy_file(table, columns, path, binary=path.endswith('.bin'))
+                print(f"   {table}: {len(paths)} file(s) in {time.perf_counter() - table_started:.2f}s")
+            
+            self.sink.reset_sequences(EXPLICIT_ID_TABLES)
+            self.db.commit()
+            print(f"✅ COPY files loaded in {time.perf_counter() - started:.2f}s")
+            
+            if self.fast_load:
+                # The search vector and search_table queries look rows up through the
+                # unique keys the fast load deferred
+                with self.metrics.phase('finish_fast_load'):
+                    self.finish_fast_load()
+            
+            with self.metrics.phase('update_search_vectors'):
+                self.update_search_vectors()
+            print("   Populating search_table...")
+            with self.metrics.phase('build_search_table'):
+                self.build_search_table()
+            print("✅ Search table populated successfully")
+            
+        except Exception as e:
+            print(f"❌ Error loading COPY files: {e}")
+            self.db.rollback()
+            raise
+
+    def partition_key(self, table: str) -> Optional[str]:
+        """Column a LIST-partitioned table is partitioned on, or None if it is not partitioned."""
+        cursor = self.db.execute_query("SELECT pg_get_partkeydef(%s::regclass) AS key", (table,))
+        match = re.fullmatch(r'LIST \((\w+)\)', cursor.fetchone()['key'] or '')
+        return match.group(1) if match else None
+    
+    def partition_scheme(self) -> Optional[str]:
+        """The PARTITION_SCHEMES entry properties is partitioned by, if any."""
+        key = self.partition_key('properties')
+        return next((name for name, scheme in PARTITION_SCHEMES.items() if scheme['properties_key'] == key), None)
+    
+    def find_property_routes(self) -> Optional[Tuple[str, Dict[int, str]]]:
+        """Key column and the partition for each key value, when properties is partitioned."""
+        scheme_name = self.partition_scheme()
+        if scheme_name is None:
+            return None
+        
+        scheme = PARTITION_SCHEMES[scheme_name]
+        cursor = self.db.execute_query(
+            "SELECT relname FROM pg_class WHERE oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'properties'::regclass)"
+        )
+        existing = {row['relname'] for row in cursor.fetchall()}
+        routes = {value: partition_name('properties', label) for value, label in scheme['values']}
+        return scheme['properties_key'], {value: name for value, name in routes.items() if name in existing}
+    
+    def partition_tables(self, scheme_name: str):
+        """Recreate the empty properties and search_table as LIST-partitioned tables.
+        
+        properties is partitioned on a lookup id and search_table on the matching name,
+        with one partition per value plus a default. PostgreSQL requires primary and
+        unique keys to include the partition key, so properties(id) alone is no longer
+        unique and the foreign keys referencing it are dropped.
+        """
+        scheme = PARTITION_SCHEMES[scheme_name]
+        current = self.partition_scheme()
+        if current == scheme_name:
+            print(f"🧩 properties and search_table are already partitioned by {scheme_name}")
+            return
+        if current is not None:
+            raise RuntimeError(f"properties is already partitioned by {current}; recreate the schema to change it")
+        
+        cursor = self.db.execute_query("SELECT EXISTS (SELECT 1 FROM properties) AS has_rows")
+        if cursor.fetchone()['has_rows']:
+            raise RuntimeError("properties must be empty to be partitioned; recreate the schema first")
+        
+        print(f"🧩 Partitioning properties and search_table by {scheme_name} ({len(scheme['values'])} partitions each)...")
+        try:
+            cursor = self.db.execute_query("""
+                SELECT conrelid::regclass::text AS table_name, conname
+                FROM pg_constraint
+                WHERE contype = 'f' AND confrelid = 'properties'::regclass AND conparentid = 0
+            """)
+            for row in cursor.fetchall():
+                self.db.execute_query(f"ALTER TABLE {row['table_name']} DROP CONSTRAINT {row['conname']}")
+            
+            self.recreate_partitioned('properties', scheme['properties_key'],
+                                      [(value, label) for value, label in scheme['values']])
+            self.recreate_partitioned('search_table', scheme['search_table_key'],
+                                      [(label, label) for _, label in scheme['values']])
+            self.db.commit()
+            
+        except Exception as e:
+            print(f"❌ Error partitioning tables: {e}")
+            self.db.rollback()
+            raise
+    
+    def recreate_partitioned(self, table: str, key: str, partitions: List[Tuple[Any, str]]):
+        """Replace an empty table with a copy LIST-partitioned on `key`, with its keys widened to include it.
+        
+        `partitions` holds (value, label) pairs; each value gets the partition named after
+        its label. Does not commit.
+        """
+        cursor = self.db.execute_query("""
+            SELECT conname, contype, pg_get_constraintdef(oid) AS definition
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')
+        """, (table,))
+        constraints = cursor.fetchall()
+        
+        self.db.execute_query(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+        self.db.execute_query(
+            f"CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+            f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY LIST ({key})"
+        )
+        self.db.execute_query(f"DROP TABLE {table}_unpartitioned")
+        
+        for row in constraints:
+            definition = row['definition']
+            if row['contype'] in ('p', 'u'):
+                definition = re.sub(r'\)$', f", {key})", definition)
+            self.db.execute_query(f"ALTER TABLE {table} ADD CONSTRAINT {row['conname']} {definition}")
+        
+        for value, label in partitions:
+            self.db.execute_query(
+                f"CREATE TABLE {partition_name(table, label)} PARTITION OF {table} FOR VALUES IN ({sql_literal(value)})"
+            )
+        self.db.execute_query(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    
+    def rebuild_search_partitions(self, workers: int):
+        """Rebuild a partitioned search_table one partition per transaction, up to `workers` at a time.
         
-        agents_data = []
+        Each partition is emptied and refilled from the matching properties partition, so
+        the others stay readable and a failure only loses the partition being rebuilt.
+        """
+        scheme = PARTITION_SCHEMES[self.partition_scheme()]
+        key = scheme['properties_key']
+        values = [value for value, _ in scheme['values']]
+        jobs = [(partition_name('search_table', label), f"WHERE p.{key} = %s", (value,)) for value, label in scheme['values']]
+        jobs.append(('search_table_default', f"WHERE p.{key} <> ALL(%s)", (values,)))
+        self.db.commit()
         
+        print(f"🔁 Rebuilding {len(jobs)} search_table partitions with {workers} connection(s)...")
+        started = time.perf_counter()
         try:
-            for i in range(AGENTS_COUNT):
-                first_name = self.random_choice(first_names)
-                last_name = self.random_choice(last_names)
-                
-                # Generate unique email and license number
-                domain = self.random_choice(['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com'])
-                email = f"{first_name.lower()}.{last_name.lower()}.{i + 1}@{domain}"
-                license_number = f"RE{str(100000 + i).zfill(6)}"
-                
-                phone = f"{self.random_int(200, 999)}-{self.random_int(200, 999)}-{self.random_int(1000, 9999)}"
-                agency_name = self.random_choice(agencies)
-                years_experience = self.random_int(1, 30)
-                rating = round(self.random_float(3.0, 5.0), 2)
-                total_reviews = self.random_int(5, 200)
-                
-                agents_data.append((
-                    first_name, last_name, email, phone, license_number, agency_name,
-                    years_experience, rating, total_reviews
-                ))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                rows = sum(executor.map(lambda job: fill_search_partition(self.db.sibling(), *job), jobs))
+            print(f"   Filled {rows} rows in {time.perf_counter() - started:.2f}s")
             
-            # Insert agents in batches
-            for i in range(0, len(agents_data), BATCH_SIZE):
-                batch = agents_data[i:i + BATCH_SIZE]
-                self.db.execute_many(
-                    """INSERT INTO agents (first_name, last_name, email, phone, license_number, agency_name, 
-                       years_experience, rating, total_reviews) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                    batch
+        except Exception as e:
+            print(f"❌ Error rebuilding search_table partitions: {e}")
+            raise
+    
+    def history_is_partitioned(self) -> bool:
+        """Whether property_history is partitioned, as schema.sql creates it."""
+        cursor = self.db.execute_query("SELECT relkind FROM pg_class WHERE oid = 'property_history'::regclass")
+        return cursor.fetchone()['relkind'] == 'p'
+    
+    def create_history_partitions(self, first: date, last: date):
+        """Create the monthly property_history partitions covering first..last.
+        
+        Rows outside them land in the default partition. A month the default
+        partition already holds rows for cannot be created with PARTITION OF, so
+        those rows are moved into the month's table before it is attached.
+        Does not commit.
+        """
+        if not self.history_is_partitioned():
+            return
+        
+        unlogged = 'UNLOGGED ' if self.fast_load else ''
+        month = date(first.year, first.month, 1)
+        while month <= last:
+            next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            name = f"property_history_{month:%Y_%m}"
+            in_month = f"event_date >= '{month}' AND event_date < '{next_month}'"
+            cursor = self.db.execute_query(
+                f"SELECT to_regclass('{name}') IS NOT NULL AS created, "
+                f"EXISTS (SELECT 1 FROM property_history_default WHERE {in_month}) AS stranded"
+            )
+            row = cursor.fetchone()
+            if row['stranded']:
+                self.db.execute_query(f"CREATE {unlogged}TABLE {name} (LIKE property_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+                self.db.execute_query(
+                    f"WITH moved AS (DELETE FROM property_history_default WHERE {in_month} RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                )
+                self.db.execute_query(
+                    f"ALTER TABLE property_history ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{next_month}')"
                 )
-                print(f"   Inserted agents batch {i // BATCH_SIZE + 1}/{(len(agents_data) + BATCH_SIZE - 1) // BATCH_SIZE}")
+                print(f"   Moved {month:%Y-%m} events out of property_history_default into {name}")
+            elif not row['created']:
+                self.db.execute_query(
+                    f"CREATE {unlogged}TABLE {name} PARTITION OF property_history "
+                    f"FOR VALUES FROM ('{month}') TO ('{next_month}')"
+                )
+            month = next_month
+    
+    def create_loaded_history_partitions(self):
+        """Create partitions for the history of the properties already loaded."""
+        cursor = self.db.execute_query("SELECT MIN(listed_date) AS first FROM properties")
+        today = date.today()
+        self.create_history_partitions(cursor.fetchone()['first'] or today, today + timedelta(days=HISTORY_PARTITION_DAYS_AHEAD))
+    
+    def scanned_relations(self, sql: str, params: tuple) -> Set[str]:
+        """Tables and partitions the plan of a query reads, from EXPLAIN without running it."""
+        cursor = self.db.execute_query(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        nodes = [cursor.fetchone()['QUERY PLAN'][0]['Plan']]
+        scanned = set()
+        while nodes:
+            node = nodes.pop()
+            if 'Relation Name' in node:
+                scanned.add(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return scanned
+    
+    def report_pruning(self, description: str, table: str, sql: str, params: tuple):
+        """Print how many of a partitioned table's partitions a query reads."""
+        cursor = self.db.execute_query("SELECT COUNT(*) AS count FROM pg_inherits WHERE inhparent = %s::regclass", (table,))
+        partitions = cursor.fetchone()['count']
+        scanned = len(self.scanned_relations(sql, params))
+        
+        if scanned < partitions:
+            print(f"✅ {description} reads {scanned} of {partitions} partitions")
+        else:
+            print(f"⚠️  {description} reads all {partitions} partitions, no pruning")
+    
+    def check_partition_pruning(self):
+        """Show that lookups on the partition keys read only the partitions they need."""
+        try:
+            if self.history_is_partitioned():
+                cursor = self.db.execute_query("""
+                    SELECT id, listed_date FROM properties
+                    WHERE listed_date IS NOT NULL
+                    ORDER BY listed_date DESC
+                    LIMIT 1
+                """)
+                row = cursor.fetchone()
+                if row is not None:
+                    self.report_pruning("Property history lookup", 'property_history',
+                                        PROPERTY_HISTORY_LOOKUP, (row['id'], row['listed_date']))
             
+            scheme_name = self.partition_scheme()
+            if scheme_name is not None:
+                scheme = PARTITION_SCHEMES[scheme_name]
+                key = scheme['search_table_key']
+                self.report_pruning(f"search_table filter on {key}", 'search_table',
+                                    f"SELECT id FROM search_table WHERE {key} = %s ORDER BY list_price LIMIT 20",
+                                    (scheme['values'][0][1],))
             self.db.commit()
-            print(f"✅ Generated {AGENTS_COUNT} agents successfully")
             
         except Exception as e:
-            print(f"❌ Error generating agents: {e}")
+            print(f"⚠️  Could not check partition pruning: {e}")
+            self.db.rollback()
+    
+    def loaded_relations(self) -> List[Tuple[str, str]]:
+        """(name, relpersistence) of every table holding loaded rows: the partitions of partitioned tables, in load order."""
+        relations = []
+        for table in SNAPSHOT_TABLES:
+            # pg_partition_tree is empty for a table that is not partitioned
+            cursor = self.db.execute_query("""
+                SELECT relname, relpersistence FROM pg_class
+                WHERE relkind = 'r' AND (oid = %(table)s::regclass
+                      OR oid IN (SELECT relid FROM pg_partition_tree(%(table)s::regclass) WHERE isleaf))
+                ORDER BY relname
+            """, {'table': table})
+            relations.extend((row['relname'], row['relpersistence']) for row in cursor.fetchall())
+        return relations
+    
+    def begin_fast_load(self):
+        """Set up --fast-load: drop the per-row checked constraints, make the tables
+        UNLOGGED and stop waiting for WAL flushes on commit.
+        
+        The dropped constraints are kept in deferred_constraints, so a resumed run
+        still restores them in finish_fast_load.
+        """
+        print("⚡ Fast load: deferring constraints, switching tables to UNLOGGED, synchronous_commit off...")
+        self.fast_load = True
+        
+        try:
+            cursor = self.db.execute_query("""
+                SELECT conrelid::regclass::text AS table_name, conname, pg_get_constraintdef(oid) AS definition
+                FROM pg_constraint
+                WHERE conrelid = ANY(%s::regclass[]) AND conparentid = 0
+                  AND (contype = 'f' OR (contype = 'u' AND conrelid = ANY(%s::regclass[])))
+                ORDER BY contype, conrelid::regclass::text, conname
+            """, (SNAPSHOT_TABLES, FAST_LOAD_UNIQUE_TABLES))
+            constraints = cursor.fetchall()
+            for row in constraints:
+                self.db.execute_query(
+                    "INSERT INTO deferred_constraints (table_name, constraint_name, definition) VALUES (%s, %s, %s)",
+                    (row['table_name'], row['conname'], row['definition'])
+                )
+                self.db.execute_query(f"ALTER TABLE {row['table_name']} DROP CONSTRAINT {row['conname']}")
+            
+            # Without the foreign keys, permanent and unlogged tables can reference each other freely
+            unlogged = 0
+            for name, persistence in self.loaded_relations():
+                if persistence == 'p':
+                    self.db.execute_query(f"ALTER TABLE {name} SET UNLOGGED")
+                    unlogged += 1
+            self.db.commit()
+        except Exception as e:
+            print(f"❌ Error preparing fast load: {e}")
             self.db.rollback()
             raise
-
-    def generate_properties(self, count: int):
-        """Generate sample properties."""
-        print(f"🏠 Generating {count} properties...")
+        
+        self.sink.set_synchronous_commit(False)
+        print(f"   Deferred {len(constraints)} constraints, {unlogged} tables now UNLOGGED")
+    
+    def finish_fast_load(self):
+        """Undo begin_fast_load once the rows are in: tables back to LOGGED, then the
+        deferred constraints re-added in bulk."""
+        cursor = self.db.execute_query("SELECT to_regclass('deferred_constraints') IS NOT NULL AS tracked")
+        if not cursor.fetchone()['tracked']:
+            self.db.commit()
+            return
+        
+        cursor = self.db.execute_query("SELECT table_name, constraint_name, definition FROM deferred_constraints ORDER BY table_name, constraint_name")
+        constraints = cursor.fetchall()
+        relations = [name for name, persistence in self.loaded_relations() if persistence == 'u']
+        if not constraints and not relations:
+            self.db.commit()
+            return
+        
+        print(f"⚡ Fast load: making {len(relations)} tables durable and restoring {len(constraints)} constraints...")
+        self.sink.set_synchronous_commit(True)
         
         try:
-            # Fetch lookup data
-            cursor = self.db.execute_query("SELECT id FROM property_types")
-            property_type_ids = [row['id'] for row in cursor.fetchall()]
+            # Referenced tables come first, since a permanent table cannot reference an unlogged one
+            started = time.perf_counter()
+            for name in relations:
+                self.db.execute_query(f"ALTER TABLE {name} SET LOGGED")
+            self.db.commit()
+            print(f"   SET LOGGED in {time.perf_counter() - started:.2f}s")
             
-            cursor = self.db.execute_query("SELECT id FROM listing_types")
-            listing_type_ids = [row['id'] for row in cursor.fetchall()]
+            # NOT VALID adds a foreign key without a per-row check; VALIDATE then checks
+            # every row in one scan per constraint. PostgreSQL does not allow NOT VALID
+            # on a partitioned table, whose foreign keys are validated as they are added.
+            started = time.perf_counter()
+            cursor = self.db.execute_query("SELECT relname FROM pg_class WHERE relkind = 'p'")
+            partitioned = {row['relname'] for row in cursor.fetchall()}
+            to_validate = []
+            for row in constraints:
+                deferrable = row['definition'].startswith('FOREIGN KEY') and row['table_name'] not in partitioned
+                self.db.execute_query(
+                    f"ALTER TABLE {row['table_name']} ADD CONSTRAINT {row['constraint_name']} "
+                    f"{row['definition']}{' NOT VALID' if deferrable else ''}"
+                )
+                if deferrable:
+                    to_validate.append(row)
+            for row in to_validate:
+                self.db.execute_query(f"ALTER TABLE {row['table_name']} VALIDATE CONSTRAINT {row['constraint_name']}")
+            self.db.execute_query("DELETE FROM deferred_constraints")
+            self.record_progress('fast_load')
+            self.db.commit()
+            print(f"   Constraints restored and validated in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"❌ Error finishing fast load: {e}")
+            self.db.rollback()
+            raise
+        
+        self.fast_load = False
+    
+    def build_indexes(self, concurrently: bool = False, maintenance_workers: int = 4, maintenance_work_mem: str = '256MB'):
+        """Create the secondary indexes once the data is loaded, timing each build."""
+        print(f"🗂️  Building {len(POST_LOAD_INDEXES)} indexes{' concurrently' if concurrently else ''}...")
+        started = time.perf_counter()
+        
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        self.db.commit()
+        self.db.set_autocommit(True)
+        
+        try:
+            # set_config rather than SET, which cannot take bind parameters server-side
+            self.db.execute_query("SELECT set_config('max_parallel_maintenance_workers', %s, false)", (str(maintenance_workers),))
+            self.db.execute_query("SELECT set_config('maintenance_work_mem', %s, false)", (maintenance_work_mem,))
             
-            cursor = self.db.execute_query("SELECT id FROM property_status")
-            status_ids = [row['id'] for row in cursor.fetchall()]
+            cursor = self.db.execute_query("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            has_trigram = cursor.fetchone() is not None
+            if not has_trigram:
+                print("⚠️  pg_trgm extension is not installed, skipping trigram indexes")
             
-            cursor = self.db.execute_query("SELECT id FROM agents")
-            agent_ids = [row['id'] for row in cursor.fetchall()]
-            if not agent_ids:
-                agent_ids = [None]
+            # Partitioned tables cannot build an index concurrently
+            cursor = self.db.execute_query("SELECT relname FROM pg_class WHERE relkind = 'p'")
+            partitioned = {row['relname'] for row in cursor.fetchall()}
             
-            cursor = self.db.execute_query("""
-                SELECT c.id as city_id, c.name as city_name, c.province_id, 
-                       p.code as province_code, n.id as neighborhood_id
-                FROM cities c
-                JOIN provinces p ON c.province_id = p.id
-                LEFT JOIN neighborhoods n ON n.city_id = c.id
-            """)
-            locations = cursor.fetchall()
+            for name, table, definition in POST_LOAD_INDEXES:
+                if 'gin_trgm_ops' in definition and not has_trigram:
+                    continue
+                index_started = time.perf_counter()
+                try:
+                    self.db.execute_query(
+                        f"CREATE INDEX {'CONCURRENTLY ' if concurrently and table not in partitioned else ''}"
+                        f"IF NOT EXISTS {name} ON {table} {definition}"
+                    )
+                except Exception:
+                    # A failed concurrent build leaves an invalid index behind
+                    self.db.execute_query(f"DROP INDEX IF EXISTS {name}")
+                    raise
+                print(f"   {name}: {time.perf_counter() - index_started:.2f}s")
             
-            if not locations:
-                print("❌ No cities found. Please run lookup data insertion first.")
-                return
+            print(f"✅ Indexes built in {time.perf_counter() - started:.2f}s")
             
-            cursor = self.db.execute_query("SELECT id FROM property_features")
-            feature_ids = [row['id'] for row in cursor.fetchall()]
-            
-            # Property type configurations for realistic data
-            property_configs = {
-                'House': {'bedrooms_range': (2, 5), 'bathrooms_range': (1.5, 4.5), 'sqft_range': (1200, 3500), 'price_range': (300000, 1200000)},
-                'Condo': {'bedrooms_range': (1, 3), 'bathrooms_range': (1.0, 2.5), 'sqft_range': (600, 1800), 'price_range': (200000, 800000)},
-                'Townhouse': {'bedrooms_range': (2, 4), 'bathrooms_range': (1.5, 3.5), 'sqft_range': (1000, 2500), 'price_range': (250000, 900000)},
-                'Apartment': {'bedrooms_range': (1, 2), 'bathrooms_range': (1.0, 2.0), 'sqft_range': (500, 1200), 'price_range': (150000, 500000)},
-                'Duplex': {'bedrooms_range': (3, 6), 'bathrooms_range': (2.0, 4.0), 'sqft_range': (1500, 3000), 'price_range': (400000, 1000000)},
-                'Bungalow': {'bedrooms_range': (2, 4), 'bathrooms_range': (1.5, 3.0), 'sqft_range': (1000, 2500), 'price_range': (300000, 900000)},
-                'Loft': {'bedrooms_range': (1, 2), 'bathrooms_range': (1.0, 2.0), 'sqft_range': (800, 2000), 'price_range': (250000, 700000)},
-                'Studio': {'bedrooms_range': (0, 1), 'bathrooms_range': (1.0, 1.5), 'sqft_range': (400, 800), 'price_range': (150000, 400000)}
-            }
+        except Exception as e:
+            print(f"❌ Error building indexes: {e}")
+            raise
+        finally:
+            self.db.set_autocommit(False)
+    
+    def optimize(self):
+        """Get the freshly loaded database to steady state before the first request:
+        locality order for search_table, fresh statistics, warm buffers."""
+        with self.metrics.phase('history_partitions'):
+            self.create_loaded_history_partitions()
+            self.db.commit()
+        with self.metrics.phase('cluster_search_table'):
+            self.cluster_search_table()
+        with self.metrics.phase('analyze_tables'):
+            self.analyze_tables()
+        with self.metrics.phase('prewarm_relations'):
+            self.prewarm_relations()
+    
+    def cluster_search_table(self):
+        """Rewrite search_table in SEARCH_LOCALITY_INDEX order."""
+        name, table, definition = SEARCH_LOCALITY_INDEX
+        cursor = self.db.execute_query(
+            "SELECT relkind, current_setting('server_version_num')::int AS version FROM pg_class WHERE oid = %s::regclass",
+            (table,)
+        )
+        row = cursor.fetchone()
+        self.db.commit()
+        if row['relkind'] == 'p' and row['version'] < 150000:
+            print("⚠️  CLUSTER on a partitioned search_table needs PostgreSQL 15, keeping the load order")
+            return
+        
+        print(f"📦 Clustering {table} by province, city and price...")
+        started = time.perf_counter()
+        # CLUSTER of a partitioned table cannot run inside a transaction block
+        self.db.set_autocommit(True)
+        try:
+            self.db.execute_query(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}")
+            self.db.execute_query(f"CLUSTER {table} USING {name}")
+        finally:
+            self.db.set_autocommit(False)
+        print(f"   Clustered in {time.perf_counter() - started:.2f}s")
+    
+    def analyze_tables(self):
+        """Create EXTENDED_STATISTICS, then VACUUM (ANALYZE) every loaded table.
+        
+        VACUUM also sets hint bits and the visibility map, so the first reads do not
+        dirty pages and index-only scans are possible straight away.
+        """
+        print(f"📈 Creating {len(EXTENDED_STATISTICS)} extended statistics and analyzing {len(SNAPSHOT_TABLES)} tables...")
+        started = time.perf_counter()
+        for name, table, kinds, columns in EXTENDED_STATISTICS:
+            self.db.execute_query(f"CREATE STATISTICS IF NOT EXISTS {name} ({kinds}) ON {columns} FROM {table}")
+        self.db.commit()
+        
+        # VACUUM cannot run inside a transaction block
+        self.db.set_autocommit(True)
+        try:
+            for table in SNAPSHOT_TABLES:
+                self.db.execute_query(f"VACUUM (ANALYZE) {table}")
+        finally:
+            self.db.set_autocommit(False)
+        print(f"   Vacuumed and analyzed in {time.perf_counter() - started:.2f}s")
+    
+    def prewarm_relations(self):
+        """Read the PREWARM_TABLES heaps and indexes into shared_buffers, in order, while they fit."""
+        cursor = self.db.execute_query("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_prewarm'")
+        if cursor.fetchone() is not None:
+            self.db.execute_query("CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+            has_prewarm = True
+        else:
+            print("⚠️  pg_prewarm extension is not available, reading tables sequentially instead (indexes stay cold)")
+            has_prewarm = False
+        
+        cursor = self.db.execute_query("SELECT pg_size_bytes(current_setting('shared_buffers')) AS bytes")
+        budget = cursor.fetchone()['bytes']
+        
+        print("🔥 Prewarming search and detail relations...")
+        started = time.perf_counter()
+        loaded = warmed = skipped = 0
+        for table in PREWARM_TABLES:
+            # Leaf partitions and their indexes hold the pages; indexes first, they are read on every lookup
+            cursor = self.db.execute_query("""
+                WITH leaves AS (
+                    SELECT %(table)s::regclass AS relid
+                    UNION SELECT relid FROM pg_partition_tree(%(table)s::regclass) WHERE isleaf
+                )
+                SELECT c.oid::regclass::text AS relation, c.relkind, pg_relation_size(c.oid) AS bytes
+                FROM pg_class c
+                WHERE (c.relkind = 'r' AND c.oid IN (SELECT relid FROM leaves))
+                   OR (c.relkind = 'i' AND c.oid IN (SELECT indexrelid FROM pg_index WHERE indrelid IN (SELECT relid FROM leaves)))
+                ORDER BY c.relkind = 'r', c.relname
+            """, {'table': table})
+            for row in cursor.fetchall():
+                if row['relkind'] == 'i' and not has_prewarm:
+                    continue
+                if loaded + row['bytes'] > budget:
+                    skipped += 1
+                    continue
+                if has_prewarm:
+                    self.db.execute_query("SELECT pg_prewarm(%s::regclass)", (row['relation'],))
+                else:
+                    # Warms the OS page cache; tables over a quarter of shared_buffers go through a small ring
+                    self.db.execute_query(f"SELECT count(*) FROM ONLY {row['relation']}")
+                loaded += row['bytes']
+                warmed += 1
+        self.db.commit()
+        
+        print(f"   Prewarmed {warmed} relations ({loaded / 2**20:.1f} of {budget / 2**20:.0f} MiB shared_buffers) "
+              f"in {time.perf_counter() - started:.2f}s")
+        if skipped:
+            print(f"   Skipped {skipped} relations that did not fit in shared_buffers")
+    
+    def update_search_vectors(self):
+        """Fill properties.search_vector in bulk, one committed UUID key range per statement.
+        
+        Ranges hold about chunk_size properties each, so no single transaction rewrites
+        the whole table, and `workers` connections share them out side by side.
+        The update leaves a dead version of every row, so properties is vacuumed
+        straight away rather than only in the optional optimize phase.
+        """
+        try:
+            started = time.perf_counter()
+            cursor = self.db.execute_query("SELECT COUNT(*) AS count FROM properties")
+            total = cursor.fetchone()['count']
+            self.db.commit()
             
-            heating_types = ['Forced Air', 'Radiant', 'Baseboard', 'Heat Pump', 'Electric', 'Gas', 'Oil']
-            cooling_types = ['Central Air', 'Window Units', 'None', 'Heat Pump']
-            parking_types = ['Garage', 'Driveway', 'Street', 'Underground', 'Surface Lot']
-            utilities = ['Electricity', 'Water', 'Heat', 'Internet', 'Cable']
-            
-            properties_data = []
-            property_features_data = []
-            property_images_data = []
-            
-            # Generate MLS numbers
-            mls_numbers_used = set()
-            
-            for i in range(count):
-                # Select random location
-                location = self.random_choice(locations)
-                city_id = location['city_id']
-                province_id = location['province_id']
-                province_code = location['province_code']
-                neighborhood_id = location['neighborhood_id'] if location['neighborhood_id'] else None
-                city_name = location['city_name']
-                
-                # Select property type and get configuration
-                property_type_id = self.random_choice(property_type_ids)
-                cursor = self.db.execute_query("SELECT name FROM property_types WHERE id = %s", (property_type_id,))
-                property_type_name = cursor.fetchone()['name']
-                
-                config = property_configs.get(property_type_name, property_configs['House'])
-                
-                # Generate property details
-                bedrooms = self.random_int(*config['bedrooms_range'])
-                bathrooms = round(self.random_float(*config['bathrooms_range']), 1)
-                half_bathrooms = self.random_int(0, 2) if bedrooms >= 2 else 0
-                total_area_sqft = self.random_int(*config['sqft_range'])
-                lot_size_sqft = None
-                
-                # Lot size only for houses, townhouses, duplexes, bungalows
-                if property_type_name in ['House', 'Townhouse', 'Duplex', 'Bungalow']:
-                    lot_size_sqft = self.random_int(total_area_sqft, total_area_sqft * 3)
-                
-                floors = self.random_int(1, 3) if property_type_name != 'Bungalow' else 1
-                
-                # Generate pricing based on listing type
-                listing_type_id = self.random_choice(listing_type_ids)
-                cursor = self.db.execute_query("SELECT name FROM listing_types WHERE id = %s", (listing_type_id,))
-                listing_type_name = cursor.fetchone()['name']
-                
-                base_price = self.random_float(*config['price_range'])
-                list_price = None
-                monthly_rent = None
-                price_per_sqft = None
-                
-                if listing_type_name == 'Sale':
-                    list_price = round(base_price, 2)
-                    price_per_sqft = round(list_price / total_area_sqft, 2)
-                elif listing_type_name in ['Rent', 'Lease']:
-                    monthly_rent = round(base_price / 200, 2)  # Rough conversion
-                    list_price = None
-                
-                # Maintenance fee for condos and some apartments
-                maintenance_fee = None
-                if property_type_name in ['Condo', 'Apartment'] and random.random() > 0.3:
-                    maintenance_fee = round(self.random_float(200, 800), 2)
-                
-                # Property taxes (roughly 1-2% of property value annually)
-                property_taxes_annual = None
-                if list_price:
-                    property_taxes_annual = round(list_price * self.random_float(0.01, 0.02), 2)
-                
-                # Status - mostly active, some pending/sold/rented
-                status_id = self.random_choice(status_ids)
-                if random.random() < 0.7:  # 70% active
-                    cursor = self.db.execute_query("SELECT id FROM property_status WHERE name = 'Active'")
-                    status_id = cursor.fetchone()['id']
-                
-                # Agent assignment (80% have agents)
-                agent_id = self.random_choice(agent_ids) if random.random() < 0.8 else None
-                
-                # Generate address
-                street_address = self.generate_street_address()
-                unit_number = None
-                if property_type_name in ['Condo', 'Apartment', 'Loft', 'Studio']:
-                    if random.random() > 0.5:
-                        unit_number = f"{self.random_int(100, 999)}{self.random_choice(['A', 'B', 'C', ''])}"
-                
-                postal_code = self.generate_postal_code(province_code)
-                
-                # Generate coordinates (roughly in Canada)
-                latitude = round(self.random_float(42.0, 70.0), 8)
-                longitude = round(self.random_float(-141.0, -52.0), 8)
-                
-                # Generate title and description
-                title = self.generate_property_title(property_type_name, city_name)
-                year_built = self.random_int(1950, 2023)
-                
-                property_data = {
-                    'bedrooms': bedrooms,
-                    'bathrooms': bathrooms,
-                    'property_type': property_type_name,
-                    'city': city_name,
-                    'total_area_sqft': total_area_sqft,
-                    'parking_spaces': self.random_int(0, 3) if property_type_name != 'Studio' else 0,
-                    'pet_friendly': random.random() > 0.4,
-                    'furnished': random.random() > 0.7
-                }
-                description = self.generate_property_description(property_data)
-                
-                # Generate dates
-                listed_date = (datetime.now() - timedelta(days=self.random_int(0, 365))).date()
-                available_date = None
-                sold_date = None
-                
-                if listing_type_name in ['Rent', 'Lease']:
-                    available_date = (datetime.now() + timedelta(days=self.random_int(0, 90))).date()
-                
-                # Generate MLS number (optional, 70% have one)
-                mls_number = None
-                if random.random() < 0.7:
-                    mls_base = f"{province_code}{self.random_int(100000, 999999)}"
-                    while mls_base in mls_numbers_used:
-                        mls_base = f"{province_code}{self.random_int(100000, 999999)}"
-                    mls_numbers_used.add(mls_base)
-                    mls_number = mls_base
-                
-                # Other details
-                heating_type = self.random_choice(heating_types)
-                cooling_type = self.random_choice(cooling_types)
-                parking_type = self.random_choice(parking_types) if property_data['parking_spaces'] > 0 else None
-                parking_spaces = property_data['parking_spaces']
-                
-                # Utilities included (for rentals)
-                utilities_included = None
-                if listing_type_name in ['Rent', 'Lease']:
-                    included = self.random_choices(utilities, self.random_int(0, 3))
-                    utilities_included = included if included else None
-                
-                # Insert property (using UUID default from database)
-                result = self.db.execute_query_returning("""
-                    INSERT INTO properties (
-                        mls_number, property_type_id, listing_type_id, status_id, agent_id,
-                        street_address, unit_number, neighborhood_id, city_id, province_id, postal_code,
-                        latitude, longitude, title, description, year_built,
-                        total_area_sqft, lot_size_sqft, bedrooms, bathrooms, half_bathrooms, floors,
-                        list_price, price_per_sqft, monthly_rent, maintenance_fee, property_taxes_annual,
-                        heating_type, cooling_type, utilities_included,
-                        parking_spaces, parking_type, pet_friendly, furnished,
-                        listed_date, available_date, sold_date
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                    ) RETURNING id
-                """, (
-                    mls_number, property_type_id, listing_type_id, status_id, agent_id,
-                    street_address, unit_number, neighborhood_id, city_id, province_id, postal_code,
-                    latitude, longitude, title, description, year_built,
-                    total_area_sqft, lot_size_sqft, bedrooms, bathrooms, half_bathrooms, floors,
-                    list_price, price_per_sqft, monthly_rent, maintenance_fee, property_taxes_annual,
-                    heating_type, cooling_type, utilities_included,
-                    parking_spaces, parking_type, property_data['pet_friendly'], property_data['furnished'],
-                    listed_date, available_date, sold_date
+            ranges = uuid_key_ranges(max(self.workers, math.ceil(total / self.chunk_size)))
+            print(f"   Computing search vectors for {total} properties in {len(ranges)} key ranges...")
+            # Each connection works through its share of the ranges, so a large table
+            # does not open a connection per range
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                rows = sum(executor.map(
+                    lambda share: execute_key_ranges(self.db.sibling(), SEARCH_VECTOR_UPDATE, share),
+                    deal_ranges(ranges, self.workers)
                 ))
-                
-                property_id = result['id']
-                
-                # Generate property features (3-8 features per property)
-                num_features = self.random_int(3, min(8, len(feature_ids)))
-                selected_features = self.random_choices(feature_ids, num_features)
-                for feature_id in selected_features:
-                    property_features_data.append((property_id, feature_id))
-                
-                # Generate property images (1-5 images, at least one primary)
-                num_images = self.random_int(1, 5)
-                image_types = ['exterior', 'interior', 'floor_plan', 'kitchen', 'bathroom', 'bedroom', 'living_room']
-                
-                for img_idx in range(num_images):
-                    is_primary = (img_idx == 0)
-                    image_type = self.random_choice(image_types) if not is_primary else 'exterior'
-                    # Use placeholder image service
-                    image_url = f"https://picsum.photos/800/600?random={i * 100 + img_idx}"
-                    caption = f"{property_type_name} - {image_type.replace('_', ' ').title()}"
-                    
-                    property_images_data.append((
-                        property_id, image_url, image_type, caption, img_idx, is_primary
-                    ))
-                
-                # Progress update
-                if (i + 1) % 100 == 0:
-                    print(f"   Generated {i + 1}/{count} properties...")
-            
-            # Insert property features in batches
-            if property_features_data:
-                print("   Inserting property features...")
-                for i in range(0, len(property_features_data), BATCH_SIZE):
-                    batch = property_features_data[i:i + BATCH_SIZE]
-                    self.db.execute_many(
-                        "INSERT INTO property_feature_mappings (property_id, feature_id) VALUES (%s, %s)",
-                        batch
-                    )
-            
-            # Insert property images in batches
-            if property_images_data:
-                print("   Inserting property images...")
-                for i in range(0, len(property_images_data), BATCH_SIZE):
-                    batch = property_images_data[i:i + BATCH_SIZE]
-                    self.db.execute_many(
-                        """INSERT INTO property_images 
-                           (property_id, image_url, image_type, caption, display_order, is_primary) 
-                           VALUES (%s, %s, %s, %s, %s, %s)""",
-                        batch
-                    )
+            print(f"   Search vectors computed for {rows} properties in {time.perf_counter() - started:.2f}s")
             
-            self.db.commit()
-            print(f"✅ Generated {count} properties successfully")
+            # VACUUM cannot run inside a transaction block
+            started = time.perf_counter()
+            self.db.set_autocommit(True)
+            try:
+                self.db.execute_query("VACUUM properties")
+            finally:
+                self.db.set_autocommit(False)
+            print(f"   Vacuumed properties in {time.perf_counter() - started:.2f}s")
             
-            # Populate search_table
-            print("   Populating search_table...")
+        except Exception as e:
+            print(f"❌ Error computing search vectors: {e}")
+            self.db.rollback()
+            raise
+    
+    def build_search_table(self):
+        """Fully rebuild search_table and its facet counts using the configured rebuild mode,
+        or partition by partition if it is partitioned."""
+        if self.partition_scheme() is not None:
+            self.rebuild_search_partitions(self.workers)
+        elif self.search_rebuild == 'shadow':
+            self.rebuild_search_table_shadow(self.workers)
+        else:
             self.populate_search_table()
-            print("✅ Search table populated successfully")
-            
+            return
+        
+        try:
+            self.rebuild_facet_counts()
+            self.db.commit()
         except Exception as e:
-            print(f"❌ Error generating properties: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"❌ Error rebuilding facet counts: {e}")
             self.db.rollback()
             raise
-
+    
+    def rebuild_facet_counts(self):
+        """Recount search_facet_counts from search_table and (re)install the triggers
+        that keep it current. Does not commit."""
+        self.db.execute_query("DELETE FROM search_facet_counts")
+        self.db.execute_query(
+            f"INSERT INTO search_facet_counts ({', '.join(FACET_COUNT_COLUMNS)})"
+            + FACET_COUNTS_SELECT.format(source='search_table')
+        )
+        self.install_facet_triggers()
+    
+    def install_facet_triggers(self):
+        """Create the statement-level triggers maintaining search_facet_counts. Does not commit."""
+        self.db.execute_query(FACET_COUNTS_FUNCTION)
+        for name, event, transition_tables in FACET_COUNTS_TRIGGERS:
+            self.db.execute_query(f"DROP TRIGGER IF EXISTS {name} ON search_table")
+            self.db.execute_query(
+                f"CREATE TRIGGER {name} AFTER {event} ON search_table REFERENCING {transition_tables} "
+                "FOR EACH STATEMENT EXECUTE FUNCTION maintain_search_facet_counts()"
+            )
+    
+    def skip_facet_triggers(self):
+        """Stop the facet triggers for the rest of this transaction, ahead of a bulk (re)load of search_table."""
+        self.db.execute_query("SELECT set_config('search_facet_counts.skip', 'on', true)")
+    
     def populate_search_table(self):
         """Populate search_table with denormalized property data."""
         try:
-            # First, clear existing data from search_table
+            # First, clear existing data from search_table; facets are recounted at the end
+            self.skip_facet_triggers()
             cursor = self.db.execute_query("DELETE FROM search_table")
             
             # Insert all properties with joined data into search_table
             # Aggregate property features into arrays
-            insert_query = """
-                INSERT INTO search_table (
-                    id, mls_number, street_address, unit_number, title, description, year_built,
-                    total_area_sqft, lot_size_sqft, bedrooms, bathrooms, half_bathrooms, floors,
-                    list_price, price_per_sqft, monthly_rent, maintenance_fee, property_taxes_annual,
-                    heating_type, cooling_type, utilities_included,
-                    parking_spaces, parking_type, pet_friendly, furnished,
-                    listed_date, available_date, sold_date, last_updated, created_at,
-                    latitude, longitude,
-                    province_code, province_name, province_country_code,
-                    city_name, city_population, city_latitude, city_longitude,
-                    neighborhood_name, neighborhood_average_income, neighborhood_walkability_score, neighborhood_safety_rating,
-                    property_type_name, property_type_description, property_type_category,
-                    listing_type_name, listing_type_description,
-                    property_status_name, property_status_description, property_status_is_available,
-                    agent_first_name, agent_last_name, agent_email, agent_phone, agent_license_number,
-                    agent_agency_name, agent_years_experience, agent_rating, agent_total_reviews,
-                    property_features_names, property_features_categories, property_features_descriptions
-                )
-                SELECT 
-                    p.id,
-                    p.mls_number,
-                    p.street_address,
-                    p.unit_number,
-                    p.title,
-                    p.description,
-                    p.year_built,
-                    p.total_area_sqft,
-                    p.lot_size_sqft,
-                    p.bedrooms,
-                    p.bathrooms,
-                    p.half_bathrooms,
-                    p.floors,
-                    p.list_price,
-                    p.price_per_sqft,
-                    p.monthly_rent,
-                    p.maintenance_fee,
-                    p.property_taxes_annual,
-                    p.heating_type,
-                    p.cooling_type,
-                    p.utilities_included,
-                    p.parking_spaces,
-                    p.parking_type,
-                    p.pet_friendly,
-                    p.furnished,
-                    p.listed_date,
-                    p.available_date,
-                    p.sold_date,
-                    p.last_updated,
-                    p.created_at,
-                    p.latitude,
-                    p.longitude,
-                    prov.code AS province_code,
-                    prov.name AS province_name,
-                    prov.country_code AS province_country_code,
-                    c.name AS city_name,
-                    c.population AS city_population,
-                    c.latitude AS city_latitude,
-                    c.longitude AS city_longitude,
-                    n.name AS neighborhood_name,
-                    n.average_income AS neighborhood_average_income,
-                    n.walkability_score AS neighborhood_walkability_score,
-                    n.safety_rating AS neighborhood_safety_rating,
-                    pt.name AS property_type_name,
-                    pt.description AS property_type_description,
-                    pt.category AS property_type_category,
-                    lt.name AS listing_type_name,
-                    lt.description AS listing_type_description,
-                    ps.name AS property_status_name,
-                    ps.description AS property_status_description,
-                    ps.is_available AS property_status_is_available,
-                    a.first_name AS agent_first_name,
-                    a.last_name AS agent_last_name,
-                    a.email AS agent_email,
-                    a.phone AS agent_phone,
-                    a.license_number AS agent_license_number,
-                    a.agency_name AS agent_agency_name,
-                    a.years_experience AS agent_years_experience,
-                    a.rating AS agent_rating,
-                    a.total_reviews AS agent_total_reviews,
-                    COALESCE(
-                        ARRAY_AGG(DISTINCT pf.name) FILTER (WHERE pf.name IS NOT NULL),
-                        ARRAY[]::TEXT[]
-                    ) AS property_features_names,
-                    COALESCE(
-                        ARRAY_AGG(DISTINCT pf.category) FILTER (WHERE pf.category IS NOT NULL),
-                        ARRAY[]::TEXT[]
-                    ) AS property_features_categories,
-                    COALESCE(
-                        ARRAY_AGG(DISTINCT pf.description) FILTER (WHERE pf.description IS NOT NULL),
-                        ARRAY[]::TEXT[]
-                    ) AS property_features_descriptions
-                FROM properties p
-                LEFT JOIN provinces prov ON p.province_id = prov.id
-                LEFT JOIN cities c ON p.city_id = c.id
-                LEFT JOIN neighborhoods n ON p.neighborhood_id = n.id
-                LEFT JOIN property_types pt ON p.property_type_id = pt.id
-                LEFT JOIN listing_types lt ON p.listing_type_id = lt.id
-                LEFT JOIN property_status ps ON p.status_id = ps.id
-                LEFT JOIN agents a ON p.agent_id = a.id
-                LEFT JOIN property_feature_mappings pfm ON p.id = pfm.property_id
-                LEFT JOIN property_features pf ON pfm.feature_id = pf.id
-                GROUP BY 
-                    p.id, p.mls_number, p.street_address, p.unit_number, p.title, p.description, p.year_built,
-                    p.total_area_sqft, p.lot_size_sqft, p.bedrooms, p.bathrooms, p.half_bathrooms, p.floors,
-                    p.list_price, p.price_per_sqft, p.monthly_rent, p.maintenance_fee, p.property_taxes_annual,
-                    p.heating_type, p.cooling_type, p.utilities_included,
-                    p.parking_spaces, p.parking_type, p.pet_friendly, p.furnished,
-                    p.listed_date, p.available_date, p.sold_date, p.last_updated, p.created_at,
-                    p.latitude, p.longitude,
-                    prov.code, prov.name, prov.country_code,
-                    c.name, c.population, c.latitude, c.longitude,
-                    n.name, n.average_income, n.walkability_score, n.safety_rating,
-                    pt.name, pt.description, pt.category,
-                    lt.name, lt.description,
-                    ps.name, ps.description, ps.is_available,
-                    a.first_name, a.last_name, a.email, a.phone, a.license_number,
-                    a.agency_name, a.years_experience, a.rating, a.total_reviews
-            """
-            
-            cursor = self.db.execute_query(insert_query)
+            cursor = self.db.execute_query(search_table_insert_sql())
+            self.rebuild_facet_counts()
             self.db.commit()
             
         except Exception as e:
@@ -807,56 +3305,458 @@ class DataGenerator:
             traceback.print_exc()
             self.db.rollback()
             raise
+    
+    def rebuild_search_table_shadow(self, workers: int):
+        """Rebuild search_table into an UNLOGGED shadow copy in parallel, then swap it in atomically.
+        
+        Readers keep using the live table, which never accumulates dead tuples, until
+        a single short rename transaction replaces it with the finished copy.
+        """
+        print(f"🔁 Rebuilding search_table into {SEARCH_SHADOW_TABLE} with {workers} connection(s)...")
+        
+        try:
+            cursor = self.db.execute_query(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = 'search_table' AND indexname <> 'search_table_pkey'"
+            )
+            indexes = [(row['indexname'], row['indexdef']) for row in cursor.fetchall()]
+            
+            self.db.execute_query(f"DROP TABLE IF EXISTS {SEARCH_SHADOW_TABLE}")
+            self.db.execute_query(f"CREATE UNLOGGED TABLE {SEARCH_SHADOW_TABLE} (LIKE search_table INCLUDING DEFAULTS)")
+            self.db.commit()
+            
+            # Each connection fills one UUID range of properties.id
+            started = time.perf_counter()
+            ranges = uuid_key_ranges(workers)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                rows = sum(executor.map(
+                    lambda share: fill_search_shadow_ranges(self.db.sibling(), share),
+                    deal_ranges(ranges, workers)
+                ))
+            print(f"   Filled {rows} rows in {time.perf_counter() - started:.2f}s")
+            
+            # Make the copy durable, then constrain, index and analyze it
+            started = time.perf_counter()
+            self.db.execute_query(f"ALTER TABLE {SEARCH_SHADOW_TABLE} SET LOGGED")
+            self.db.execute_query(f"ALTER TABLE {SEARCH_SHADOW_TABLE} ADD CONSTRAINT {SEARCH_SHADOW_TABLE}_pkey PRIMARY KEY (id)")
+            self.db.execute_query(
+                f"ALTER TABLE {SEARCH_SHADOW_TABLE} ADD CONSTRAINT {SEARCH_SHADOW_TABLE}_id_fkey "
+                "FOREIGN KEY (id) REFERENCES properties(id) ON DELETE CASCADE"
+            )
+            for name, definition in indexes:
+                shadow_definition = re.sub(
+                    r'INDEX (\S+) ON (\S*?)search_table ',
+                    lambda match: f"INDEX {name[:55]}_shadow ON {match.group(2)}{SEARCH_SHADOW_TABLE} ",
+                    definition, count=1
+                )
+                self.db.execute_query(shadow_definition)
+            self.db.execute_query(f"ANALYZE {SEARCH_SHADOW_TABLE}")
+            self.db.commit()
+            print(f"   Made durable, indexed and analyzed in {time.perf_counter() - started:.2f}s")
+            
+            self.swap_search_shadow([name for name, _ in indexes])
+            print("✅ search_table swapped in")
+            
+        except Exception as e:
+            print(f"❌ Error rebuilding search_table: {e}")
+            self.db.rollback()
+            raise
+    
+    def swap_search_shadow(self, index_names: List[str], attempts: int = 5):
+        """Replace search_table with the shadow copy in one short transaction."""
+        for attempt in range(1, attempts + 1):
+            try:
+                # Give up quickly rather than queue every reader behind our lock request
+                self.db.execute_query("SET LOCAL lock_timeout = '2s'")
+                self.db.execute_query("DROP TABLE search_table")
+                self.db.execute_query(f"ALTER TABLE {SEARCH_SHADOW_TABLE} RENAME TO search_table")
+                self.db.execute_query(f"ALTER INDEX {SEARCH_SHADOW_TABLE}_pkey RENAME TO search_table_pkey")
+                self.db.execute_query(f"ALTER TABLE search_table RENAME CONSTRAINT {SEARCH_SHADOW_TABLE}_id_fkey TO search_table_id_fkey")
+                for name in index_names:
+                    self.db.execute_query(f"ALTER INDEX {name[:55]}_shadow RENAME TO {name}")
+                self.db.commit()
+                return
+            except Exception as e:
+                if error_sqlstate(e) != LOCK_NOT_AVAILABLE:
+                    raise
+                self.db.rollback()
+                print(f"   search_table is busy, retrying swap ({attempt}/{attempts})...")
+                time.sleep(attempt)
+        
+        raise RuntimeError("Could not acquire the lock needed to swap in the rebuilt search_table")
+    
+    def refresh_search_table_rows(self, property_ids: List[str], partition_key: Optional[str] = None) -> Tuple[int, int]:
+        """Upsert search_table rows for the given properties and drop rows whose property is gone.
+        
+        With a partitioned search_table the upsert matches on (id, partition_key), so a
+        property whose key changed also leaves a stale row in its old partition to drop.
+        """
+        self.db.execute_query(SEARCH_VECTOR_UPDATE.format(where="WHERE p.id = ANY(%s::uuid[])"), (property_ids,))
+        
+        if partition_key is None:
+            cursor = self.db.execute_query(
+                search_table_insert_sql("WHERE p.id = ANY(%s::uuid[])", upsert=True),
+                (property_ids,)
+            )
+            upserted = cursor.rowcount
+            
+            cursor = self.db.execute_query("""
+                DELETE FROM search_table s
+                WHERE s.id = ANY(%s::uuid[])
+                  AND NOT EXISTS (SELECT 1 FROM properties p WHERE p.id = s.id)
+            """, (property_ids,))
+        else:
+            cursor = self.db.execute_query(
+                search_table_insert_sql("WHERE p.id = ANY(%s::uuid[])", upsert=True, conflict_columns=f"id, {partition_key}")
+                + f" RETURNING id, {partition_key} AS key",
+                (property_ids,)
+            )
+            current = cursor.fetchall()
+            upserted = len(current)
+            
+            cursor = self.db.execute_query(f"""
+                DELETE FROM search_table s
+                WHERE s.id = ANY(%s::uuid[])
+                  AND (s.id, s.{partition_key}) NOT IN (SELECT * FROM unnest(%s::uuid[], %s::text[]))
+            """, (property_ids, [str(row['id']) for row in current], [row['key'] for row in current]))
+        deleted = cursor.rowcount
+        
+        self.db.commit()
+        return upserted, deleted
+    
+    def iter_changed_property_ids(self, since: datetime) -> Iterator[List[str]]:
+        """Yield ids of properties changed after `since`, one key range of chunk_size ids at a time."""
+        last_id = None
+        
+        while True:
+            cursor = self.db.execute_query("""
+                SELECT id FROM (
+                    SELECT id FROM properties WHERE last_updated > %(since)s
+                    UNION
+                    SELECT property_id FROM property_feature_mappings WHERE created_at > %(since)s
+                ) changed
+                WHERE %(last_id)s::uuid IS NULL OR id > %(last_id)s::uuid
+                ORDER BY id
+                LIMIT %(limit)s
+            """, {'since': since, 'last_id': last_id, 'limit': self.chunk_size})
+            ids = [str(row['id']) for row in cursor.fetchall()]
+            
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+    
+    def refresh_search_table(self, property_ids: Optional[List[str]] = None, since: Optional[datetime] = None):
+        """Incrementally refresh search_table for a set of changed property ids or a last_updated watermark.
+        
+        Only the affected rows are rebuilt, in key-ranged chunks that are each committed,
+        so the cost follows the size of the change rather than the size of the table.
+        Without ids or a watermark, the newest last_updated already in search_table is used.
+        """
+        try:
+            if property_ids is not None:
+                ordered = sorted(set(property_ids))
+                batches = (ordered[i:i + self.chunk_size] for i in range(0, len(ordered), self.chunk_size))
+                print(f"🔄 Refreshing search_table for {len(ordered)} changed properties...")
+            else:
+                if since is None:
+                    cursor = self.db.execute_query("SELECT MAX(last_updated) AS watermark FROM search_table")
+                    since = cursor.fetchone()['watermark'] or datetime.min
+                batches = self.iter_changed_property_ids(since)
+                print(f"🔄 Refreshing search_table for properties changed after {since}...")
+            
+            partition_key = self.partition_key('search_table')
+            upserted = deleted = 0
+            for batch in batches:
+                batch_upserted, batch_deleted = self.refresh_search_table_rows(batch, partition_key)
+                upserted += batch_upserted
+                deleted += batch_deleted
+                print(f"   Refreshed key range {batch[0]} .. {batch[-1]} ({len(batch)} ids)")
+            
+            print(f"✅ search_table refreshed: {upserted} rows upserted, {deleted} rows removed")
+            
+        except Exception as e:
+            print(f"❌ Error refreshing search_table: {e}")
+            self.db.rollback()
+            raise
+
+def execute_key_ranges(db: DatabaseConnection, sql: str, ranges: List[Tuple[Optional[str], Optional[str]]]) -> int:
+    """Worker entry point: over one connection, run `sql` for each UUID range of p.id, committing per range."""
+    if not db.connect():
+        raise RuntimeError(f"Could not connect to database for {len(ranges)} key ranges")
+    
+    try:
+        rows = 0
+        for low, high in ranges:
+            where, params = key_range_where('p.id', low, high)
+            cursor = db.execute_query(sql.format(where=where), params)
+            db.commit()
+            rows += cursor.rowcount
+        return rows
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def fill_search_shadow_ranges(db: DatabaseConnection, ranges: List[Tuple[Optional[str], Optional[str]]]) -> int:
+    """Worker entry point: fill the search_table shadow copy for some UUID ranges of properties."""
+    return execute_key_ranges(db, search_table_insert_sql('{where}', table=SEARCH_SHADOW_TABLE), ranges)
+
+def deal_ranges(ranges: List[Any], workers: int) -> List[List[Any]]:
+    """Split `ranges` round-robin into at most `workers` non-empty shares, one per connection."""
+    return [ranges[i::workers] for i in range(min(workers, len(ranges)))]
+
+def fill_search_partition(db: DatabaseConnection, partition: str, where: str, params: tuple) -> int:
+    """Worker entry point: empty one search_table partition and refill it in a single transaction."""
+    if not db.connect():
+        raise RuntimeError(f"Could not connect to database for partition {partition}")
+    
+    try:
+        db.execute_query(f"TRUNCATE {partition}")
+        cursor = db.execute_query(search_table_insert_sql(where, table=partition), params)
+        db.commit()
+        return cursor.rowcount
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def find_unfinished_run(db: DatabaseConnection) -> Optional[Dict[str, Any]]:
+    """The most recent generation run that never completed, or None."""
+    cursor = db.execute_query("SELECT to_regclass('generation_runs') IS NOT NULL AS tracked")
+    if not cursor.fetchone()['tracked']:
+        db.commit()
+        return None
+    cursor = db.execute_query(
+        "SELECT id, settings, reference_date FROM generation_runs WHERE completed_at IS NULL ORDER BY id DESC LIMIT 1"
+    )
+    run = cursor.fetchone()
+    db.commit()
+    return dict(run) if run else None
+
+def generate_property_shard(sink_spec: Dict[str, Any], settings: Dict[str, Any], lookups: Dict[str, Any],
+                            reference_date: date, total_count: int, start: int, end: int,
+                            completed: List[int]) -> Tuple[Dict[str, List[float]], Dict[str, Any]]:
+    """Worker entry point: generate one shard into its own sink and return its load stats and metric counters."""
+    sink = open_sink(sink_spec, part=start)
+    
+    try:
+        generator = DataGenerator(sink, **settings)
+        generator.generate_shard(lookups, reference_date, total_count, start, end, completed)
+        return generator.load_stats, generator.metrics.other.counters()
+    finally:
+        sink.close()
 
 def main():
     """Main execution function."""
     global TOTAL_PROPERTIES, AGENTS_COUNT
     
     parser = argparse.ArgumentParser(description='Generate real estate data for Seeksphere demo')
-    parser.add_argument('--database-url', required=True, help='PostgreSQL database URL')
+    parser.add_argument('--database-url', help='PostgreSQL database URL (required unless writing to a file or null sink)')
     parser.add_argument('--force', action='store_true', help='Force regeneration even if data exists')
+    parser.add_argument('--resume', action='store_true', help="Finish the most recent interrupted run, skipping the steps and property chunks it committed; its seed, counts, chunk size and partitioning are reused")
     parser.add_argument('--properties', type=int, default=TOTAL_PROPERTIES, help=f'Number of properties to generate (default: {TOTAL_PROPERTIES})')
     parser.add_argument('--agents', type=int, default=AGENTS_COUNT, help=f'Number of agents to generate (default: {AGENTS_COUNT})')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help=f'Properties generated, written and committed per chunk (default: {CHUNK_SIZE})')
+    parser.add_argument('--workers', type=int, default=1, help='Processes generating property shards in parallel (default: 1)')
+    parser.add_argument('--seed', type=int, default=42, help='Base random seed; output is identical for any --workers (default: 42)')
+    parser.add_argument('--load-method', choices=LOAD_METHODS, default='copy', help='How rows are written: COPY streaming or batched INSERTs (default: copy)')
+    parser.add_argument('--copy-format', choices=COPY_FORMATS, default='text', help='COPY wire format for --load-method=copy and the copy-files sink (default: text)')
+    parser.add_argument('--db-backend', choices=DB_BACKENDS, default='psycopg2', help='Database driver: psycopg2, or psycopg 3 with a connection pool, pipelined batches and prepared statements (default: psycopg2)')
+    parser.add_argument('--pool-size', type=int, help='Connections per process in the psycopg3 pool (default: --workers + 1)')
+    parser.add_argument('--sink', choices=SINK_TYPES, default='postgres', help='Where generated rows go: the database, COPY files, Parquet or CSV files, or nowhere (default: postgres)')
+    parser.add_argument('--output-dir', help='Directory written by the copy-files, parquet and csv sinks')
+    parser.add_argument('--load-copy-files', metavar='DIR', help='Bulk-load a directory written by --sink copy-files instead of generating data')
+    parser.add_argument('--metrics-json', help='Write per-phase timings, row counts, DB call latency histograms and peak memory to this file')
+    parser.add_argument('--profile', metavar='DIR', help='Run each phase under cProfile and write DIR/<phase>.prof')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Seconds between progress lines while generating properties (default: 5)')
+    parser.add_argument('--snapshot-dir', help='Cache generated datasets here, keyed by seed, counts, generator and schema.sql, and restore on a hit')
+    parser.add_argument('--fast-load', action='store_true', help='Load into UNLOGGED tables without foreign keys or the feature mapping unique constraint and with synchronous_commit off, then make the tables durable and re-add the constraints in bulk')
+    parser.add_argument('--skip-indexes', action='store_true', help='Skip the post-load index build phase')
+    parser.add_argument('--skip-optimize', action='store_true', help='Skip clustering search_table, extended statistics, VACUUM ANALYZE and prewarming after the load')
+    parser.add_argument('--index-concurrently', action='store_true', help='Build indexes with CREATE INDEX CONCURRENTLY')
+    parser.add_argument('--maintenance-workers', type=int, default=4, help='max_parallel_maintenance_workers for index builds (default: 4)')
+    parser.add_argument('--maintenance-work-mem', default='256MB', help='maintenance_work_mem for index builds (default: 256MB)')
+    parser.add_argument('--search-rebuild', choices=SEARCH_REBUILD_MODES, default='in-place', help='Full search_table rebuild strategy: delete and reinsert, or fill a shadow table with --workers connections and swap it in (default: in-place)')
+    parser.add_argument('--partition-by', choices=list(PARTITION_SCHEMES), help='Recreate the empty properties and search_table as LIST-partitioned tables by province or listing type before loading')
+    parser.add_argument('--rebuild-search-table', action='store_true', help='Fully rebuild search_table with --search-rebuild instead of generating data')
+    parser.add_argument('--optimize', action='store_true', help='Cluster search_table, create extended statistics, VACUUM ANALYZE and prewarm instead of generating data')
+    parser.add_argument('--refresh-search-table', action='store_true', help='Incrementally refresh search_table instead of generating data')
+    parser.add_argument('--changed-ids', help='Comma-separated property ids to refresh, or @file with one id per line')
+    parser.add_argument('--since', type=datetime.fromisoformat, help='Refresh properties updated after this ISO timestamp (default: newest last_updated in search_table)')
     
     args = parser.parse_args()
     
-    # Update global configuration
-    TOTAL_PROPERTIES = args.properties
-    AGENTS_COUNT = args.agents
+    if args.sink in FILE_SINK_TYPES and not args.output_dir:
+        parser.error(f"--output-dir is required for --sink {args.sink}")
+    if args.sink != 'postgres' and (args.rebuild_search_table or args.refresh_search_table or args.optimize or args.load_copy_files
+                                    or args.snapshot_dir or args.partition_by or args.resume or args.fast_load):
+        parser.error("search_table maintenance, --load-copy-files, --snapshot-dir, --partition-by, --resume and --fast-load require --sink postgres")
+    if args.resume and (args.load_copy_files or args.rebuild_search_table or args.refresh_search_table or args.optimize):
+        parser.error("--resume continues a generation run; it cannot be combined with --load-copy-files or search_table maintenance")
+    if args.sink == 'postgres' and not args.database_url:
+        parser.error("--database-url is required for --sink postgres")
     
     print("🚀 Starting Python data generation script...")
-    print(f"🎯 Target: {TOTAL_PROPERTIES} properties, {AGENTS_COUNT} agents")
     
-    # Initialize database connection
-    db = DatabaseConnection(args.database_url)
+    metrics = Metrics(profile_dir=args.profile)
     
-    if not db.connect():
-        print("❌ Could not connect to database")
-        sys.exit(1)
+    # Initialize the output sink, connecting to the database only when writing to it
+    db = None
+    run = None
+    if args.sink == 'postgres':
+        db = create_connection(args.database_url, args.db_backend, args.pool_size or args.workers + 1)
+        db.metrics = metrics
+        
+        if not db.connect():
+            print("❌ Could not connect to database")
+            sys.exit(1)
+        
+        if args.resume:
+            run = find_unfinished_run(db)
+            if run is None:
+                print("❌ No interrupted generation run to resume")
+                db.close()
+                sys.exit(1)
+            # The rows depend on these settings, so the interrupted run's values win
+            for name in RUN_SETTINGS:
+                if name in run['settings']:
+                    setattr(args, name, run['settings'][name])
+            print(f"⏩ Resuming generation run {run['id']} from {run['reference_date']} "
+                  f"(seed {args.seed}, chunk size {args.chunk_size})")
+        
+        sink = PostgresSink(db, load_method=args.load_method, copy_format=args.copy_format, batch_size=args.chunk_size)
+    else:
+        sink = open_sink({'type': args.sink, 'directory': args.output_dir, 'copy_format': args.copy_format})
+        print(f"📁 Writing to the {sink.describe()} sink{' in ' + args.output_dir if args.output_dir else ''}")
+    
+    # Update global configuration
+    TOTAL_PROPERTIES = args.properties
+    AGENTS_COUNT = args.agents
+    print(f"🎯 Target: {TOTAL_PROPERTIES} properties, {AGENTS_COUNT} agents")
     
     try:
         # Initialize data generator
-        generator = DataGenerator(db)
+        generator = DataGenerator(sink, seed=args.seed, chunk_size=args.chunk_size, workers=args.workers,
+                                  search_rebuild=args.search_rebuild, metrics=metrics,
+                                  progress_interval=args.progress_interval)
+        
+        if args.rebuild_search_table:
+            with metrics.phase('build_search_table'):
+                generator.build_search_table()
+            # The rebuilt table is in key-range order and a shadow swap drops its statistics
+            if not args.skip_optimize:
+                generator.optimize()
+            return
+        
+        if args.optimize:
+            generator.optimize()
+            return
+        
+        if args.refresh_search_table:
+            changed_ids = None
+            if args.changed_ids:
+                if args.changed_ids.startswith('@'):
+                    with open(args.changed_ids[1:]) as f:
+                        changed_ids = [line.strip() for line in f if line.strip()]
+                else:
+                    changed_ids = [value.strip() for value in args.changed_ids.split(',') if value.strip()]
+            with metrics.phase('refresh_search_table'):
+                generator.refresh_search_table(property_ids=changed_ids, since=args.since)
+            return
         
         # Check if data already exists
-        if not args.force and generator.check_existing_data():
+        if db is not None and not args.force and not args.resume and generator.check_existing_data():
             print("\n⚠️  Data already exists in the database!")
             print("   Use --force flag to regenerate data (this will clear existing data)")
             print("   Or delete existing data manually before running the script")
+            if find_unfinished_run(db):
+                print("   Or use --resume to finish the interrupted generation run")
             return
         
         if args.force:
             print("\n🗑️  Force flag detected - will regenerate all data")
             print("   Note: Tables will be dropped and recreated by schema.sql")
         
-        print("\n=== Phase 1: Inserting lookup data ===")
-        generator.insert_lookup_data()
+        # The interrupted run already partitioned the tables it loaded into
+        if args.partition_by and not args.resume:
+            with metrics.phase('partition_tables'):
+                generator.partition_tables(args.partition_by)
+        
+        snapshot_path = key_settings = None
+        if args.snapshot_dir:
+            cursor = db.execute_query("SHOW server_version_num")
+            key_settings = {
+                'seed': args.seed,
+                'properties': TOTAL_PROPERTIES,
+                'agents': AGENTS_COUNT,
+                'chunk_size': args.chunk_size,
+                'server_version_num': cursor.fetchone()['server_version_num'],
+                # Listing, sold and history dates count back from the day of generation,
+                # so a snapshot ages out when the month turns
+                'reference_month': f"{date.today():%Y-%m}"
+            }
+            snapshot_path = os.path.join(args.snapshot_dir, snapshot_key(key_settings))
+            db.commit()
+        
+        if run is not None:
+            generator.resume_run(run)
+        
+        # A resumed run may have finished its fast load already
+        if args.fast_load and 'fast_load' not in generator.completed_steps:
+            with metrics.phase('begin_fast_load'):
+                generator.begin_fast_load()
         
-        print("\n=== Phase 2: Generating agents ===")
-        generator.generate_agents()
+        if snapshot_path and run is None and os.path.exists(os.path.join(snapshot_path, 'manifest.json')):
+            print(f"\n=== Restoring cached snapshot {os.path.basename(snapshot_path)} ===")
+            with metrics.phase('restore_snapshot'):
+                generator.restore_snapshot(snapshot_path)
+        elif args.load_copy_files:
+            print("\n=== Loading COPY files ===")
+            with metrics.phase('load_copy_files'):
+                generator.load_copy_files(args.load_copy_files)
+        else:
+            if run is None and db is not None:
+                generator.start_run({name: getattr(args, name) for name in RUN_SETTINGS})
+            
+            print("\n=== Phase 1: Inserting lookup data ===")
+            with metrics.phase('insert_lookup_data'):
+                generator.insert_lookup_data()
+            
+            print("\n=== Phase 2: Generating agents ===")
+            with metrics.phase('generate_agents'):
+                generator.generate_agents()
+            
+            print("\n=== Phase 3: Generating properties ===")
+            with metrics.phase('generate_properties'):
+                generator.generate_properties(TOTAL_PROPERTIES)
+            
+            if snapshot_path:
+                with metrics.phase('save_snapshot'):
+                    generator.save_snapshot(snapshot_path, key_settings)
         
-        print("\n=== Phase 3: Generating properties ===")
-        generator.generate_properties(TOTAL_PROPERTIES)
+        if generator.fast_load:
+            with metrics.phase('finish_fast_load'):
+                generator.finish_fast_load()
+        elif db is not None:
+            # Restores whatever an interrupted --fast-load run left deferred
+            generator.finish_fast_load()
+        
+        if db is not None and not args.skip_indexes:
+            print("\n=== Phase 4: Building indexes ===")
+            with metrics.phase('build_indexes'):
+                generator.build_indexes(concurrently=args.index_concurrently,
+                                        maintenance_workers=args.maintenance_workers,
+                                        maintenance_work_mem=args.maintenance_work_mem)
+        
+        if db is not None and not args.skip_optimize:
+            print("\n=== Phase 5: Optimizing for the first queries ===")
+            generator.optimize()
+        
+        if db is not None:
+            generator.check_partition_pruning()
+            generator.finish_run()
         
         print("\n✅ Data generation completed successfully!")
         
@@ -864,7 +3764,13 @@ def main():
         print(f"❌ Error during data generation: {e}")
         sys.exit(1)
     finally:
-        db.close()
+        metrics.print_summary()
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+            print(f"📊 Metrics written to {args.metrics_json}")
+        sink.close()
+        if db is not None:
+            db.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped columnar snapshot of search_table, with a vectorized query engine.
+
+`export` writes search_table to a directory of NumPy .npy files: numbers, dates,
+timestamps and feature masks as fixed-width arrays (NaN/NaT for NULL), ids as
+16-byte rows, and text and text[] columns dictionary-encoded as int32 codes plus a
+JSON dictionary. The rows are read in one REPEATABLE READ transaction, so the
+snapshot is consistent.
+
+SearchSnapshot opens the files memory-mapped and answers the filter route's page
+and count queries in-process: each condition becomes a boolean mask (ILIKE and
+equality on text columns are evaluated once per dictionary entry, not per row),
+and the page is the top-k by created_at of the matching rows.
+
+`benchmark` replays the filter-route requests of search_workload.py against both
+the snapshot and PostgreSQL, checks that counts and pages agree, and reports the
+latency of each side per query shape.
+"""
+
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import argparse
+
+import numpy as np
+
+import generate_data as gd
+import search_workload as sw
+
+# Exported columns and their storage kind: the columns the filter route filters,
+# sorts and returns, plus the feature names
+SNAPSHOT_COLUMNS = [
+    ('id', 'uuid'), ('mls_number', 'text'), ('title', 'text'), ('street_address', 'text'), ('unit_number', 'text'),
+    ('latitude', 'number'), ('longitude', 'number'), ('bedrooms', 'number'), ('bathrooms', 'number'),
+    ('total_area_sqft', 'number'), ('list_price', 'number'), ('monthly_rent', 'number'), ('listed_date', 'date'),
+    ('created_at', 'timestamp'), ('property_type_name', 'text'), ('property_type_category', 'text'),
+    ('listing_type_name', 'text'), ('property_status_name', 'text'), ('property_status_is_available', 'bool'),
+    ('city_name', 'text'), ('province_name', 'text'), ('province_code', 'text'), ('neighborhood_name', 'text'),
+    ('agent_first_name', 'text'), ('agent_last_name', 'text'), ('agent_phone', 'text'), ('agent_email', 'text'),
+    ('property_features_names', 'text[]'), ('property_features_mask', 'bits')
+]
+
+# Fixed-width storage of the non-dictionary kinds; NULL is NaN, NaT or -1
+KIND_DTYPES = {
+    'number': np.float64,
+    'date': 'datetime64[D]',
+    'timestamp': 'datetime64[us]',
+    'bool': np.int8,
+    'bits': np.int64
+}
+NULL_CODE = -1
+EXPORT_BATCH_SIZE = 50000
+
+# Query shapes of the benchmark: the filter-route shapes of the search workload
+BENCHMARK_SHAPES = [(name, filters) for name, filters, _ in sw.WORKLOAD_SHAPES if filters != ['radius']]
+
+class ColumnWriter:
+    """Fill one column's .npy files, batch by batch, for a known number of rows."""
+
+    def __init__(self, directory: str, name: str, kind: str, rows: int, values: int):
+        self.directory = directory
+        self.name = name
+        self.kind = kind
+        self.position = 0
+        self.value_position = 0
+
+        if kind == 'uuid':
+            self.array = self.open(name, np.uint8, (rows, 16))
+        elif kind in KIND_DTYPES:
+            self.array = self.open(name, KIND_DTYPES[kind], (rows,))
+        else:
+            self.codes: Dict[str, int] = {}
+            if kind == 'text':
+                self.array = self.open(f"{name}.codes", np.int32, (rows,))
+            else:
+                # text[]: row i holds values[offsets[i]:offsets[i + 1]]
+                self.offsets = self.open(f"{name}.offsets", np.int64, (rows + 1,))
+                self.offsets[0] = 0
+                self.array = self.open(f"{name}.codes", np.int32, (values,))
+
+    def open(self, name: str, dtype: Any, shape: Tuple[int, ...]) -> np.ndarray:
+        return np.lib.format.open_memmap(os.path.join(self.directory, f"{name}.npy"), mode='w+', dtype=dtype, shape=shape)
+
+    def code(self, value: str) -> int:
+        return self.codes.setdefault(value, len(self.codes))
+
+    def write(self, values: List[Any]):
+        end = self.position + len(values)
+
+        if self.kind == 'uuid':
+            self.array[self.position:end] = np.frombuffer(
+                b''.join(uuid.UUID(str(value)).bytes for value in values), dtype=np.uint8
+            ).reshape(-1, 16)
+        elif self.kind == 'number':
+            self.array[self.position:end] = [np.nan if value is None else float(value) for value in values]
+        elif self.kind in ('date', 'timestamp'):
+            self.array[self.position:end] = np.array(values, dtype=KIND_DTYPES[self.kind])
+        elif self.kind in ('bool', 'bits'):
+            self.array[self.position:end] = [NULL_CODE if value is None else int(value) for value in values]
+        elif self.kind == 'text':
+            self.array[self.position:end] = [NULL_CODE if value is None else self.code(value) for value in values]
+        else:
+            lengths = np.array([len(value or []) for value in values], dtype=np.int64)
+            self.offsets[self.position + 1:end + 1] = self.value_position + np.cumsum(lengths)
+            value_end = self.value_position + int(lengths.sum())
+            self.array[self.value_position:value_end] = [self.code(item) for value in values for item in (value or [])]
+            self.value_position = value_end
+
+        self.position = end
+
+    def close(self) -> Dict[str, Any]:
+        """Flush the arrays and return the column's manifest entry."""
+        self.array.flush()
+        if self.kind == 'text[]':
+            self.offsets.flush()
+        entry = {'kind': self.kind}
+        if self.kind in ('text', 'text[]'):
+            entry['dictionary'] = f"{self.name}.dict.json"
+            with open(os.path.join(self.directory, entry['dictionary']), 'w') as f:
+                json.dump(list(self.codes), f)
+        return entry
+
+def export_snapshot(db: gd.DatabaseConnection, directory: str, batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """Write search_table to `directory` as columnar .npy files and return the row count.
+
+    Files are written to a staging directory that replaces `directory` once complete.
+    """
+    staging = f"{directory}.partial-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    try:
+        # One snapshot of the table for the counts and every batch
+        db.commit()
+        db.execute_query("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor = db.execute_query("""
+            SELECT COUNT(*) AS row_count, COALESCE(SUM(cardinality(property_features_names)), 0) AS feature_count
+            FROM search_table
+        """)
+        counts = cursor.fetchone()
+        rows, features = int(counts['row_count']), int(counts['feature_count'])
+
+        writers = [ColumnWriter(staging, name, kind, rows, features) for name, kind in SNAPSHOT_COLUMNS]
+        column_list = ', '.join(name for name, _ in SNAPSHOT_COLUMNS)
+        last_id = None
+        while True:
+            cursor = db.execute_query(f"""
+                SELECT {column_list} FROM search_table
+                WHERE %(last_id)s::uuid IS NULL OR id > %(last_id)s::uuid
+                ORDER BY id
+                LIMIT %(limit)s
+            """, {'last_id': last_id, 'limit': batch_size})
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            for writer in writers:
+                writer.write([row[writer.name] for row in batch])
+            last_id = str(batch[-1]['id'])
+            print(f"   Exported {writers[0].position}/{rows} rows", file=sys.stderr)
+        db.commit()
+
+        manifest = {
+            'created_at': datetime.now().isoformat(),
+            'row_count': rows,
+            'columns': {writer.name: writer.close() for writer in writers}
+        }
+        with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.rename(staging, directory)
+        return rows
+    except Exception:
+        db.rollback()
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+def like_regex(pattern: str) -> 're.Pattern':
+    """Compile a SQL ILIKE pattern (% and _ wildcards, backslash escapes) to a regular expression."""
+    parts = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.IGNORECASE | re.DOTALL)
+
+class SearchSnapshot:
+    """A snapshot written by export_snapshot, memory-mapped and queried with NumPy."""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        self.row_count = self.manifest['row_count']
+        self.kinds = {name: entry['kind'] for name, entry in self.manifest['columns'].items()}
+        self.columns: Dict[str, np.ndarray] = {}
+        self.offsets: Dict[str, np.ndarray] = {}
+        self.dictionaries: Dict[str, np.ndarray] = {}
+        self.matches: Dict[Tuple[str, str, Any], np.ndarray] = {}
+
+        for name, entry in self.manifest['columns'].items():
+            path = os.path.join(directory, name)
+            if entry['kind'] in ('text', 'text[]'):
+                self.columns[name] = np.load(f"{path}.codes.npy", mmap_mode='r')
+                with open(os.path.join(directory, entry['dictionary'])) as f:
+                    self.dictionaries[name] = np.array(json.load(f), dtype=object)
+                if entry['kind'] == 'text[]':
+                    self.offsets[name] = np.load(f"{path}.offsets.npy", mmap_mode='r')
+            else:
+                self.columns[name] = np.load(f"{path}.npy", mmap_mode='r')
+
+    def matching_codes(self, column: str, operator: str, value: Any) -> np.ndarray:
+        """Dictionary codes of a text column satisfying a condition, evaluated once per distinct value."""
+        key = (column, operator, tuple(value) if isinstance(value, list) else value)
+        if key not in self.matches:
+            dictionary = self.dictionaries[column]
+            if operator == 'ilike':
+                regex = like_regex(value)
+                selected = [regex.fullmatch(entry) is not None for entry in dictionary]
+            elif operator in ('any', 'overlaps'):
+                selected = np.isin(dictionary, list(value))
+            elif operator == '=':
+                selected = dictionary == value
+            else:
+                raise ValueError(f"Unsupported operator {operator} on text column {column}")
+            self.matches[key] = np.flatnonzero(selected).astype(np.int32)
+        return self.matches[key]
+
+    def condition_mask(self, column: str, operator: str, value: Any) -> np.ndarray:
+        """Boolean mask of the rows satisfying one (column, operator, value) condition."""
+        kind = self.kinds[column]
+        data = self.columns[column]
+
+        if kind == 'text':
+            codes = self.matching_codes(column, operator, value)
+            if len(codes) == 1:
+                return data == codes[0]
+            return np.isin(data, codes)
+        if kind == 'text[]':
+            # Rows whose array holds any matching value: hits per row from the running
+            # total at each row's offsets, which also holds for empty arrays
+            hits = np.isin(data, self.matching_codes(column, operator, value))
+            offsets = self.offsets[column]
+            running = np.concatenate(([0], np.cumsum(hits)))
+            return running[offsets[1:]] - running[offsets[:-1]] > 0
+
+        if kind == 'bits':
+            if operator != 'all_bits':
+                raise ValueError(f"Unsupported operator {operator} on bits column {column}")
+            return data & value == value
+
+        if kind in ('date', 'timestamp'):
+            value = np.datetime64(value, 'D' if kind == 'date' else 'us')
+        else:
+            value = float(value)
+        if operator == '=':
+            return data == value
+        if operator == '>=':
+            return data >= value
+        if operator == '<=':
+            return data <= value
+        raise ValueError(f"Unsupported operator {operator} on {kind} column {column}")
+
+    def mask(self, conditions: List[Tuple[str, str, Any]]) -> np.ndarray:
+        """Rows satisfying every condition; NULLs never match, as in SQL."""
+        mask = np.ones(self.row_count, dtype=bool)
+        for condition in conditions:
+            mask &= self.condition_mask(*condition)
+        return mask
+
+    def top_k(self, rows: np.ndarray, order_by: str, k: int) -> np.ndarray:
+        """The k rows with the largest `order_by` values, largest first, ties in row order."""
+        keys = np.asarray(self.columns[order_by][rows])
+        if keys.dtype.kind == 'M':
+            # NULLs sort first in PostgreSQL's descending order
+            keys = np.where(np.isnat(keys), np.iinfo(np.int64).max, keys.view(np.int64))
+        if len(rows) > k:
+            # Keep only candidates at or above the k-th largest key before sorting
+            threshold = np.partition(keys, len(keys) - k)[len(keys) - k]
+            candidates = keys >= threshold
+            rows, keys = rows[candidates], keys[candidates]
+        return rows[np.lexsort((rows, -keys))][:k]
+
+    def row_numbers(self, ids: List[Any]) -> np.ndarray:
+        """Snapshot rows of the given ids; the export writes rows in id order, so this is a binary search."""
+        keys = self.columns['id'].view('S16').ravel()
+        return np.searchsorted(keys, np.array([uuid.UUID(str(value)).bytes for value in ids], dtype='S16'))
+
+    def decode(self, column: str, rows: np.ndarray) -> List[Any]:
+        """Python values of a column for the given rows."""
+        kind = self.kinds[column]
+        data = self.columns[column]
+
+        if kind == 'uuid':
+            return [str(uuid.UUID(bytes=bytes(row))) for row in np.asarray(data[rows])]
+        if kind == 'text':
+            codes = np.asarray(data[rows])
+            return [None if code == NULL_CODE else self.dictionaries[column][code] for code in codes.tolist()]
+        if kind == 'text[]':
+            offsets = self.offsets[column]
+            return [self.dictionaries[column][np.asarray(data[offsets[row]:offsets[row + 1]])].tolist() for row in rows.tolist()]
+        if kind == 'bool':
+            return [None if value == NULL_CODE else bool(value) for value in np.asarray(data[rows]).tolist()]
+        values = np.asarray(data[rows])
+        if kind == 'bits':
+            return values.tolist()
+        if kind == 'number':
+            return [None if np.isnan(value) else value for value in values.tolist()]
+        # NaT converts to None
+        return values.astype(object).tolist()
+
+    def search(self, conditions: List[Tuple[str, str, Any]], limit: int, offset: int = 0,
+               order_by: str = 'created_at', columns: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """The filter route's page (newest first) and total count for a set of conditions."""
+        rows = np.flatnonzero(self.mask(conditions))
+        page = self.top_k(rows, order_by, offset + limit)[offset:]
+        columns = columns or list(self.columns)
+        decoded = {column: self.decode(column, page) for column in columns}
+        return [dict(zip(columns, values)) for values in zip(*decoded.values())], len(rows)
+
+def percentiles_ms(seconds: List[float]) -> Dict[str, Optional[float]]:
+    return {f'p{p}_ms': round(float(np.percentile(seconds, p)) * 1000, 3) if seconds else None for p in sw.PERCENTILES}
+
+def run_benchmark(db: gd.DatabaseConnection, snapshot: SearchSnapshot, sample: sw.ValueSample,
+                  requests: int, seed: int) -> List[Dict[str, Any]]:
+    """Time every benchmark request on PostgreSQL and on the snapshot, checking the answers agree.
+
+    Pages are compared by the created_at of their rows, since rows with equal
+    created_at may come back in any order from PostgreSQL.
+    """
+    results = []
+    for shape_index, (shape, filters) in enumerate(BENCHMARK_SHAPES):
+        sql_times, snapshot_times, mismatches = [], [], 0
+
+        for request in range(requests):
+            rng = np.random.default_rng([seed, shape_index, request])
+            limit = int(rng.choice(sw.PAGE_LIMITS, p=sw.PAGE_LIMIT_WEIGHTS))
+            conditions = sw.build_conditions(filters, sample, rng)
+            offset = (sw.page_number(rng) - 1) * limit
+            page_sql, page_params, count_sql, count_params = sw.filter_request_sql(conditions, limit, offset)
+
+            began = time.perf_counter()
+            sql_page = db.execute_query(page_sql, page_params).fetchall()
+            sql_count = db.execute_query(count_sql, count_params).fetchone()['count']
+            sql_times.append(time.perf_counter() - began)
+
+            began = time.perf_counter()
+            page, count = snapshot.search(conditions, limit, offset)
+            snapshot_times.append(time.perf_counter() - began)
+
+            sql_created = snapshot.decode('created_at', snapshot.row_numbers([row['id'] for row in sql_page]))
+            if count != sql_count or [row['created_at'] for row in page] != sql_created:
+                mismatches += 1
+
+        row = {'shape': shape, 'requests': requests, 'mismatches': mismatches}
+        row.update({f'sql_{key}': value for key, value in percentiles_ms(sql_times).items()})
+        row.update({f'snapshot_{key}': value for key, value in percentiles_ms(snapshot_times).items()})
+        row['speedup_p50'] = round(row['sql_p50_ms'] / row['snapshot_p50_ms'], 1) if row['snapshot_p50_ms'] else None
+        results.append(row)
+        print(f"   {shape:24} SQL p50 {row['sql_p50_ms']:8.2f}ms  snapshot p50 {row['snapshot_p50_ms']:8.2f}ms  "
+              f"{row['speedup_p50'] or 0:6.1f}x" + (f"  ❌ {mismatches} mismatches" if mismatches else ''), file=sys.stderr)
+    return results
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Export search_table as a memory-mapped columnar snapshot and benchmark queries on it')
+    parser.add_argument('--database-url', required=True, help='PostgreSQL database URL holding generated data')
+    parser.add_argument('--db-backend', choices=gd.DB_BACKENDS, default='psycopg2', help='Database driver (default: psycopg2)')
+    parser.add_argument('--snapshot', required=True, help='Snapshot directory to write (export) or read (benchmark)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Write search_table to --snapshot')
+    export_parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE, help=f'Rows read per query (default: {EXPORT_BATCH_SIZE})')
+
+    benchmark_parser = subparsers.add_parser('benchmark', help='Compare filter-route latency on the snapshot and in PostgreSQL')
+    benchmark_parser.add_argument('--requests', type=int, default=200, help='Requests per query shape (default: 200)')
+    benchmark_parser.add_argument('--sample-size', type=int, default=5000, help='search_table rows sampled for filter values (default: 5000)')
+    benchmark_parser.add_argument('--seed', type=int, default=42, help='Random seed for the requests (default: 42)')
+    benchmark_parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+
+    args = parser.parse_args()
+
+    db = gd.create_connection(args.database_url, args.db_backend)
+    if not db.connect():
+        sys.exit(1)
+
+    try:
+        if args.command == 'export':
+            print(f"📤 Exporting search_table to {args.snapshot}...", file=sys.stderr)
+            started = time.perf_counter()
+            rows = export_snapshot(db, args.snapshot, args.batch_size)
+            print(f"✅ Exported {rows} rows in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+            return
+
+        snapshot = SearchSnapshot(args.snapshot)
+        sample = sw.ValueSample.load(db, args.sample_size)
+        db.commit()
+        db.set_autocommit(True)
+        print(f"🔎 Running {args.requests} requests for each of {len(BENCHMARK_SHAPES)} query shapes "
+              f"on PostgreSQL and on the {snapshot.row_count}-row snapshot...", file=sys.stderr)
+        results = run_benchmark(db, snapshot, sample, args.requests, args.seed)
+    finally:
+        db.close()
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'db_backend': args.db_backend,
+        'snapshot_rows': snapshot.row_count,
+        'snapshot_created_at': snapshot.manifest['created_at'],
+        'seed': args.seed,
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Load-test search_table with filter queries shaped like the property filter API.
+
+Queries are built from a random sample of the generated rows, so price, size and
+bedroom filters, city and type names and title search words follow the real value
+distributions. Every request runs the page query and the COUNT(*) query issued by
+src/app/api/properties/filter/route.ts, against the denormalized search_table.
+
+Requests are issued from --connections threads, each with its own connection. With
+--rate, start times follow a fixed schedule and latency is measured from the
+scheduled start, so a saturated database shows up as queueing delay instead of a
+lower request rate; without it every connection runs requests back to back.
+
+With --churn-rate, --churn-connections more connections apply listing mutations
+(price changes, status transitions, new listings, delistings; see
+churn_workload.py) on the same schedule model while the reads run, and the report
+adds their latencies, the time spent pushing rows into search_table, and the
+row writes, HOT update ratio and index growth of the tables they touched.
+"""
+
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import argparse
+
+import numpy as np
+
+import churn_workload
+import generate_data as gd
+
+# Query shapes: (name, filters, share of requests). The filters mirror the
+# conditions of the filter route; pagination applies to every shape.
+WORKLOAD_SHAPES = [
+    ('browse', [], 0.05),
+    ('text', ['text'], 0.15),
+    ('price', ['price'], 0.10),
+    ('price_bedrooms', ['price', 'bedrooms'], 0.15),
+    ('city_listing_type', ['city', 'listing_types'], 0.10),
+    ('province_property_type', ['province', 'property_types'], 0.10),
+    ('sqft_bathrooms_status', ['sqft', 'bathrooms', 'status'], 0.10),
+    ('amenities_price', ['amenities', 'price'], 0.05),
+    ('any_feature', ['features'], 0.05),
+    ('combined', ['text', 'price', 'sqft', 'bedrooms', 'bathrooms', 'listing_types', 'property_types', 'status', 'city'], 0.05),
+    ('radius', ['radius'], 0.10)
+]
+
+# "Homes within N km" searches, centered on a sampled listing
+RADIUS_KM_CHOICES = [1, 2, 5, 10]
+
+PAGE_LIMITS = [10, 20, 50]
+PAGE_LIMIT_WEIGHTS = [0.7, 0.2, 0.1]
+PERCENTILES = [50, 95, 99]
+
+SAMPLE_COLUMNS = [
+    'title', 'list_price', 'total_area_sqft', 'bedrooms', 'bathrooms', 'city_name', 'province_code',
+    'listing_type_name', 'property_type_name', 'property_status_name', 'latitude', 'longitude'
+]
+
+# The columns the filter route returns for each listing
+RESULT_COLUMNS = """
+    id, mls_number, title, street_address, unit_number, latitude, longitude, bedrooms, bathrooms,
+    total_area_sqft, list_price, monthly_rent, listed_date, property_type_name, property_type_category,
+    listing_type_name, property_status_name, property_status_is_available, city_name, province_name,
+    province_code, neighborhood_name, agent_first_name, agent_last_name, agent_phone, agent_email
+"""
+
+class ValueSample:
+    """Column values drawn from a random sample of search_table rows."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.values: Dict[str, List[Any]] = {
+            column: [row[column] for row in rows if row[column] is not None] for column in SAMPLE_COLUMNS
+        }
+        self.words = sorted({
+            word.lower() for title in self.values['title'] for word in title.split() if len(word) >= 4 and word.isalpha()
+        })
+        self.points = [(float(row['latitude']), float(row['longitude'])) for row in rows
+                       if row['latitude'] is not None and row['longitude'] is not None]
+        self.names = {column: sorted(set(self.values[column])) for column in
+                      ('listing_type_name', 'property_type_name', 'property_status_name')}
+
+    @classmethod
+    def load(cls, db: gd.DatabaseConnection, size: int) -> 'ValueSample':
+        cursor = db.execute_query(f"SELECT {', '.join(SAMPLE_COLUMNS)} FROM search_table ORDER BY random() LIMIT %s", (size,))
+        rows = cursor.fetchall()
+        if not rows:
+            raise RuntimeError("search_table is empty; generate data first")
+        return cls(rows)
+
+    def pick(self, rng: np.random.Generator, column: str) -> Any:
+        values = self.values[column]
+        return values[rng.integers(len(values))]
+
+    def pick_names(self, rng: np.random.Generator, column: str, most: int) -> List[str]:
+        names = self.names[column]
+        count = int(rng.integers(1, min(most, len(names)) + 1))
+        return [names[i] for i in rng.choice(len(names), count, replace=False)]
+
+def range_around(rng: np.random.Generator, value: float, step: int) -> Tuple[int, int]:
+    """A [low, high] filter range around a sampled value, rounded the way a UI slider would."""
+    low = int(float(value) * rng.uniform(0.5, 0.9)) // step * step
+    high = (int(float(value) * rng.uniform(1.1, 1.5)) // step + 1) * step
+    return low, high
+
+def build_conditions(filters: List[str], sample: ValueSample, rng: np.random.Generator) -> List[Tuple[str, str, Any]]:
+    """Draw the filter-route conditions of one request as (column, operator, value) triples.
+    
+    Operators are '=', '>=', '<=', 'ilike', 'any' (value is a list), 'overlaps'
+    (an array column holds any of the listed values) and 'all_bits' (every bit of
+    value set), so the same request can be rendered as SQL or
+    evaluated by another engine.
+    """
+    conditions = []
+
+    for name in filters:
+        if name == 'text':
+            conditions.append(('title', 'ilike', f"%{sample.words[rng.integers(len(sample.words))]}%"))
+        elif name in ('price', 'sqft'):
+            column, step = ('list_price', 10000) if name == 'price' else ('total_area_sqft', 100)
+            low, high = range_around(rng, sample.pick(rng, column), step)
+            conditions.extend([(column, '>=', low), (column, '<=', high)])
+        elif name in ('bedrooms', 'bathrooms'):
+            # Half of the requests use the "N+" form of the filter
+            value = sample.pick(rng, name)
+            conditions.append((name, '>=' if rng.random() < 0.5 else '=', value))
+        elif name in ('listing_types', 'property_types', 'status'):
+            column = {'listing_types': 'listing_type_name', 'property_types': 'property_type_name',
+                      'status': 'property_status_name'}[name]
+            conditions.append((column, 'any', sample.pick_names(rng, column, 2 if name == 'listing_types' else 3)))
+        elif name == 'city':
+            conditions.append(('city_name', '=', sample.pick(rng, 'city_name')))
+        elif name == 'province':
+            conditions.append(('province_code', '=', sample.pick(rng, 'province_code')))
+        elif name == 'amenities':
+            # "Must have" one or two features, e.g. pool and garage
+            features = rng.choice(len(gd.PROPERTY_FEATURES_DATA), int(rng.integers(1, 3)), replace=False)
+            names = [gd.PROPERTY_FEATURES_DATA[i]['name'] for i in features]
+            conditions.append(('property_features_mask', 'all_bits', gd.feature_mask(names)))
+        elif name == 'features':
+            # "Any of" one to three features by name, e.g. fireplace or hardwood floors
+            features = rng.choice(len(gd.PROPERTY_FEATURES_DATA), int(rng.integers(1, 4)), replace=False)
+            conditions.append(('property_features_names', 'overlaps', [gd.PROPERTY_FEATURES_DATA[i]['name'] for i in features]))
+
+    return conditions
+
+def conditions_sql(conditions: List[Tuple[str, str, Any]]) -> Tuple[str, tuple]:
+    """Render conditions from build_conditions as a WHERE clause and its parameters."""
+    clauses = []
+    for column, operator, _ in conditions:
+        if operator == 'ilike':
+            clauses.append(f"{column} ILIKE %s")
+        elif operator == 'any':
+            clauses.append(f"{column} = ANY(%s)")
+        elif operator == 'overlaps':
+            clauses.append(f"{column} && %s::text[]")
+        elif operator == 'all_bits':
+            clauses.append(f"%s::bigint & ~{column} = 0")
+        else:
+            clauses.append(f"{column} {operator} %s")
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    return where, tuple(value for _, _, value in conditions)
+
+def build_request(filters: List[str], sample: ValueSample, rng: np.random.Generator) -> Tuple[str, tuple, str, tuple]:
+    """Build the page and count queries, with parameters, for one request of a shape."""
+    limit = int(rng.choice(PAGE_LIMITS, p=PAGE_LIMIT_WEIGHTS))
+
+    if filters == ['radius']:
+        # Nearest listings first, through the grid_cell index; the count covers the whole circle
+        latitude, longitude = sample.points[rng.integers(len(sample.points))]
+        radius_km = float(rng.choice(RADIUS_KM_CHOICES))
+        page_sql, page_params = gd.radius_search_sql(latitude, longitude, radius_km, columns=RESULT_COLUMNS, limit=limit)
+        count_sql, count_params = gd.radius_search_sql(latitude, longitude, radius_km, columns='s.id')
+        return page_sql, page_params, f"SELECT COUNT(*) AS count FROM ({count_sql}) nearby_rows", count_params
+
+    conditions = build_conditions(filters, sample, rng)
+    return filter_request_sql(conditions, limit, (page_number(rng) - 1) * limit)
+
+def filter_request_sql(conditions: List[Tuple[str, str, Any]], limit: int, offset: int) -> Tuple[str, tuple, str, tuple]:
+    """The filter route's page and count queries over search_table, with parameters."""
+    where, params = conditions_sql(conditions)
+    page_sql = f"SELECT {RESULT_COLUMNS} FROM search_table {where} ORDER BY created_at DESC LIMIT %s OFFSET %s"
+    count_sql = f"SELECT COUNT(*) AS count FROM search_table {where}"
+    return page_sql, params + (limit, offset), count_sql, params
+
+def page_number(rng: np.random.Generator) -> int:
+    """Page a request asks for; most visitors stay on the first pages."""
+    return min(int(rng.geometric(0.6)), 20)
+
+class WorkloadRunner:
+    """Issue requests from several connections and record latencies per query shape."""
+
+    def __init__(self, connections: List[gd.DatabaseConnection], sample: ValueSample, seed: int,
+                 rate: Optional[float], duration: float):
+        self.connections = connections
+        self.sample = sample
+        self.seed = seed
+        self.rate = rate
+        self.duration = duration
+        self.tickets = itertools.count()
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {name: [] for name, _, _ in WORKLOAD_SHAPES}
+        self.service_times: Dict[str, List[float]] = {name: [] for name, _, _ in WORKLOAD_SHAPES}
+        self.errors: Dict[str, int] = {name: 0 for name, _, _ in WORKLOAD_SHAPES}
+        self.elapsed = 0.0
+
+    def run(self) -> 'WorkloadRunner':
+        self.started = time.perf_counter()
+        self.deadline = self.started + self.duration
+        threads = [threading.Thread(target=self.worker, args=(index, db)) for index, db in enumerate(self.connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def worker(self, index: int, db: gd.DatabaseConnection):
+        rng = np.random.default_rng([self.seed, index])
+        names = [name for name, _, _ in WORKLOAD_SHAPES]
+        shares = np.array([share for _, _, share in WORKLOAD_SHAPES])
+        shares = shares / shares.sum()
+        filters = {name: shape_filters for name, shape_filters, _ in WORKLOAD_SHAPES}
+
+        while True:
+            if self.rate:
+                scheduled = self.started + next(self.tickets) / self.rate
+                if scheduled >= self.deadline:
+                    return
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+                if scheduled >= self.deadline:
+                    return
+
+            shape = names[rng.choice(len(names), p=shares)]
+            page_sql, page_params, count_sql, count_params = build_request(filters[shape], self.sample, rng)
+            began = time.perf_counter()
+            try:
+                db.execute_query(page_sql, page_params).fetchall()
+                db.execute_query(count_sql, count_params).fetchone()
+            except Exception as e:
+                with self.lock:
+                    self.errors[shape] += 1
+                    if self.errors[shape] == 1:
+                        print(f"❌ {shape} query failed: {e}", file=sys.stderr)
+                continue
+            finished = time.perf_counter()
+
+            with self.lock:
+                self.latencies[shape].append(finished - scheduled)
+                self.service_times[shape].append(finished - began)
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Throughput and latency percentiles (ms) per shape, plus an `all` row."""
+        rows = []
+        shapes = [name for name, _, _ in WORKLOAD_SHAPES]
+        for shape in shapes + ['all']:
+            if shape == 'all':
+                latencies = [value for name in shapes for value in self.latencies[name]]
+                service_times = [value for name in shapes for value in self.service_times[name]]
+                errors = sum(self.errors.values())
+            else:
+                latencies, service_times, errors = self.latencies[shape], self.service_times[shape], self.errors[shape]
+
+            row = {
+                'shape': shape,
+                'requests': len(latencies),
+                'errors': errors,
+                'requests_per_second': round(len(latencies) / self.elapsed, 1) if self.elapsed > 0 else None
+            }
+            for percentile in PERCENTILES:
+                row[f'p{percentile}_ms'] = round(float(np.percentile(latencies, percentile)) * 1000, 2) if latencies else None
+            row['max_ms'] = round(max(latencies) * 1000, 2) if latencies else None
+            row['mean_service_ms'] = round(float(np.mean(service_times)) * 1000, 2) if service_times else None
+            rows.append(row)
+        return rows
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Load-test search_table with filter-route query shapes')
+    parser.add_argument('--database-url', required=True, help='PostgreSQL database URL holding generated data')
+    parser.add_argument('--db-backend', choices=gd.DB_BACKENDS, default='psycopg2', help='Database driver (default: psycopg2)')
+    parser.add_argument('--connections', type=int, default=8, help='Concurrent connections issuing requests (default: 8)')
+    parser.add_argument('--rate', type=float, help='Target requests per second across all connections (default: as fast as possible)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run the workload (default: 30)')
+    parser.add_argument('--sample-size', type=int, default=5000, help='search_table rows sampled for filter values (default: 5000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the request mix (default: 42)')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    parser.add_argument('--churn-rate', type=float, help='Listing mutations per second applied while the reads run (default: no churn)')
+    parser.add_argument('--churn-connections', type=int, default=2, help='Connections applying mutations with --churn-rate (default: 2)')
+    parser.add_argument('--churn-mix', type=churn_workload.parse_mix,
+                        default=churn_workload.CHURN_MUTATIONS,
+                        help='Shares of each mutation, e.g. price_change=0.5,status_change=0.2,new_listing=0.15,delisting=0.15 (the default)')
+
+    args = parser.parse_args()
+    if args.connections < (0 if args.churn_rate else 1):
+        parser.error("--connections must be at least 1, or 0 with --churn-rate")
+    if args.churn_rate and args.churn_connections < 1:
+        parser.error("--churn-connections must be at least 1")
+
+    # psycopg 3 pools are shared per database and size, so readers and writers draw from one pool holding both
+    pool_size = args.connections + (args.churn_connections if args.churn_rate else 0)
+    connections = []
+    churn_connections = []
+    churn = churn_thread = None
+    try:
+        for _ in range(args.connections):
+            db = gd.create_connection(args.database_url, args.db_backend, pool_size=pool_size)
+            if not db.connect():
+                sys.exit(1)
+            # Read-only requests: no transaction left open between them
+            db.commit()
+            db.set_autocommit(True)
+            connections.append(db)
+
+        if args.churn_rate:
+            for _ in range(args.churn_connections):
+                db = gd.create_connection(args.database_url, args.db_backend, pool_size=pool_size)
+                if not db.connect():
+                    sys.exit(1)
+                churn_connections.append(db)
+            try:
+                churn = churn_workload.ChurnRunner(churn_connections, args.seed, args.churn_rate, args.duration, args.churn_mix)
+            except ValueError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                sys.exit(1)
+            print(f"✍️  Applying {args.churn_rate:g} listing mutations/s on {args.churn_connections} connections...", file=sys.stderr)
+            churn_thread = threading.Thread(target=churn.run)
+            churn_thread.start()
+
+        runner = None
+        if connections:
+            sample = ValueSample.load(connections[0], args.sample_size)
+            target = f"{args.rate:g} requests/s" if args.rate else 'as fast as possible'
+            print(f"🔎 Running {len(WORKLOAD_SHAPES)} query shapes for {args.duration:g}s on {args.connections} connections, {target}...",
+                  file=sys.stderr)
+            runner = WorkloadRunner(connections, sample, args.seed, args.rate, args.duration).run()
+        if churn_thread is not None:
+            churn_thread.join()
+    finally:
+        # Stop the writers before their connections close under them
+        if churn_thread is not None and churn_thread.is_alive():
+            churn.stop()
+            churn_thread.join()
+        for db in connections + churn_connections:
+            db.close()
+
+    results = runner.report() if runner is not None else []
+    for row in results:
+        print(f"   {row['shape']:24} {row['requests']:>7} req {row['requests_per_second'] or 0:>8.1f} req/s "
+              + ' '.join(f"p{p} {row[f'p{p}_ms'] or 0:8.2f}ms" for p in PERCENTILES)
+              + (f"  ❌ {row['errors']} errors" if row['errors'] else ''), file=sys.stderr)
+
+    if churn is not None:
+        churn_results, churn_tables = churn.report()
+        for row in churn_results:
+            print(f"   {row['mutation']:24} {row['mutations']:>7} mut {row['mutations_per_second'] or 0:>8.1f} mut/s "
+                  + ' '.join(f"p{p} {row[f'p{p}_ms'] or 0:8.2f}ms" for p in PERCENTILES)
+                  + f"  search push {row['mean_search_push_ms'] or 0:.2f}ms"
+                  + (f"  ❌ {row['errors']} errors" if row['errors'] else ''), file=sys.stderr)
+        for row in churn_tables:
+            print(f"   {row['table']:24} +{row['inserted']} rows, {row['updated']} updates "
+                  f"({row['hot_update_ratio'] or 0:.0%} HOT), indexes +{row['index_bytes_growth'] / 2**20:.1f} MiB",
+                  file=sys.stderr)
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'db_backend': args.db_backend,
+        'connections': args.connections,
+        'target_rate': args.rate,
+        'duration': args.duration,
+        'seed': args.seed,
+        'results': results
+    }
+    if churn is not None:
+        report['churn'] = {
+            'target_rate': args.churn_rate,
+            'connections': args.churn_connections,
+            'mix': dict(args.churn_mix),
+            'results': churn_results,
+            'tables': churn_tables
+        }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
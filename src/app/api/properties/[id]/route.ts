@@ -14,7 +14,7 @@ import {
   propertyFeatureMappings,
   propertyFeatures
 } from '@/lib/db/schema'
-import { eq, desc, asc } from 'drizzle-orm'
+import { eq, and, gte, desc, asc } from 'drizzle-orm'
 
 export async function GET(
   request: NextRequest,
@@ -165,7 +165,8 @@ export async function GET(
       .leftJoin(propertyFeatures, eq(propertyFeatureMappings.featureId, propertyFeatures.id))
       .where(eq(propertyFeatureMappings.propertyId, id))
 
-    // Get property history
+    // Get property history. History is partitioned by month of event date and no
+    // event predates the listing, so bounding by listed date skips older partitions
     const history = await db
       .select({
         id: propertyHistory.id,
@@ -178,7 +179,10 @@ export async function GET(
         notes: propertyHistory.notes,
       })
       .from(propertyHistory)
-      .where(eq(propertyHistory.propertyId, id))
+      .where(and(
+        eq(propertyHistory.propertyId, id),
+        property.listedDate ? gte(propertyHistory.eventDate, new Date(property.listedDate)) : undefined
+      ))
       .orderBy(desc(propertyHistory.eventDate))
       .limit(20)
 
@@ -8,7 +8,8 @@ import {
   boolean, 
   timestamp, 
   date,
-  uuid
+  uuid,
+  primaryKey
 } from 'drizzle-orm/pg-core'
 
 export const provinces = pgTable('provinces', {
@@ -144,8 +145,10 @@ export const propertyImages = pgTable('property_images', {
   createdAt: timestamp('created_at').defaultNow().notNull(),
 })
 
+// Range-partitioned by month of event_date in schema.sql, so the primary key
+// has to include the partition key
 export const propertyHistory = pgTable('property_history', {
-  id: serial('id').primaryKey(),
+  id: serial('id').notNull(),
   propertyId: uuid('property_id').notNull(),
   eventType: varchar('event_type', { length: 50 }).notNull(),
   oldValue: text('old_value'),
@@ -154,4 +157,6 @@ export const propertyHistory = pgTable('property_history', {
   statusChange: varchar('status_change', { length: 100 }),
   eventDate: timestamp('event_date').defaultNow().notNull(),
   notes: text('notes'),
-})
\ No newline at end of file
+}, (table) => [
+  primaryKey({ columns: [table.id, table.eventDate] }),
+])
\ No newline at end of file